@@ -20,6 +20,13 @@ from typing import Union
 import numpy as np
 import matplotlib.pyplot as plt
 from abc import ABCMeta, abstractmethod
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import reverse_cuthill_mckee
+try:
+  import pymetis
+  METIS_on = True
+except ImportError:
+  METIS_on = False
 
 
 class BaseMesh(metaclass=ABCMeta):
@@ -170,16 +177,66 @@ class Mesh2D(BaseMesh):
     self.mesh_center = np.mean(self.nodes, axis=0)    # center of the mesh
     self.dim = 2
     self._subdomains = None
+    self.parts = None
 
   def set_subdomains(self, subdomains):
     self._subdomains = subdomains
 
+  def partition(self, nb_parts):
+    """partition the elements into nb_parts parts, METIS (pymetis) on the
+    dual graph if installed, recursive coordinate bisection otherwise"""
+    self.parts = partition_mesh(self.nodes, self.elem_connect, nb_parts)
+    return self.parts
+
+  def renumber(self, method='rcm', nb_parts=None, groups=None):
+    """renumber the nodes for a small bandwidth ('rcm': reverse
+    Cuthill-McKee on the node graph, 'morton': Z-order curve of the
+    coordinates), then the elements and the exterior facets by their first
+    node. The elements are sorted by groups (e.g. physical tags) first so
+    that the elements of a subdomain stay contiguous: the bases are paired
+    with the connectivity in order. If nb_parts is given the elements of a
+    group are sorted by part, a part is contiguous only inside a group. The
+    connectivities and the subdomains are renumbered in place
+    returns:
+    node_order, elem_order, facet_order: ndarray (new -> old)
+    """
+    self.nodes = np.asarray(self.nodes)
+    self.elem_connect = np.asarray(self.elem_connect)
+    node_order = node_ordering(self.nodes, self.elem_connect, method)
+    node_index = inverse_permutation(node_order)
+    self.nodes = self.nodes[node_order]
+    self.elem_connect = node_index[self.elem_connect]
+
+    # np.lexsort: the last key is the primary one
+    keys = [self.elem_connect.min(axis=1)]
+    if nb_parts is not None:
+      keys.append(self.partition(nb_parts))
+    if groups is not None:
+      keys.append(groups)
+    elem_order = np.lexsort(keys)
+    if nb_parts is not None:
+      self.parts = self.parts[elem_order]
+    self.elem_connect = self.elem_connect[elem_order]
+    elem_index = inverse_permutation(elem_order)
+    if self._subdomains is not None:
+      self._subdomains = {
+          key: np.sort(elem_index[elems])
+          for key, elems in self._subdomains.items()
+      }
+
+    facet_order = None
+    if self.exterior_facets is not None:
+      facets = node_index[np.asarray(self.exterior_facets)]
+      facet_order = np.argsort(facets.min(axis=1), kind='stable')
+      self.exterior_facets = facets[facet_order]
+    return node_order, elem_order, facet_order
+
   def get_mesh_order(self):
     """return order of mesh"""
     nb_node_per_elem = len(self.elem_connect[0])
-    if nb_node_per_elem == 3:
+    if nb_node_per_elem in [3, 4]:
       return 1
-    elif nb_node_per_elem == 6:
+    elif nb_node_per_elem in [6, 9]:
       return 2
 
   @property
@@ -276,6 +333,11 @@ class Mesh3D(Mesh2D):
     self.surface_connect = surface_connect
     self.mesh_center = np.mean(self.nodes, axis=0)
 
+  def renumber(self, method='rcm', nb_parts=None, groups=None):
+    orders = super().renumber(method, nb_parts, groups)
+    self.surface_connect = self.exterior_facets
+    return orders
+
   def get_mesh_coordinates(self):
     return super().get_mesh_coordinates()
 
@@ -285,9 +347,9 @@ class Mesh3D(Mesh2D):
   def get_mesh_order(self):
     """return order of mesh"""
     nb_node_per_elem = len(self.elem_connect[0])
-    if nb_node_per_elem == 4:
+    if nb_node_per_elem in [4, 8]:
       return 1
-    elif nb_node_per_elem == 10:
+    elif nb_node_per_elem in [10, 27]:
       return 2
 
   def compute_normal(self, facet):
@@ -321,14 +383,145 @@ def mesh_constructor(dim, nodes, elem_connect, edge_connect=None):
     raise ValueError("dimension not supported")
 
 
+def inverse_permutation(order):
+  """old -> new index of a permutation given as new -> old"""
+  inverse = np.empty_like(order)
+  inverse[order] = np.arange(len(order))
+  return inverse
+
+
+def node_graph(elem_connect, nb_nodes):
+  """adjacency of the nodes sharing an element (sparsity of the P1
+    matrices), csr_matrix (nb_nodes, nb_nodes)"""
+  elem_connect = np.asarray(elem_connect)
+  n_loc = elem_connect.shape[1]
+  rows = np.repeat(elem_connect, n_loc, axis=1).ravel()
+  cols = np.tile(elem_connect, (1, n_loc)).ravel()
+  graph = coo_matrix((np.ones(len(rows), dtype=np.int8), (rows, cols)),
+                     shape=(nb_nodes, nb_nodes)).tocsr()
+  graph.data[:] = 1
+  return graph
+
+
+def morton_ordering(points, bits=10):
+  """order of the points along a Z-order (Morton) space-filling curve"""
+  points = np.asarray(points, dtype=float).reshape(len(points), -1)
+  lower = points.min(axis=0)
+  extent = np.maximum(points.max(axis=0) - lower, np.finfo(float).tiny)
+  cells = ((points - lower) / extent * (2**bits - 1)).astype(np.int64)
+  dim = points.shape[1]
+  keys = np.zeros(len(points), dtype=np.int64)
+  for b in range(bits):
+    for d in range(dim):
+      keys |= ((cells[:, d] >> b) & 1) << (b * dim + d)
+  return np.argsort(keys, kind='stable')
+
+
+def node_ordering(nodes, elem_connect, method='rcm'):
+  """new -> old order of the nodes
+    parameters:
+    method: str
+        'rcm' (reverse Cuthill-McKee, small bandwidth and fill of the
+        direct solvers) or 'morton' (space-filling curve, locality only)
+    """
+  if method == 'rcm':
+    graph = node_graph(elem_connect, len(nodes))
+    return reverse_cuthill_mckee(graph, symmetric_mode=True).astype(int)
+  elif method == 'morton':
+    return morton_ordering(nodes)
+  else:
+    raise ValueError("renumbering method must be 'rcm' or 'morton'")
+
+
+def partition_elements(centroids, nb_parts):
+  """recursive coordinate bisection of the elements along the widest
+    direction, balanced parts without a graph partitioner
+    parameters:
+    centroids: ndarray (nb_elems, dim)
+    nb_parts: int
+    returns:
+    parts: ndarray (nb_elems,) part of every element
+    """
+  centroids = np.asarray(centroids).reshape(len(centroids), -1)
+  parts = np.zeros(len(centroids), dtype=int)
+
+  def bisect(elements, first_part, nb):
+    if nb == 1:
+      parts[elements] = first_part
+      return
+    points = centroids[elements]
+    axis = np.argmax(points.max(axis=0) - points.min(axis=0))
+    elements = elements[np.argsort(points[:, axis], kind='stable')]
+    nb_left = nb // 2
+    split = len(elements) * nb_left // nb
+    bisect(elements[:split], first_part, nb_left)
+    bisect(elements[split:], first_part + nb_left, nb - nb_left)
+
+  bisect(np.arange(len(centroids)), 0, nb_parts)
+  return parts
+
+
+def partition_mesh(nodes, elem_connect, nb_parts):
+  """part of every element, METIS on the dual graph (elements sharing a
+    node) if pymetis is installed, recursive coordinate bisection otherwise"""
+  nodes = np.asarray(nodes).reshape(len(nodes), -1)
+  elem_connect = np.asarray(elem_connect)
+  if nb_parts == 1:
+    return np.zeros(len(elem_connect), dtype=int)
+  if METIS_on:
+    nb_elems, n_loc = elem_connect.shape
+    incidence = coo_matrix(
+        (np.ones(elem_connect.size), (np.repeat(np.arange(nb_elems),
+                                                n_loc), elem_connect.ravel())),
+        shape=(nb_elems, len(nodes))).tocsr()
+    dual = (incidence @ incidence.T).tocsr()
+    dual.setdiag(0)
+    dual.eliminate_zeros()
+    _, parts = pymetis.part_graph(nb_parts,
+                                  xadj=dual.indptr,
+                                  adjncy=dual.indices)
+    return np.asarray(parts)
+  return partition_elements(nodes[elem_connect].mean(axis=1), nb_parts)
+
+
 # gmsh_type with mesh dimension and order
-GMSH_DIM_FACET_MAP = {(2, 1): 'triangle', (2, 2): 'triangle6', (3, 1): 'tetra'}
+GMSH_DIM_FACET_MAP = {
+    (2, 1): 'triangle',
+    (2, 2): 'triangle6',
+    (3, 1): 'tetra',
+    (3, 2): 'tetra10'
+}
 GMSH_DIM_EDGE_MAP = {
     (2, 1): 'line',
     (2, 2): 'line3',
     (3, 1): 'triangle',
     (3, 2): 'triangle6'
 }
+# quadrangles and hexahedra
+GMSH_DIM_TENSOR_FACET_MAP = {
+    (2, 1): 'quad',
+    (2, 2): 'quad9',
+    (3, 1): 'hexahedron',
+    (3, 2): 'hexahedron27'
+}
+GMSH_DIM_TENSOR_EDGE_MAP = {
+    (2, 1): 'line',
+    (2, 2): 'line3',
+    (3, 1): 'quad',
+    (3, 2): 'quad9'
+}
+# meshio node order -> node order of the Lagrange shape functions, the
+# tensor-product cells are lexicographic (x fastest, see TensorProductElement)
+LAGRANGE_NODE_ORDER = {
+    'tetra10': [0, 1, 2, 3, 4, 5, 8, 6, 9, 7],
+    'quad': [0, 1, 3, 2],
+    'quad9': [0, 4, 1, 7, 8, 5, 3, 6, 2],
+    'hexahedron': [0, 1, 3, 2, 4, 5, 7, 6],
+    'hexahedron27': [
+        0, 8, 1, 11, 24, 9, 3, 10, 2, 16, 22, 17, 20, 26, 21, 19, 23, 18, 4, 12,
+        5, 15, 25, 13, 7, 14, 6
+    ]
+}
 
 
 class MeshReader:
@@ -338,17 +531,53 @@ class MeshReader:
     self.meshio_object = meshio.read(mesh_file_name)
     self.dim = dim
     self.order = order
-
-  def get_mesh(self) -> BaseMesh:
+    # quadrangles/hexahedra when the mesh has no triangle/tetrahedron
+    cell_types = [cells.type for cells in self.meshio_object.cells]
+    if (GMSH_DIM_TENSOR_FACET_MAP.get((dim, order)) in cell_types and
+        GMSH_DIM_FACET_MAP.get((dim, order)) not in cell_types):
+      self.elem_type = GMSH_DIM_TENSOR_FACET_MAP[(dim, order)]
+      self.facet_type = GMSH_DIM_TENSOR_EDGE_MAP[(dim, order)]
+    else:
+      self.elem_type = GMSH_DIM_FACET_MAP.get((dim, order))
+      self.facet_type = GMSH_DIM_EDGE_MAP.get((dim, order))
+    # permutations (new -> old) of a renumbered mesh
+    self.node_order = None
+    self.elem_order = None
+    self.facet_order = None
+
+  def get_mesh(self, renumber=None, nb_parts=None) -> BaseMesh:
+    """renumber: None (gmsh numbering), 'rcm' or 'morton', see
+    Mesh2D.renumber; the physical tags follow the renumbering"""
     if self.extension == 'msh':
       # version 2.2 without saving all parameters
       nodes = self.meshio_object.points[:, :self.dim]
       for elem in self.meshio_object.cells:
-        if elem.type in GMSH_DIM_FACET_MAP[(self.dim, self.order)]:
+        if elem.type in self.elem_type:
           elem_connect = elem.data
-        elif elem.type in GMSH_DIM_EDGE_MAP[(self.dim, self.order)]:
+          if elem.type in LAGRANGE_NODE_ORDER:
+            elem_connect = elem_connect[:, LAGRANGE_NODE_ORDER[elem.type]]
+        elif elem.type in self.facet_type:
           facet_connect = elem.data
-      return mesh_constructor(self.dim, nodes, elem_connect, facet_connect)
+      mesh = mesh_constructor(self.dim, nodes, elem_connect, facet_connect)
+      self.node_order, self.elem_order, self.facet_order = None, None, None
+      if renumber is not None:
+        groups = self.meshio_object.cell_data_dict['gmsh:physical'][
+            self.elem_type]
+        self.node_order, self.elem_order, self.facet_order = mesh.renumber(
+            renumber, nb_parts, groups)
+      return mesh
+
+  def to_gmsh_numbering(self, nodal_values):
+    """nodal values of a renumbered mesh in the gmsh node order (e.g. for
+    save_plot with the meshio object)"""
+    if self.node_order is None:
+      return nodal_values
+    return np.asarray(nodal_values)[inverse_permutation(self.node_order)]
+
+  def renumbered(self, indices, order):
+    if order is None:
+      return indices
+    return np.sort(inverse_permutation(order)[indices])
 
   def init_subdomains(self, mesh: BaseMesh,
                       physical_tag2material: dict) -> dict:
@@ -370,10 +599,9 @@ class MeshReader:
       elem_tag = int(self.meshio_object.field_data[physical_tag][0])
     else:
       elem_tag = physical_tag
-    elem_index = np.where(
-        self.meshio_object.cell_data_dict['gmsh:physical'][GMSH_DIM_FACET_MAP[(
-            self.dim, self.order)]] == elem_tag)
-    return elem_index[0]
+    elem_index = np.where(self.meshio_object.cell_data_dict['gmsh:physical'][
+        self.elem_type] == elem_tag)
+    return self.renumbered(elem_index[0], self.elem_order)
 
   def get_facet_by_physical(self, physical_tag: Union[str, int]) -> np.ndarray:
     """return facet number by physical tag
@@ -386,10 +614,9 @@ class MeshReader:
       edge_tag = int(self.meshio_object.field_data[physical_tag][0])
     else:
       edge_tag = physical_tag
-    edge_index = np.where(
-        self.meshio_object.cell_data_dict['gmsh:physical'][GMSH_DIM_EDGE_MAP[(
-            self.dim, self.order)]] == edge_tag)
-    return edge_index[0]
+    edge_index = np.where(self.meshio_object.cell_data_dict['gmsh:physical'][
+        self.facet_type] == edge_tag)
+    return self.renumbered(edge_index[0], self.facet_order)
 
   def get_vertices_by_physical(self, physical_tag: Union[str,
                                                          int]) -> np.ndarray:
@@ -14,7 +14,8 @@ class ApplyBoundaryConditions:
     self.fe_space = fe_space
     self.left_hand_side = left_hand_side
     self.right_hand_side = right_hand_side
-    self.nb_dofs = fe_space.nb_dofs
+    # size of the (possibly condensed) linear system
+    self.nb_dofs = right_hand_side.shape[0]
     self.omega = omega
     self.dtype = self.right_hand_side.dtype
 
@@ -213,6 +214,26 @@ class ApplyBoundaryConditions:
             print("Nature BC type not supported")
 
 
+def impedance_mass_matrix(mesh, facets, nb_dofs, integr_order=3):
+  """real boundary mass matrix int N N^T over linear facets (2D lines),
+    for a uniform impedance Z the term of apply_impedance_bc is
+    1j/(omega*Z) times this matrix, see FrequencyOperator
+    returns:
+    csr_matrix (nb_dofs, nb_dofs) float64
+    """
+  lines = np.asarray(mesh.exterior_facets)[facets]
+  gl_pts, gl_wts = get_quadrature_points_weights(integr_order, 1)
+  N = np.array([N_i(gl_pts) for N_i in Lobatto(1).get_shape_functions()])
+  local = (N * gl_wts) @ N.T
+  jac = np.linalg.norm(mesh.nodes[lines[:, 0]] - mesh.nodes[lines[:, 1]],
+                       axis=1) / 2
+  data = jac[:, np.newaxis, np.newaxis] * local
+  rows = np.repeat(lines, 2, axis=1).ravel()
+  cols = np.tile(lines, (1, 2)).ravel()
+  return coo_matrix((data.ravel(), (rows, cols)),
+                    shape=(nb_dofs, nb_dofs)).tocsr()
+
+
 def compute_normal_vector(mesh, edge_or_facet):
   if len(edge_or_facet) == 2:
     edge = edge_or_facet
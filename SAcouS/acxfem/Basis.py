@@ -279,6 +279,7 @@ class Helmholtz1DElement(Lobbato1DElement):
 from SAcouS.acxfem.PrecomputeMatricesLag import points_o1, weights_o1
 from SAcouS.acxfem.PrecomputeMatricesLag import N_tri_p1, B_tri_p1, N_tri_p2, B_tri_p2, N_tetra_p1, B_tetra_p1, N_tetra_o2, B_tetra_o2
 from .Polynomial import Lagrange2DTri
+from .TensorProduct import tensor_product_element, tensor_element_matrices
 
 
 class BaseNDElement(metaclass=ABCMeta):
@@ -428,7 +429,7 @@ class Lagrange2DTriElement(BaseNDElement):
         elementary stiffness matrix
     """
     Ke = (self.B @ self.inv_J_product @ np.transpose(self.B, (0, 2, 1)) *
-          self.weights[:np.newaxis]).sum(axis=0) * self.det_J
+          self.weights[:, np.newaxis, np.newaxis]).sum(axis=0) * self.det_J
 
     return Ke
 
@@ -539,7 +540,7 @@ class Helmholtz2DElement(Lagrange2DTriElement):
     """
     Ke = self.mat_coeffs[0] * (self.B @ self.inv_J_product @ np.transpose(
         self.B,
-        (0, 2, 1)) * self.weights[:np.newaxis]).sum(axis=0) * self.det_J
+        (0, 2, 1)) * self.weights[:, np.newaxis, np.newaxis]).sum(axis=0) * self.det_J
 
     return Ke
 
@@ -557,44 +558,57 @@ class Helmholtz2DElement(Lagrange2DTriElement):
 
 
 class Lagrange2DQuadElement(BaseNDElement):
-  """FE lagrange 2D quad basis class
+  """FE lagrange 2D quad basis class, isoparametric, the element matrices are
+    computed with the sum-factorized kernels of TensorProduct
     parameters:
     order: int
         element order
     vertices: ndarray
-        [(x1, y1), (x2, y2), (x3, y3), (x4, y4)] for quad
-    reference element: [(0, 0), (1, 0), (0, 1), (1, 1)]
+        [(x1, y1), (x2, y2), (x3, y3), (x4, y4)] for quad, lexicographic
+        order (see Mesh.LAGRANGE_NODE_ORDER)
+    reference element: [-1, 1]^2
     illustrated as below:
-    3----2
+    2----3
     |    |
     |    |
     0----1
+
+    element in degree 2 with 9 nodes illustrated as below:
+    6--7--8
+    |  |  |
+    3--4--5
+    |  |  |
+    0--1--2
     """
 
+  dim = 2
+
   def __init__(self, label, order, vertices):
     super().__init__(label, order, vertices)
+    self.element = tensor_product_element(self.dim, order)
+    self.Jacobian()
+    self.determinant_Jacobian()
+    self.inverse_Jacobian()
 
   def Jacobian(self):
     """
-    compute the Jacobian of the element
+    compute the Jacobian of the element on the quadrature points
     returns:
-    J: 
+    J: ndarray (n_q, dim, dim)
     J=dx/dxi"""
-    self.J = np.array([[
-        self.vertices[1][0] - self.vertices[0][0],
-        self.vertices[1][1] - self.vertices[0][1]
-    ],
-                       [
-                           self.vertices[2][0] - self.vertices[0][0],
-                           self.vertices[2][1] - self.vertices[0][1]
-                       ]])
+    self.J = np.transpose(self.element.gradients(np.asarray(self.vertices).T),
+                          (2, 1, 0))
 
   def inverse_Jacobian(self):
-    self.inv_J = np.array([[self.J[1, 1], -self.J[0, 1]],
-                           [-self.J[1, 0], self.J[0, 0]]]) * 1 / self.det_J
+    self.inv_J = np.linalg.inv(self.J)
 
   def determinant_Jacobian(self):
-    self.det_J = self.J[0, 0] * self.J[1, 1] - self.J[0, 1] * self.J[1, 0]
+    self.det_J = np.linalg.det(self.J)
+
+  @cached_property
+  def element_matrices(self):
+    return tensor_element_matrices(
+        np.asarray(self.vertices)[np.newaxis], self.order)
 
   @cached_property
   def ke(self):
@@ -603,22 +617,75 @@ class Lagrange2DQuadElement(BaseNDElement):
     K: ndarray
         elementary stiffness matrix
     """
-    Ke = sum(self.B[i, :, :] @ self.inv_J_product @ self.B[i, :, :].T * weight
-             for i, weight in enumerate(self.weights)) * self.det_J
-
-    return Ke
+    return self.element_matrices[0][0]
 
   @cached_property
   def me(self):
-    """compute the elementary stiffness matrix
+    """compute the elementary mass matrix
     returns:
     m: ndarray
-        elementary stiffness matrix
+        elementary mass matrix
     """
-    weight = np.diag(
-        np.array([self.weights[0], self.weights[1], self.weights[2]]))
-    Me = self.N[:, :].T @ weight @ self.N[:, :] * self.det_J
-    return Me
+    return self.element_matrices[1][0]
+
+  @cached_property
+  def nb_internal_dofs(self):
+    return 0
+
+  @cached_property
+  def local_dofs_index(self):
+    return np.arange(self.element.nb_nodes)
+
+
+class Helmholtz2DQuadElement(Lagrange2DQuadElement):
+
+  def __init__(self, label, order, vertices, mat_coeffs=[]):
+    super().__init__(label, order, vertices)
+    self.mat_coeffs = mat_coeffs
+
+  @cached_property
+  def ke(self):
+    return self.mat_coeffs[0] * super().ke
+
+  @cached_property
+  def me(self):
+    return self.mat_coeffs[1] * super().me
+
+
+class Lagrange3DHexElement(Lagrange2DQuadElement):
+  """FE lagrange 3D hexahedron basis class, same tensor-product element as
+    Lagrange2DQuadElement
+    parameters:
+    order: int
+        element order
+    vertices: ndarray
+        8 ((order+1)**3) nodes, lexicographic order (x fastest)
+    reference element: [-1, 1]^3
+    illustrated as below:
+       6----7
+      /|   /|
+     4----5 |
+     | 2--|-3
+     |/   |/
+     0----1
+    """
+
+  dim = 3
+
+
+class Helmholtz3DHexElement(Lagrange3DHexElement):
+
+  def __init__(self, label, order, vertices, mat_coeffs=[]):
+    super().__init__(label, order, vertices)
+    self.mat_coeffs = mat_coeffs
+
+  @cached_property
+  def ke(self):
+    return self.mat_coeffs[0] * super().ke
+
+  @cached_property
+  def me(self):
+    return self.mat_coeffs[1] * super().me
 
 
 from SAcouS.acxfem.PrecomputeMatricesLag import points_tetra_o1, weights_tetra_o1
@@ -706,7 +773,7 @@ class Lagrange3DTetraElement(BaseNDElement):
         elementary stiffness matrix
     """
     Ke = (self.B @ self.inv_J_product @ np.transpose(self.B, (0, 2, 1)) *
-          self.weights[:np.newaxis]).sum(axis=0) * self.det_J
+          self.weights[:, np.newaxis, np.newaxis]).sum(axis=0) * self.det_J
 
     return Ke
 
@@ -0,0 +1,181 @@
+# This file is part of PyXfem, a software distributed under the MIT license.
+# For any question, please contact the authors cited below.
+#
+# Copyright (c) 2023
+# 	Shaoqi WU <shaoqiwu@outlook.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# element-level static condensation of the internal (bubble) dofs
+# the internal Lobatto dofs only couple with the dofs of their own element,
+# they are eliminated element by element before the global assembly
+
+from collections import defaultdict
+
+import numpy as np
+from scipy.sparse import coo_matrix
+
+
+class StaticCondensation:
+  """element-level static condensation for Helmholtz type problems
+    the local system 1/omega**2*ke - me of every element is split into
+    external (vertex) and internal (bubble) dofs, the internal dofs are
+    eliminated with batched Schur complements and recovered afterwards
+    parameters:
+    fe_space: FESpace
+        finite element space of the problem
+    bases: list of basis
+        elementary bases (with ke and me)
+    var: str
+        variable label, None for single variable problem
+    dtype: data type of linear system
+    """
+
+  def __init__(self, fe_space, bases, var=None, dtype=np.complex128):
+    self.fe_space = fe_space
+    self.nb_dofs = fe_space.nb_dofs
+    self.nb_external_dofs = fe_space.nb_external_dofs
+    self.dtype = dtype
+    if var is None:
+      dofs_index = fe_space.get_global_dofs()
+    else:
+      dofs_index = fe_space.get_global_dofs_by_base(var)
+
+    # elements with the same number of local dofs are treated in one batch
+    elements_by_size = defaultdict(list)
+    for i, dofs in enumerate(dofs_index):
+      elements_by_size[len(dofs)].append(i)
+
+    self.groups = []
+    for size, elements in elements_by_size.items():
+      dofs = np.array([dofs_index[i] for i in elements], dtype=int)
+      is_external = dofs[0] < self.nb_external_dofs
+      self.groups.append({
+          'dofs': dofs,
+          'ke': np.array([bases[i].ke for i in elements]),
+          'me': np.array([bases[i].me for i in elements]),
+          'external': np.where(is_external)[0],
+          'internal': np.where(~is_external)[0]
+      })
+    self.local_solutions = [None] * len(self.groups)
+
+  def element_matrices(self, omega):
+    """return the elementary matrices 1/omega**2*ke - me of each batch,
+        a vector of frequencies adds a leading dimension"""
+    omega = np.asarray(omega, dtype=float)[..., None, None, None]
+    return [group['ke'] / omega**2 - group['me'] for group in self.groups]
+
+  def condense_elements(self, omega, right_hand_side=None):
+    """batched Schur complements of the elements
+        returns:
+        list of (external dofs, Schur complements, condensed local rhs)
+        """
+    condensed = []
+    for i_group, (group, A) in enumerate(
+        zip(self.groups, self.element_matrices(omega))):
+      ext, inn = group['external'], group['internal']
+      dofs_e = group['dofs'][:, ext]
+      A_ee = A[..., ext[:, None], ext]
+      g_e = None
+      if len(inn) > 0:
+        A_ei = A[..., ext[:, None], inn]
+        A_ie = A[..., inn[:, None], ext]
+        A_ii = A[..., inn[:, None], inn]
+        if right_hand_side is None:
+          f_i = np.zeros(A.shape[:-2] + (len(inn), 1), dtype=A.dtype)
+        else:
+          f_i = right_hand_side[..., group['dofs'][:, inn]][..., None]
+        # X = A_ii^-1 [A_ie, f_i], one batched solve for all the elements
+        X = np.linalg.solve(A_ii, np.concatenate((A_ie, f_i), axis=-1))
+        A_ee = A_ee - A_ei @ X[..., :-1]
+        g_e = -(A_ei @ X[..., -1:])[..., 0]
+        self.local_solutions[i_group] = X
+      condensed.append((dofs_e, A_ee, g_e))
+    return condensed
+
+  def condense(self, omega, right_hand_side=None):
+    """condense the internal dofs and assemble the external system
+        parameters:
+        omega: float
+            angular frequency
+        right_hand_side: ndarray
+            global right hand side (nb_dofs), internal entries are condensed
+        returns:
+        left_hand_side: csr matrix (nb_external_dofs x nb_external_dofs)
+        right_hand_side: ndarray (nb_external_dofs)
+        """
+    rows = []
+    cols = []
+    data = []
+    condensed_rhs = np.zeros(self.nb_external_dofs, dtype=self.dtype)
+    if right_hand_side is not None:
+      condensed_rhs += right_hand_side[:self.nb_external_dofs]
+
+    for dofs_e, S, g_e in self.condense_elements(omega, right_hand_side):
+      nb_ext = dofs_e.shape[1]
+      if g_e is not None:
+        np.add.at(condensed_rhs, dofs_e, g_e)
+      rows.append(np.repeat(dofs_e, nb_ext, axis=1).ravel())
+      cols.append(np.tile(dofs_e, (1, nb_ext)).ravel())
+      data.append(S.ravel())
+
+    left_hand_side = coo_matrix(
+        (np.concatenate(data), (np.concatenate(rows), np.concatenate(cols))),
+        shape=(self.nb_external_dofs, self.nb_external_dofs),
+        dtype=self.dtype).tocsr()
+    return left_hand_side, condensed_rhs
+
+  def condense_banded(self, omegas):
+    """condense the internal dofs of a 1D chain of elements and return the
+        tridiagonal external system for all the frequencies at once
+        (the elementary matrices must not depend on the frequency)
+        parameters:
+        omegas: float or ndarray (n_freq,)
+        returns:
+        lower, diag, upper: ndarray (..., n-1), (..., n), (..., n-1)
+        """
+    shape = np.shape(omegas)
+    diag = np.zeros(shape + (self.nb_external_dofs,), dtype=self.dtype)
+    lower = np.zeros(shape + (self.nb_external_dofs - 1,), dtype=self.dtype)
+    upper = np.zeros(shape + (self.nb_external_dofs - 1,), dtype=self.dtype)
+    for dofs_e, S, _ in self.condense_elements(omegas):
+      if dofs_e.shape[1] != 2 or np.any(
+          np.abs(dofs_e[:, 1] - dofs_e[:, 0]) != 1):
+        raise ValueError("the condensed system is not tridiagonal")
+      first = np.minimum(dofs_e[:, 0], dofs_e[:, 1])
+      swap = dofs_e[:, 0] > dofs_e[:, 1]
+      np.add.at(diag, (..., dofs_e[:, 0]), S[..., 0, 0])
+      np.add.at(diag, (..., dofs_e[:, 1]), S[..., 1, 1])
+      np.add.at(upper, (..., first), np.where(swap, S[..., 1, 0], S[..., 0, 1]))
+      np.add.at(lower, (..., first), np.where(swap, S[..., 0, 1], S[..., 1, 0]))
+    return lower, diag, upper
+
+  def recover(self, u_external):
+    """back-substitute the internal dofs from the external solution
+        parameters:
+        u_external: ndarray
+            solution on the external dofs, (n_freq, nb_external_dofs) after
+            a banded condensation
+        returns:
+        u: ndarray
+            solution on all the dofs
+        """
+    u = np.zeros(u_external.shape[:-1] + (self.nb_dofs,),
+                 dtype=np.result_type(u_external, self.dtype))
+    u[..., :self.nb_external_dofs] = u_external[..., :self.nb_external_dofs]
+    for group, X in zip(self.groups, self.local_solutions):
+      if X is None:
+        continue
+      dofs = group['dofs']
+      u_e = u[..., dofs[:, group['external']]][..., None]
+      u_i = X[..., -1] - (X[..., :-1] @ u_e)[..., 0]
+      u[..., dofs[:, group['internal']]] = u_i
+    return u
@@ -0,0 +1,166 @@
+# This file is part of PyXfem, a software distributed under the MIT license.
+# For any question, please contact the authors cited below.
+#
+# Copyright (c) 2023
+# 	Shaoqi WU <shaoqiwu@outlook.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+
+# batched element kernels of the simplex Lagrange elements and thread-parallel
+# assembly: the elements are colored so that the elements of one color never
+# share a dof, every color is split in chunks summed concurrently in place
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from .PrecomputeMatricesLag import N_tri_p1, B_tri_p1, N_tri_p2, B_tri_p2
+from .PrecomputeMatricesLag import N_tetra_p1, B_tetra_p1, weights_tetra_o1
+from .PrecomputeMatricesLag import N_tetra_o2, B_tetra_o2, weights_tetra_o2
+from .Quadratures import get_quadrature_points_weights
+from .PhysicAssembler import get_indeces, csr_pattern
+
+# (dim, order): shape functions and derivatives on the quadrature points,
+# quadrature weights, same rules as Lagrange2DTriElement/Lagrange3DTetraElement
+REFERENCE_ELEMENTS = {
+    (2, 1): (N_tri_p1, B_tri_p1, get_quadrature_points_weights(3, 2)[1]),
+    (2, 2): (N_tri_p2, B_tri_p2, get_quadrature_points_weights(6, 2)[1]),
+    (3, 1): (N_tetra_p1, B_tetra_p1, weights_tetra_o1),
+    (3, 2): (N_tetra_o2, B_tetra_o2, weights_tetra_o2),
+}
+
+
+def simplex_element_matrices(vertices, order=1, coeffs=None):
+  """stiffness and mass matrices of a batch of triangles/tetrahedra, the
+    batched version of Helmholtz2DElement/Helmholtz3DElement ke and me
+    parameters:
+    vertices: ndarray (n_e, n_nodes, dim) element nodes, vertices first
+    order: int
+    coeffs: ndarray (n_e, 2) coefficients of ke and me (e.g. 1/rho_f,
+        1/K_f), geometric matrices if None
+    returns:
+    ke, me: ndarray (n_e, n_loc, n_loc)
+    """
+  vertices = np.asarray(vertices)
+  dim = vertices.shape[2]
+  N, B, weights = REFERENCE_ELEMENTS[(dim, order)]
+  J = vertices[:, 1:dim + 1, :] - vertices[:, :1, :]
+  det_J = np.linalg.det(J)
+  inv_J = np.linalg.inv(J)
+  inv_J_product = np.transpose(inv_J, (0, 2, 1)) @ inv_J
+  # sum_q w_q B_q G B_q^T, G = J^-T J^-1
+  ke = np.einsum('qid,edf,qjf,q->eij', B, inv_J_product, B, weights,
+                 optimize=True) * det_J[:, np.newaxis, np.newaxis]
+  me = (N.T * weights[:len(N)]) @ N
+  me = me[np.newaxis] * det_J[:, np.newaxis, np.newaxis]
+  if coeffs is not None:
+    coeffs = np.asarray(coeffs)
+    ke = ke * coeffs[:, 0, np.newaxis, np.newaxis]
+    me = me * coeffs[:, 1, np.newaxis, np.newaxis]
+  return ke, me
+
+
+def color_elements(dofs_index):
+  """greedy coloring of the elements, two elements sharing a dof never have
+    the same color
+    parameters:
+    dofs_index: ndarray (n_e, n_loc) global dofs of the elements
+    returns:
+    colors: ndarray (n_e,)
+    """
+  dofs_index = np.asarray(dofs_index)
+  # bit c of used[d]: color c is taken by an element of dof d, Python ints
+  # do not bound the number of colors (high valence meshes)
+  used = [0] * (int(dofs_index.max()) + 1)
+  colors = np.empty(len(dofs_index), dtype=int)
+  for e, dofs in enumerate(dofs_index.tolist()):
+    taken = 0
+    for dof in dofs:
+      taken |= used[dof]
+    free = ~taken & (taken + 1)    # lowest zero bit
+    colors[e] = free.bit_length() - 1
+    for dof in dofs:
+      used[dof] |= free
+  return colors
+
+
+class ColoredAssembly:
+  """thread-parallel assembly of element matrices on the shared CSR pattern
+    of the dof map: the elements of one color do not share a dof, so their
+    contributions hit distinct CSR entries and the chunks of a color are
+    summed in place concurrently (the kernels run in NumPy without the GIL);
+    the colors are processed one after the other, the result does not depend
+    on the number of threads
+    parameters:
+    dofs_index: ndarray (n_e, n_loc) global dofs of the elements
+    nb_dofs: int
+    chunk_size: int
+        number of elements per task
+    nb_threads: int
+        number of threads, os.cpu_count() if None
+    """
+
+  def __init__(self, dofs_index, nb_dofs, chunk_size=4096, nb_threads=None):
+    self.dofs_index = np.asarray(dofs_index)
+    self.nb_dofs = nb_dofs
+    self.chunk_size = chunk_size
+    self.nb_threads = os.cpu_count() if nb_threads is None else nb_threads
+    n_e, n_loc = self.dofs_index.shape
+    global_indices = get_indeces(np.arange(n_loc))
+    rows = self.dofs_index[:, global_indices[:, 0]].ravel()
+    cols = self.dofs_index[:, global_indices[:, 1]].ravel()
+    indptr, indices, entries = csr_pattern(rows, cols, nb_dofs)
+    self.pattern = (indptr, indices)
+    self.entries = entries.reshape(n_e, n_loc * n_loc)
+    self.colors = color_elements(self.dofs_index)
+    self.chunks = []
+    for color in range(self.colors.max() + 1):
+      elements = np.where(self.colors == color)[0]
+      self.chunks.append([
+          elements[i:i + chunk_size]
+          for i in range(0, len(elements), chunk_size)
+      ])
+
+  @property
+  def nb_colors(self):
+    return len(self.chunks)
+
+  def assemble(self, kernel, nb_outputs=2, dtype=np.float64):
+    """sum the element matrices on the pattern
+        parameters:
+        kernel: callable(elements) -> tuple of nb_outputs ndarray
+            batched element matrices (n_c, n_loc, n_loc) of the elements
+        returns:
+        list of nb_outputs ndarray, CSR values on self.pattern
+        """
+    nnz = len(self.pattern[1])
+    data = [np.zeros(nnz, dtype=dtype) for _ in range(nb_outputs)]
+
+    def scatter(elements):
+      values = kernel(elements)
+      entries = self.entries[elements].ravel()
+      for data_i, values_i in zip(data, values):
+        # no repeated entry within a color: plain fancy indexing
+        data_i[entries] += values_i.reshape(-1)
+
+    with ThreadPoolExecutor(self.nb_threads) as executor:
+      for chunks in self.chunks:
+        list(executor.map(scatter, chunks))
+    return data
+
+
+def helmholtz_coefficients(fe_space):
+  """(1/rho_f, 1/K_f) of every element from the subdomains of the mesh"""
+  index2material = fe_space.element_index2material
+  return np.array([(1 / index2material[e].rho_f, 1 / index2material[e].K_f)
+                   for e in range(fe_space.mesh.get_nb_elems())])
@@ -0,0 +1,225 @@
+# This file is part of PyXfem, a software distributed under the MIT license.
+# For any question, please contact the authors cited below.
+#
+# Copyright (c) 2023
+# 	Shaoqi WU <shaoqiwu@outlook.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+
+
+# matrix-free Helmholtz operator: the element dofs are gathered, the batched
+# reference kernels are applied with the geometric factors of every element
+# and the results are scatter-added, neither the global nor the element
+# matrices are stored
+
+import numpy as np
+from scipy.sparse.linalg import LinearOperator
+
+from .ElementKernels import REFERENCE_ELEMENTS
+from .TensorProduct import tensor_product_element
+
+
+class MatrixFreeHelmholtz:
+  """A(omega) = K/omega**2 - M of the Lagrange triangles/tetrahedra applied
+    element by element, the storage is the dofs, dim*dim + 1 geometric
+    factors and 2 coefficients per element instead of the sparse matrix
+    (about n_loc**2/2 entries per element), the gain grows with the order
+    parameters:
+    vertices: ndarray (n_e, n_nodes, dim) element nodes, vertices first
+    dofs_index: ndarray (n_e, n_loc) global dofs of the elements
+    nb_dofs: int
+    order: int
+    coeffs: ndarray (n_e, 2) coefficients of ke and me (e.g. 1/rho_f,
+        1/K_f), geometric operator if None
+    chunk_size: int
+        number of elements per batch, bounds the temporaries
+    """
+
+  def __init__(self,
+               vertices,
+               dofs_index,
+               nb_dofs,
+               order=1,
+               coeffs=None,
+               chunk_size=4096):
+    vertices = np.asarray(vertices)
+    dim = vertices.shape[2]
+    self.N, B, self.weights = REFERENCE_ELEMENTS[(dim, order)]
+    # (n_loc, n_q*dim): gradients on the quadrature points by one product
+    self.B = np.transpose(B, (1, 0, 2)).reshape(B.shape[1], -1)
+    self.dofs_index = np.asarray(dofs_index, dtype=np.int32)
+    self.nb_dofs = nb_dofs
+    self.chunk_size = chunk_size
+    if coeffs is None:
+      coeffs = np.ones((len(self.dofs_index), 2))
+    self.coeffs = np.asarray(coeffs)
+    J = vertices[:, 1:dim + 1, :] - vertices[:, :1, :]
+    self.det_J = np.linalg.det(J)
+    inv_J = np.linalg.inv(J)
+    # same factors as simplex_element_matrices: ke = sum_q w_q B_q G B_q^T
+    self.geometric_factors = (np.transpose(inv_J, (0, 2, 1)) @
+                              inv_J) * self.det_J[:, np.newaxis, np.newaxis]
+    self.dtype = np.result_type(self.coeffs.dtype, np.complex128)
+
+  @classmethod
+  def from_mesh(cls, mesh, order=None, chunk_size=4096):
+    """operator of a fluid mesh with subdomains, the dofs are the nodes of
+        the connectivity (P2/Q2 meshes for order 2)"""
+    connectivity = np.asarray(mesh.connectivity)
+    if order is None:
+      order = mesh.get_mesh_order()
+    dtype = np.result_type(
+        *[np.array([mat.rho_f, mat.K_f]) for mat in mesh.subdomains])
+    coeffs = np.zeros((len(connectivity), 2), dtype=dtype)
+    for mat, elems in mesh.subdomains.items():
+      coeffs[elems] = (1 / mat.rho_f, 1 / mat.K_f)
+    return cls(mesh.nodes[connectivity], connectivity, mesh.get_nb_nodes(),
+               order, coeffs, chunk_size)
+
+  @property
+  def nbytes(self):
+    return (self.dofs_index.nbytes + self.geometric_factors.nbytes +
+            self.det_J.nbytes + self.coeffs.nbytes)
+
+  def chunks(self):
+    for start in range(0, len(self.dofs_index), self.chunk_size):
+      yield slice(start, start + self.chunk_size)
+
+  def matvec(self, x, omega):
+    """A(omega) x"""
+    x = np.ravel(x)
+    y = np.zeros(self.nb_dofs, dtype=np.result_type(self.dtype, x.dtype))
+    N, B, weights = self.N, self.B, self.weights
+    nb_points = len(weights)
+    for chunk in self.chunks():
+      dofs = self.dofs_index[chunk]
+      x_e = x[dofs]
+      n_c = len(x_e)
+      # reference gradients and values on the quadrature points
+      gradients = (x_e @ B).reshape(n_c, nb_points, -1)
+      fluxes = (gradients @ self.geometric_factors[chunk]) * weights[:,
+                                                                     np.newaxis]
+      coeffs = self.coeffs[chunk]
+      y_e = (fluxes.reshape(n_c, -1) @ B.T) * (coeffs[:, 0, np.newaxis] /
+                                                omega**2)
+      values = (x_e @ N.T) * weights
+      y_e -= (values @ N) * (self.det_J[chunk] * coeffs[:, 1])[:, np.newaxis]
+      np.add.at(y, dofs, y_e)
+    return y
+
+  def diagonal(self, omega):
+    """diagonal of A(omega), e.g. for a Jacobi preconditioner"""
+    N, weights = self.N, self.weights
+    B = self.B.reshape(len(N.T), len(weights), -1)
+    diagonal = np.zeros(self.nb_dofs, dtype=self.dtype)
+    for chunk in self.chunks():
+      coeffs = self.coeffs[chunk]
+      d_e = np.einsum('iqd,edf,iqf,q->ei', B, self.geometric_factors[chunk], B,
+                      weights) * (coeffs[:, 0, np.newaxis] / omega**2)
+      d_e -= (weights @ N**2) * (self.det_J[chunk] * coeffs[:, 1])[:,
+                                                                   np.newaxis]
+      np.add.at(diagonal, self.dofs_index[chunk], d_e)
+    return diagonal
+
+  def as_linear_operator(self, omega):
+    """LinearOperator of A(omega) for the Krylov solvers (cocg, gmres),
+        LinearSolver.solve(operator, rhs, solver='cocg') included"""
+    return HelmholtzOperator(self, omega)
+
+
+class TensorProductHelmholtz(MatrixFreeHelmholtz):
+  """A(omega) = K/omega**2 - M of the quadrangles/hexahedra applied with the
+    sum-factorized kernels of TensorProductElement, O(p^(dim+1)) per element;
+    the geometric factors are stored on the quadrature points (curved
+    isoparametric elements)
+    parameters:
+    vertices: ndarray (n_e, (order+1)**dim, dim) element nodes, lexicographic
+    nb_points: int
+        Gauss points per direction, order + 1 if None
+    see MatrixFreeHelmholtz for the others
+    """
+
+  def __init__(self,
+               vertices,
+               dofs_index,
+               nb_dofs,
+               order=1,
+               coeffs=None,
+               chunk_size=4096,
+               nb_points=None):
+    vertices = np.asarray(vertices)
+    self.element = tensor_product_element(vertices.shape[2], order, nb_points)
+    self.dofs_index = np.asarray(dofs_index, dtype=np.int32)
+    self.nb_dofs = nb_dofs
+    self.chunk_size = chunk_size
+    if coeffs is None:
+      coeffs = np.ones((len(self.dofs_index), 2))
+    self.coeffs = np.asarray(coeffs)
+    self.geometric_factors, self.mass_factors = self.element.geometric_factors(
+        vertices)
+    self.dtype = np.result_type(self.coeffs.dtype, np.complex128)
+
+  @property
+  def nbytes(self):
+    return (self.dofs_index.nbytes + self.geometric_factors.nbytes +
+            self.mass_factors.nbytes + self.coeffs.nbytes)
+
+  def matvec(self, x, omega):
+    """A(omega) x"""
+    x = np.ravel(x)
+    y = np.zeros(self.nb_dofs, dtype=np.result_type(self.dtype, x.dtype))
+    for chunk in self.chunks():
+      dofs = self.dofs_index[chunk]
+      x_e = x[dofs]
+      coeffs = self.coeffs[chunk]
+      y_e = self.element.apply_stiffness(
+          x_e, self.geometric_factors[chunk]) * (coeffs[:, 0, np.newaxis] /
+                                                 omega**2)
+      y_e -= self.element.apply_mass(
+          x_e, self.mass_factors[chunk]) * coeffs[:, 1, np.newaxis]
+      np.add.at(y, dofs, y_e)
+    return y
+
+  def diagonal(self, omega):
+    """diagonal of A(omega), e.g. for a Jacobi preconditioner"""
+    identity = np.identity(self.element.nb_nodes)
+    B = self.element.gradients(identity)
+    N = self.element.values(identity)
+    diagonal = np.zeros(self.nb_dofs, dtype=self.dtype)
+    for chunk in self.chunks():
+      coeffs = self.coeffs[chunk]
+      d_e = np.einsum('iaq,eqab,ibq->ei', B, self.geometric_factors[chunk],
+                      B) * (coeffs[:, 0, np.newaxis] / omega**2)
+      d_e -= (self.mass_factors[chunk] @ (N**2).T) * coeffs[:, 1, np.newaxis]
+      np.add.at(diagonal, self.dofs_index[chunk], d_e)
+    return diagonal
+
+
+class HelmholtzOperator(LinearOperator):
+  """A(omega) of a MatrixFreeHelmholtz, with its diagonal for the Jacobi
+    preconditioner"""
+
+  def __init__(self, matrix_free, omega):
+    super().__init__(matrix_free.dtype,
+                     (matrix_free.nb_dofs, matrix_free.nb_dofs))
+    self.matrix_free = matrix_free
+    self.omega = omega
+
+  def _matvec(self, x):
+    return self.matrix_free.matvec(x, self.omega)
+
+  def _rmatvec(self, x):
+    # complex symmetric: A^H x = conj(A conj(x))
+    return self.matrix_free.matvec(x.conj(), self.omega).conj()
+
+  def diagonal(self):
+    return self.matrix_free.diagonal(self.omega)
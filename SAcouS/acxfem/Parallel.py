@@ -0,0 +1,222 @@
+# This file is part of PyXfem, a software distributed under the MIT license.
+# For any question, please contact the authors cited below.
+#
+# Copyright (c) 2023
+# 	Shaoqi WU <shaoqiwu@outlook.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# distributed assembly and solve over MPI ranks: the elements are partitioned,
+# every rank assembles its own elements and owns a contiguous block of rows
+
+import numpy as np
+from scipy.sparse import csr_matrix, vstack
+from scipy.sparse.linalg import spsolve
+
+from ..Mesh import partition_elements
+from .PhysicAssembler import get_indeces, csr_pattern
+from .Solver import PETScSolver
+try:
+  from mpi4py import MPI
+  MPI_on = True
+except ImportError:
+  MPI_on = False
+try:
+  from petsc4py import PETSc
+  PETSC_on = True
+except ImportError:
+  PETSC_on = False
+
+
+class DistributedAssembler:
+  """Helmholtz assembler distributed over the ranks of an MPI communicator
+    every rank reads the whole mesh (MeshReader) but only assembles the
+    elements of its partition. A dof belongs to the lowest rank of the
+    elements sharing it, the dofs are renumbered so that every rank owns a
+    contiguous range of rows; the contributions to ghost dofs (owned by
+    another rank) are sent to their owner
+    parameters:
+    mesh: mesh of the fe_space
+    fe_space: FESpace
+    bases: list of basis
+        one basis per element
+    var: str
+        variable label
+    dtype: data type of linear system
+    comm: MPI communicator, MPI.COMM_WORLD if None
+    """
+
+  def __init__(self,
+               mesh,
+               fe_space,
+               bases,
+               var=None,
+               dtype=np.complex128,
+               comm=None):
+    if not MPI_on:
+      raise ImportError("mpi4py is required for the distributed assembly")
+    self.comm = MPI.COMM_WORLD if comm is None else comm
+    self.rank = self.comm.Get_rank()
+    self.size = self.comm.Get_size()
+    self.bases = bases
+    self.dtype = dtype
+    self.nb_global_dofs = fe_space.nb_dofs
+    if var is None:
+      self.dofs_index = fe_space.get_global_dofs()
+    else:
+      self.dofs_index = fe_space.get_global_dofs_by_base(var)
+
+    elements2node = mesh.get_mesh_coordinates()
+    centroids = [
+        np.mean(np.reshape(elements2node[i], (len(elements2node[i]), -1)),
+                axis=0) for i in range(len(bases))
+    ]
+    self.element_parts = partition_elements(centroids, self.size)
+    self.owned_elements = np.where(self.element_parts == self.rank)[0]
+
+    # owner of every dof and contiguous renumbering by owner
+    dof_owner = np.full(self.nb_global_dofs, self.size)
+    for dofs, part in zip(self.dofs_index, self.element_parts):
+      np.minimum.at(dof_owner, dofs, part)
+    self.permutation = np.argsort(dof_owner, kind='stable')    # new -> old
+    self.new_index = np.empty_like(self.permutation)    # old -> new
+    self.new_index[self.permutation] = np.arange(self.nb_global_dofs)
+    self.ranges = np.concatenate(
+        ([0], np.cumsum(np.bincount(dof_owner, minlength=self.size))))
+    self.start, self.end = self.ranges[self.rank], self.ranges[self.rank + 1]
+    self.nb_owned_dofs = self.end - self.start
+    touched = np.unique(
+        np.concatenate([self.dofs_index[e] for e in self.owned_elements]))
+    self.ghost_dofs = touched[dof_owner[touched] != self.rank]
+    self.K = None
+    self.M = None
+    self.A_petsc = None
+
+  def assemble(self):
+    """assemble the owned elements and gather the owned rows of K and M,
+        both blocks share one nonzero pattern (global column indices in the
+        new numbering)
+        returns:
+        K, M: csr_matrix (nb_owned_dofs, nb_global_dofs)
+        """
+    rows, cols, values = [], [], []
+    for e in self.owned_elements:
+      basis = self.bases[e]
+      local_indices = get_indeces(basis.local_dofs_index)
+      global_indices = get_indeces(self.new_index[self.dofs_index[e]])
+      rows.append(global_indices[:, 0])
+      cols.append(global_indices[:, 1])
+      values.append(
+          np.stack((basis.ke[local_indices[:, 0], local_indices[:, 1]],
+                    basis.me[local_indices[:, 0], local_indices[:, 1]]),
+                   axis=1))
+    rows = np.concatenate(rows) if rows else np.zeros(0, dtype=int)
+    cols = np.concatenate(cols) if cols else np.zeros(0, dtype=int)
+    values = np.concatenate(values) if values else np.zeros((0, 2))
+
+    # ghost rows go to their owner
+    owners = np.searchsorted(self.ranges, rows, side='right') - 1
+    send = [(rows[owners == r], cols[owners == r], values[owners == r])
+            for r in range(self.size)]
+    received = self.comm.alltoall(send)
+    rows = np.concatenate([item[0] for item in received]) - self.start
+    cols = np.concatenate([item[1] for item in received])
+    values = np.concatenate([item[2] for item in received]).astype(self.dtype)
+
+    indptr, indices, entries = csr_pattern(rows, cols, self.nb_global_dofs,
+                                           self.nb_owned_dofs)
+    data = np.zeros((len(indices), 2), dtype=self.dtype)
+    np.add.at(data, entries, values)
+    shape = (self.nb_owned_dofs, self.nb_global_dofs)
+    self.K = csr_matrix((data[:, 0], indices, indptr), shape=shape)
+    self.M = csr_matrix((data[:, 1], indices, indptr), shape=shape)
+    self.A_petsc = None
+    return self.K, self.M
+
+  def get_local_matrix(self, omega):
+    """owned rows of 1/omega**2*K - M"""
+    if self.K is None:
+      self.assemble()
+    return csr_matrix((self.K.data / omega**2 - self.M.data, self.K.indices,
+                       self.K.indptr),
+                      shape=self.K.shape)
+
+  def get_petsc_matrix(self, omega):
+    """parallel MPIAIJ matrix, preallocated from the owned rows; it is
+        created once and its values are updated at every frequency, the
+        same Mat is returned (PETScSolver keeps its symbolic factorization)"""
+    if not PETSC_on:
+      raise ImportError("petsc4py is required for the PETSc matrix")
+    local_matrix = self.get_local_matrix(omega)
+    indptr = local_matrix.indptr.astype(PETSc.IntType)
+    indices = local_matrix.indices.astype(PETSc.IntType)
+    if self.A_petsc is None:
+      sizes = (self.nb_owned_dofs, self.nb_global_dofs)
+      self.A_petsc = PETSc.Mat().createAIJ(size=(sizes, sizes),
+                                           csr=(indptr, indices),
+                                           comm=self.comm)
+    self.A_petsc.setValuesCSR(indptr, indices,
+                              local_matrix.data.astype(PETSc.ScalarType))
+    self.A_petsc.assemble()
+    return self.A_petsc
+
+  def distribute(self, right_hand_side):
+    """owned part (new numbering) of a global vector"""
+    return np.asarray(right_hand_side).ravel()[self.permutation[
+        self.start:self.end]]
+
+  def gather(self, owned_values):
+    """global vector (original numbering) on every rank"""
+    new_values = np.concatenate(self.comm.allgather(owned_values))
+    return new_values[self.new_index]
+
+
+class DistributedSolver:
+  """solver of a DistributedAssembler system: parallel MUMPS or a Krylov
+    solver of PETSc; without petsc4py the owned rows are gathered and
+    solved by spsolve on rank 0
+    parameters:
+    assembler: DistributedAssembler
+    options: dict
+        PETSc options, see PETScSolver
+    """
+
+  def __init__(self, assembler, options=None):
+    self.assembler = assembler
+    self.options = options
+    self.petsc = None
+    self.u = None
+
+  def solve(self, omega, right_hand_side):
+    """right_hand_side: global vector (original numbering), the solution
+        is returned on every rank"""
+    assembler = self.assembler
+    owned_rhs = assembler.distribute(right_hand_side)
+    if PETSC_on:
+      if self.petsc is None:
+        self.petsc = PETScSolver(self.options)
+      A = assembler.get_petsc_matrix(omega)
+      u_owned = self.petsc.solve(owned_rhs, A)
+    else:
+      local_matrix = assembler.get_local_matrix(omega)
+      blocks = assembler.comm.gather(local_matrix, root=0)
+      rhs_blocks = assembler.comm.gather(owned_rhs, root=0)
+      if assembler.rank == 0:
+        u = spsolve(vstack(blocks).tocsc(), np.concatenate(rhs_blocks))
+        u_blocks = [
+            u[assembler.ranges[r]:assembler.ranges[r + 1]]
+            for r in range(assembler.size)
+        ]
+      else:
+        u_blocks = None
+      u_owned = assembler.comm.scatter(u_blocks, root=0)
+    self.u = assembler.gather(u_owned)
+    return self.u
@@ -17,6 +17,8 @@
 # assembly the global/partial matrices according to the physic of the components
 from .Polynomial import Lobatto
 
+from functools import partial
+
 import numpy as np
 from scipy.sparse import csr_array, coo_matrix, lil_array
 from scipy.sparse import csr_matrix
@@ -25,7 +27,7 @@ try:
   from petsc4py.PETSc import Mat, Vec
   PETSC_on = True
 except ImportError:
-  pass
+  PETSC_on = False
 
 
 def get_indeces(*dofs):
@@ -41,6 +43,200 @@ def get_indeces(*dofs):
     raise ValueError("the number of dofs must be one or two")
 
 
+def index_dtype(max_value):
+  """int32 CSR indices while they fit, int64 beyond (e.g. nnz >= 2**31)"""
+  return np.int32 if max_value < np.iinfo(np.int32).max else np.int64
+
+
+def scatter_add(entries, values, size):
+  """sum the values with the same entry, np.bincount on the real and the
+    imaginary parts (much faster than np.add.at)
+    returns:
+    ndarray of the given size"""
+  if np.iscomplexobj(values):
+    return (np.bincount(entries, weights=values.real, minlength=size) +
+            1j * np.bincount(entries, weights=values.imag, minlength=size))
+  return np.bincount(entries, weights=values, minlength=size)
+
+
+def csr_pattern(rows, cols, nb_dofs, nb_rows=None):
+  """exact CSR nonzero pattern of a list of (row, col) entries with
+    duplicates (element contributions), nb_dofs columns and nb_rows rows
+    (nb_dofs if None)
+    returns:
+    indptr, indices: ndarray
+        CSR structure, sorted column indices
+    entries: ndarray
+        position of every entry in the CSR data, to sum the element values
+        with scatter_add
+    """
+  keys = rows.astype(np.int64) * nb_dofs + cols
+  unique_keys, entries = np.unique(keys, return_inverse=True)
+  index_type = index_dtype(max(len(unique_keys), nb_dofs))
+  indices = (unique_keys % nb_dofs).astype(index_type)
+  nb_rows = nb_dofs if nb_rows is None else nb_rows
+  indptr = np.zeros(nb_rows + 1, dtype=index_type)
+  np.cumsum(np.bincount(unique_keys // nb_dofs, minlength=nb_rows),
+            out=indptr[1:])
+  return indptr, indices, entries
+
+
+def dof_pairs(dofs_index, index_type=np.int32):
+  """(row, col) entries of the element matrices of a list of element dofs,
+    vectorized when all the elements have the same number of dofs"""
+  if len(set(len(dofs) for dofs in dofs_index)) == 1:
+    dofs = np.asarray(dofs_index, dtype=index_type)
+    n_loc = dofs.shape[1]
+    return np.repeat(dofs, n_loc, axis=1).ravel(), np.tile(dofs,
+                                                           (1, n_loc)).ravel()
+  pairs = np.concatenate([get_indeces(dofs) for dofs in dofs_index])
+  return pairs[:, 0].astype(index_type), pairs[:, 1].astype(index_type)
+
+
+def locate_entries(indptr, indices, rows, cols):
+  """position in the CSR data of the (row, col) entries, all present in the
+    pattern (indptr, indices) with sorted column indices; vectorized binary
+    search within the rows, no global key array
+    returns:
+    positions: ndarray
+    """
+  lo = indptr[rows].astype(np.int64)
+  hi = indptr[rows + 1].astype(np.int64)
+  active = lo < hi
+  while np.any(active):
+    mid = (lo + hi) // 2
+    right = active & (indices[np.where(active, mid, 0)] < cols)
+    lo = np.where(right, mid + 1, lo)
+    hi = np.where(active & ~right, mid, hi)
+    active = lo < hi
+  return lo
+
+
+def stiffness_coefficient(mat, omega):
+  """coefficient of the geometric stiffness matrix: 1/(omega**2*rho_f)"""
+  mat.set_frequency(omega)
+  return 1 / (omega**2 * mat.rho_f)
+
+
+def mass_coefficient(mat, omega):
+  """coefficient of the geometric mass matrix: -1/K_f"""
+  mat.set_frequency(omega)
+  return -1 / mat.K_f * np.ones_like(omega)
+
+
+def solid_stiffness_coefficient(mat, omega):
+  """coefficient of the geometric solid stiffness matrix of the Biot u-p
+  formulation: P_hat"""
+  mat.set_frequency(omega)
+  return mat.P_hat
+
+
+def solid_mass_coefficient(mat, omega):
+  """coefficient of the geometric solid mass matrix: -omega**2*rho_til"""
+  mat.set_frequency(omega)
+  return -omega**2 * mat.rho_til
+
+
+def coupling_coefficient(mat, omega):
+  """coefficient of the geometric u-p coupling matrix: -gamma_til"""
+  mat.set_frequency(omega)
+  return -mat.gamma_til
+
+
+class FrequencyOperator:
+  """frequency dependent operator A(omega) = sum_k theta_k(omega) A_k of
+    real matrices (geometric stiffness, mass, boundary mass...) stored once
+    in float64 on one shared CSR pattern, a term covering only a part of it
+    (subdomain, boundary) keeps its values and their positions; the
+    complex values only live in one buffer overwritten at every frequency,
+    the operator returned by assemble is a view of it
+    parameters:
+    dtype: complex data type of the operator
+    """
+
+  def __init__(self, dtype=np.complex128):
+    self.dtype = dtype
+    self.matrices = []
+    self.coefficients = []
+    self.pattern = None
+
+  def add_term(self, matrix, coefficient):
+    """add theta(omega) * matrix, the matrix entries have to be real: the
+        complex (e.g. material or impedance) part goes to the coefficient"""
+    matrix = csr_matrix(matrix)
+    if np.iscomplexobj(matrix.data):
+      if np.any(matrix.data.imag != 0.):
+        raise ValueError("the terms of a FrequencyOperator must be real")
+      matrix = matrix.real
+    matrix = matrix.astype(np.float64)
+    matrix.sum_duplicates()
+    self.matrices.append(matrix)
+    self.coefficients.append(coefficient)
+    self.pattern = None
+
+  def finalize(self):
+    """merge the patterns of the terms and locate their values on it"""
+    self.shape = self.matrices[0].shape
+    pattern = csr_matrix(self.shape, dtype=bool)
+    for matrix in self.matrices:
+      pattern = pattern + matrix.astype(bool)
+    pattern.sort_indices()
+    index_type = index_dtype(max(pattern.nnz, self.shape[1]))
+    indptr = pattern.indptr.astype(index_type)
+    indices = pattern.indices.astype(index_type)
+    self.pattern = (indptr, indices)
+    self.data = []
+    self.positions = []
+    for matrix in self.matrices:
+      rows = np.repeat(np.arange(self.shape[0]), np.diff(matrix.indptr))
+      positions = locate_entries(indptr, indices, rows, matrix.indices)
+      if len(positions) == len(indices):
+        # the term covers the whole pattern
+        data = np.zeros(len(indices))
+        data[positions] = matrix.data
+        self.data.append(data)
+        self.positions.append(None)
+      else:
+        self.data.append(matrix.data)
+        self.positions.append(positions.astype(index_type))
+    self.matrices = []
+    self.buffer = np.zeros(len(indices), dtype=self.dtype)
+    self.scratch = np.zeros(len(indices), dtype=np.finfo(self.dtype).dtype)
+
+  @property
+  def nbytes(self):
+    """memory of the stored terms and pattern (without the buffer)"""
+    if self.pattern is None:
+      self.finalize()
+    arrays = [*self.pattern, *self.data]
+    arrays += [p for p in self.positions if p is not None]
+    return sum(array.nbytes for array in arrays)
+
+  def assemble(self, omega):
+    """A(omega) in the buffer, valid until the next call
+        returns:
+        csr_matrix sharing the buffer and the pattern
+        """
+    if self.pattern is None:
+      self.finalize()
+    buffer = self.buffer.view(self.scratch.dtype).reshape(-1, 2)
+    buffer[:] = 0.
+    for data, positions, theta in zip(self.data, self.positions,
+                                      self.coefficients):
+      theta = complex(theta(omega))
+      scratch = self.scratch[:len(data)]
+      for part, value in enumerate((theta.real, theta.imag)):
+        np.multiply(data, value, out=scratch)
+        if positions is None:
+          buffer[:, part] += scratch
+        else:
+          buffer[positions, part] += scratch
+    indptr, indices = self.pattern
+    return csr_matrix((self.buffer, indices, indptr),
+                      shape=self.shape,
+                      copy=False)
+
+
 class BaseAssembler:
 
   def __init__(self, fe_space, dtype) -> None:
@@ -52,6 +248,10 @@ class BaseAssembler:
     self.fe_space = fe_space
     self.nb_global_dofs = fe_space.nb_dofs
     self.dtype = dtype
+    self.pattern = None
+    self.K_petsc = None
+    self.M_petsc = None
+    self.A_petsc = None
 
   def initial_matrix(self):
     self.K = 0.
@@ -134,22 +334,68 @@ class BaseAssembler:
                         shape=(self.nb_global_dofs, self.nb_global_dofs),
                         dtype=self.dtype).tocsr()
 
+  def assemble_subdomain_matrices(self, bases, subdomains, var=None):
+    """assemble the K and M matrices restricted to each subdomain
+        with geometric bases (unit material coefficients) they are the
+        spatial terms of the affine decomposition of the global operator
+        parameters:
+        bases: list of basis
+            one basis per element, in the element order of the mesh
+        subdomains: dict
+            {material: element indices}
+        returns:
+        dict {material: (K_s, M_s)}
+        """
+    if var is None:
+      dofs_index = self.fe_space.get_global_dofs()
+    else:
+      dofs_index = self.fe_space.get_global_dofs_by_base(var)
+    subdomain_matrices = {}
+    for mat, elems in subdomains.items():
+      rows = []
+      cols = []
+      data_K = []
+      data_M = []
+      for elem in elems:
+        basis = bases[elem]
+        local_indices = get_indeces(basis.local_dofs_index)
+        global_indices = get_indeces(dofs_index[elem])
+        rows.extend(global_indices[:, 0])
+        cols.extend(global_indices[:, 1])
+        data_K.extend(basis.ke[local_indices[:, 0], local_indices[:, 1]])
+        data_M.extend(basis.me[local_indices[:, 0], local_indices[:, 1]])
+      K_s = coo_matrix((data_K, (rows, cols)),
+                       shape=(self.nb_global_dofs, self.nb_global_dofs),
+                       dtype=self.dtype).tocsr()
+      M_s = coo_matrix((data_M, (rows, cols)),
+                       shape=(self.nb_global_dofs, self.nb_global_dofs),
+                       dtype=self.dtype).tocsr()
+      subdomain_matrices[mat] = (K_s, M_s)
+    return subdomain_matrices
+
 # ===================================== parallel assembly ==========================
 
-  def fast_assemble_global_material_matrix(self, bases, var=None):
+  def element_data(self, bases, var=None):
+    """(row, col) entries and K, M values of all the element matrices
+        returns:
+        rows, cols, data_K, data_M: ndarray
+        """
     if var is None:
       dofs_index = self.fe_space.get_global_dofs()
     else:
       dofs_index = self.fe_space.get_global_dofs_by_base(var)
+    return self.element_block(dofs_index, bases, 0, len(bases))
 
-    max_entries = len(dofs_index) * len(dofs_index[0]) * len(dofs_index[0])
-    rows = np.empty(max_entries, dtype=int)
-    cols = np.empty(max_entries, dtype=int)
+  def element_block(self, dofs_index, bases, start, end, index_type=int):
+    """entries and values of the elements start:end, see element_data"""
+    max_entries = sum(len(dofs)**2 for dofs in dofs_index[start:end])
+    rows = np.empty(max_entries, dtype=index_type)
+    cols = np.empty(max_entries, dtype=index_type)
     data_K = np.empty(max_entries, dtype=self.dtype)
     data_M = np.empty(max_entries, dtype=self.dtype)
 
     idx = 0
-    for i, (dofs, basis) in enumerate(zip(dofs_index, bases)):
+    for dofs, basis in zip(dofs_index[start:end], bases[start:end]):
       local_indices = get_indeces(basis.local_dofs_index)
       global_indices = get_indeces(dofs)
       elem_data_M = basis.me[local_indices[:, 0], local_indices[:, 1]]
@@ -161,14 +407,179 @@ class BaseAssembler:
       data_K[idx:idx + size] = elem_data_K
       data_M[idx:idx + size] = elem_data_M
       idx += size
+    return rows[:idx], cols[:idx], data_K[:idx], data_M[:idx]
 
-    self.M = csr_matrix((data_M[:idx], (rows[:idx], cols[:idx])),
+  def fast_assemble_global_material_matrix(self, bases, var=None):
+    rows, cols, data_K, data_M = self.element_data(bases, var)
+    self.M = csr_matrix((data_M, (rows, cols)),
                         shape=(self.nb_global_dofs, self.nb_global_dofs),
                         dtype=self.dtype)
-    self.K = csr_matrix((data_K[:idx], (rows[:idx], cols[:idx])),
+    self.K = csr_matrix((data_K, (rows, cols)),
                         shape=(self.nb_global_dofs, self.nb_global_dofs),
                         dtype=self.dtype)
 
+  def pattern_assemble_material_matrix(self, bases, var=None):
+    """sum the element values of K and M on the exact nonzero pattern of
+        the DOF map, both matrices share self.pattern = (indptr, indices)
+        returns:
+        K_data, M_data: ndarray CSR values
+        """
+    rows, cols, data_K, data_M = self.element_data(bases, var)
+    indptr, indices, entries = csr_pattern(rows, cols, self.nb_global_dofs)
+    K_data = scatter_add(entries, data_K, len(indices)).astype(self.dtype)
+    M_data = scatter_add(entries, data_M, len(indices)).astype(self.dtype)
+    self.pattern = (indptr, indices)
+    shape = (self.nb_global_dofs, self.nb_global_dofs)
+    self.K = csr_matrix((K_data, indices, indptr), shape=shape)
+    self.M = csr_matrix((M_data, indices, indptr), shape=shape)
+    return K_data, M_data
+
+  def streaming_assemble_material_matrix(self,
+                                        bases,
+                                        var=None,
+                                        memory_budget=2**28):
+    """memory-bounded assembly of K and M for very large meshes: the
+        elements are processed in blocks whose temporary entries fit in
+        memory_budget bytes. A first pass merges the nonzero pattern block
+        by block, a second pass sums the block values in place; K and M
+        share one structure self.pattern = (indptr, indices), int32 while
+        nnz < 2**31 and int64 beyond, the peak memory is the two CSR
+        matrices plus one block
+        parameters:
+        memory_budget: int
+            bytes of the temporary entries of one block
+        returns:
+        K_data, M_data: ndarray CSR values
+        """
+    if var is None:
+      dofs_index = self.fe_space.get_global_dofs()
+    else:
+      dofs_index = self.fe_space.get_global_dofs_by_base(var)
+    nb_elems = min(len(bases), len(dofs_index))
+    n = self.nb_global_dofs
+    # rows, cols (int32), K and M values, positions (int64) per entry
+    entry_size = 8 + 2 * np.dtype(self.dtype).itemsize + 8
+    max_loc = max(len(dofs) for dofs in dofs_index[:nb_elems])
+    chunk_size = max(1, int(memory_budget // (entry_size * max_loc**2)))
+    blocks = range(0, nb_elems, chunk_size)
+
+    pattern = csr_matrix((n, n), dtype=bool)
+    for start in blocks:
+      rows, cols = dof_pairs(dofs_index[start:min(start + chunk_size,
+                                                  nb_elems)])
+      pattern = pattern + csr_matrix(
+          (np.ones(len(rows), dtype=bool), (rows, cols)), shape=(n, n))
+    pattern.sort_indices()
+    index_type = index_dtype(max(pattern.nnz, n))
+    indptr = pattern.indptr.astype(index_type)
+    indices = pattern.indices.astype(index_type)
+    del pattern
+
+    K_data = np.zeros(len(indices), dtype=self.dtype)
+    M_data = np.zeros(len(indices), dtype=self.dtype)
+    for start in blocks:
+      rows, cols, data_K, data_M = self.element_block(
+          dofs_index, bases, start, start + chunk_size, index_dtype(n))
+      positions = locate_entries(indptr, indices, rows, cols)
+      np.add.at(K_data, positions, data_K)
+      np.add.at(M_data, positions, data_M)
+    self.pattern = (indptr, indices)
+    shape = (n, n)
+    self.K = csr_matrix((K_data, indices, indptr), shape=shape, copy=False)
+    self.M = csr_matrix((M_data, indices, indptr), shape=shape, copy=False)
+    return K_data, M_data
+
+  def threaded_assemble_material_matrix(self,
+                                       coeffs,
+                                       order=1,
+                                       var=None,
+                                       chunk_size=4096,
+                                       nb_threads=None,
+                                       element='simplex'):
+    """K and M of a triangle/tetrahedron mesh with the batched element
+        kernels and the colored thread-parallel assembly of ElementKernels,
+        the element matrices are computed from the mesh, not from the bases
+        parameters:
+        coeffs: ndarray (nb_elems, 2)
+            coefficients of ke and me of every element, see
+            ElementKernels.helmholtz_coefficients
+        order: int
+            element order
+        chunk_size: int
+            number of elements per task
+        nb_threads: int
+            number of threads, os.cpu_count() if None
+        element: str
+            'simplex' (triangles/tetrahedra) or 'tensor' (quadrangles/
+            hexahedra, sum-factorized kernels of TensorProduct)
+        returns:
+        K_data, M_data: ndarray CSR values on self.pattern
+        """
+    from .ElementKernels import ColoredAssembly, simplex_element_matrices
+    from .TensorProduct import tensor_element_matrices
+    if element not in ['simplex', 'tensor']:
+      raise ValueError("element must be 'simplex' or 'tensor'")
+    element_matrices = (simplex_element_matrices
+                        if element == 'simplex' else tensor_element_matrices)
+    if var is None:
+      dofs_index = self.fe_space.get_global_dofs()
+    else:
+      dofs_index = self.fe_space.get_global_dofs_by_base(var)
+    nodes = np.asarray(self.fe_space.mesh.nodes)
+    connect = np.asarray(self.fe_space.mesh.connectivity)
+    coeffs = np.asarray(coeffs)
+    assembly = ColoredAssembly(np.array(dofs_index), self.nb_global_dofs,
+                               chunk_size, nb_threads)
+
+    def kernel(elements):
+      return element_matrices(nodes[connect[elements]], order,
+                              coeffs[elements])
+
+    K_data, M_data = assembly.assemble(kernel, 2, self.dtype)
+    self.pattern = assembly.pattern
+    indptr, indices = self.pattern
+    shape = (self.nb_global_dofs, self.nb_global_dofs)
+    self.K = csr_matrix((K_data, indices, indptr), shape=shape)
+    self.M = csr_matrix((M_data, indices, indptr), shape=shape)
+    return K_data, M_data
+
+  def petsc_assemble_material_matrix(self, bases, var=None):
+    """PETSc K and M matrices with exact preallocation from the DOF map,
+        all the element blocks are inserted by one setValuesCSR call
+        returns:
+        K_petsc, M_petsc: PETSc.Mat
+        """
+    if not PETSC_on:
+      raise ImportError("petsc4py is required for the PETSc assembly")
+    K_data, M_data = self.pattern_assemble_material_matrix(bases, var)
+    indptr, indices = self.pattern
+    indptr = indptr.astype(PETSc.IntType)
+    indices = indices.astype(PETSc.IntType)
+    size = [self.nb_global_dofs, self.nb_global_dofs]
+    matrices = []
+    for data in (K_data, M_data):
+      A = PETSc.Mat().createAIJ(size, csr=(indptr, indices))
+      A.setValuesCSR(indptr, indices, data.astype(PETSc.ScalarType))
+      A.assemble()
+      matrices.append(A)
+    self.K_petsc, self.M_petsc = matrices
+    self.A_petsc = None
+    return self.K_petsc, self.M_petsc
+
+  def get_petsc_operator(self, omega):
+    """1/omega**2*K - M formed with MatAXPY, K and M share the same nonzero
+        pattern; one work matrix is allocated and refilled at every
+        frequency, the same Mat is returned (PETScSolver.set_operator keeps
+        its symbolic factorization)"""
+    same_pattern = PETSc.Mat.Structure.SAME_NONZERO_PATTERN
+    if self.A_petsc is None:
+      self.A_petsc = self.K_petsc.duplicate(copy=False)
+    A = self.A_petsc
+    A.zeroEntries()
+    A.axpy(1 / omega**2, self.K_petsc, structure=same_pattern)
+    A.axpy(-1., self.M_petsc, structure=same_pattern)
+    return A
+
   def super_fast_assemble_global_material_matrix(self, bases, omega, var=None):
     if var is None:
       dofs_index = self.fe_space.get_global_dofs()
@@ -213,8 +624,32 @@ class HelmholtzAssembler(BaseAssembler):
   def get_global_matrix(self, omega, var=None):
     return 1 / omega**2 * self.K - self.M
 
+  def frequency_operator(self, bases, subdomains, var=None):
+    """real storage of the Helmholtz operator, the materials only enter the
+        coefficients
+            A(omega) = sum_s 1/(omega**2*rho_s) K_s - 1/K_s M_s
+        parameters:
+        bases: list of basis
+            geometric bases (unit material coefficients), one per element
+        subdomains: dict
+            {material: element indices}
+        returns:
+        FrequencyOperator, add the boundary terms with add_term
+        """
+    dtype = np.result_type(self.dtype, np.complex64)
+    operator = FrequencyOperator(dtype)
+    subdomain_matrices = self.assemble_subdomain_matrices(
+        bases, subdomains, var)
+    for mat, (K_s, M_s) in subdomain_matrices.items():
+      operator.add_term(K_s, partial(stiffness_coefficient, mat))
+      operator.add_term(M_s, partial(mass_coefficient, mat))
+    return operator
+
   def get_global_PETSC_matrix(self, bases, omega, var=None):
-    return self.super_fast_assemble_global_material_matrix(bases, omega, var)
+    # K and M are assembled once, only the combination depends on omega
+    if self.K_petsc is None:
+      self.petsc_assemble_material_matrix(bases, var)
+    return self.get_petsc_operator(omega)
 
 
 class BiotAssembler(BaseAssembler):
@@ -255,6 +690,33 @@ class BiotAssembler(BaseAssembler):
 
     return self.C
 
+  def assemble_subdomain_coupling(self, bases, subdomains, var_1, var_2):
+    """assemble the coupling matrix C restricted to each subdomain, rows
+        of var_1 and columns of var_2 as in assemble_material_C, see
+        assemble_subdomain_matrices
+        returns:
+        dict {material: C_s}
+        """
+    dofs_index_1 = self.fe_space.get_global_dofs_by_base(var_1)
+    dofs_index_2 = self.fe_space.get_global_dofs_by_base(var_2)
+    subdomain_matrices = {}
+    for mat, elems in subdomains.items():
+      rows = []
+      cols = []
+      data = []
+      for elem in elems:
+        basis = bases[elem]
+        local_indices = get_indeces(basis.local_dofs_index)
+        global_indices = get_indeces(dofs_index_1[elem], dofs_index_2[elem])
+        rows.extend(global_indices[:, 0])
+        cols.extend(global_indices[:, 1])
+        data.extend(basis.ce[local_indices[:, 0], local_indices[:, 1]])
+      subdomain_matrices[mat] = coo_matrix(
+          (data, (rows, cols)),
+          shape=(self.nb_global_dofs, self.nb_global_dofs),
+          dtype=self.dtype).tocsr()
+    return subdomain_matrices
+
   def assembly_global_matrix(self, bases, vars):
     if len(bases) != len(vars) != 2:
       raise ValueError("the number of bases and variables have to be two")
@@ -342,12 +342,12 @@ class Lagrange3DTetra:
           [4 * u - 1, 0, 0],    # at (1,0,0)
           [0, 4 * v - 1, 0],    # at (0,1,0)
           [0, 0, 4 * w - 1],    # at (0,0,1)
-          [4 - 8 * v - 4 * w - 8 * u, -4 * u, -4 * u],    # between (0,1)
+          [4 - 8 * u - 4 * v - 4 * w, -4 * u, -4 * u],    # between (0,1)
           [4 * v, 4 * u, 0],    # between (1,2)
-          [0, 4 * w, 4 * u],    # between (1,2) and (1,3)
-          [-3 + 4 * w + 4 * u + 4 * v, -3 + 4 * u, -3 + 4 * u],
-          [0, 4 * w, 4 * v],
-          [4 * w, 0, 4 * v]
+          [4 * w, 0, 4 * u],    # between (1,3)
+          [-4 * v, 4 - 4 * u - 8 * v - 4 * w, -4 * v],    # between (0,2)
+          [0, 4 * w, 4 * v],    # between (2,3)
+          [-4 * w, -4 * w, 4 - 4 * u - 4 * v - 8 * w]    # between (0,3)
       ])
     else:
       print("cubic larange not supported yet")
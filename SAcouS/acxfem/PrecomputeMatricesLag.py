@@ -59,7 +59,8 @@ B_tetra_p1 = np.array([[[-1, -1, -1], [1, 0, 0], [0, 1, 0], [0, 0, 1]],
                        [[-1, -1, -1], [1, 0, 0], [0, 1, 0], [0, 0, 1]]])
 
 lag3d_poly_p2 = Lagrange3DTetra(2)
-points_tetra_p2, weights_tetra_o2 = get_quadrature_points_weights(5, 3)
+# degree 5 rule: exact for the P2 mass matrix
+points_tetra_p2, weights_tetra_o2 = get_quadrature_points_weights(14, 3)
 N_tetra_o2 = np.array(
     [lag3d_poly_p2.get_shape_functions(*point) for point in points_tetra_p2])
 B_tetra_o2 = np.array([
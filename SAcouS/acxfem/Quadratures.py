@@ -151,6 +151,32 @@ def gauss_legendre_1d_weights(n: int):
       ])
 
 
+@lru_cache
+def gauss_legendre_1d_interval(n: int,
+                               lower: float,
+                               upper: float,
+                               nb_intervals: int = 1):
+  """composite Gauss-Legendre quadrature mapped on [lower, upper]
+  args:
+    n: int, number of quadrature points per sub-interval
+    lower, upper: float, bounds of the integration interval
+    nb_intervals: int, number of sub-intervals
+  returns:
+    points, weights: read-only arrays of size n*nb_intervals
+    """
+  ref_points = gauss_legendre_1d_points(n)
+  ref_weights = gauss_legendre_1d_weights(n)
+  bounds = np.linspace(lower, upper, nb_intervals + 1)
+  half_length = (bounds[1:] - bounds[:-1]) / 2
+  middle = (bounds[1:] + bounds[:-1]) / 2
+  points = (middle[:, None] + half_length[:, None] * ref_points).ravel()
+  weights = (half_length[:, None] * ref_weights).ravel()
+  # the arrays are shared by all the callers of the cache
+  points.flags.writeable = False
+  weights.flags.writeable = False
+  return points, weights
+
+
 def gauss_legendre_2d_tri_points(n: int):
   """Gauss-Legendre quadrature
   args:
@@ -317,6 +343,14 @@ def gauss_legendre_3d_tetra_points(n: int):
       return np.array([[0.25, 0.25, 0.25], [0.5, 1 / 6, 1 / 6],
                        [1 / 6, 1 / 6, 1 / 6], [1 / 6, 1 / 6, 0.5],
                        [1 / 6, 0.5, 1 / 6]])
+    case 14:
+      # degree 5 (Walkington)
+      a, b = 0.0927352503108912, 0.7217942490673264
+      c, d = 0.3108859192633006, 0.0673422422100982
+      e, f = 0.4544962958743504, 0.0455037041256496
+      return np.array([[a, a, a], [b, a, a], [a, b, a], [a, a, b], [c, c, c],
+                       [d, c, c], [c, d, c], [c, c, d], [e, f, f], [f, e, f],
+                       [f, f, e], [e, e, f], [e, f, e], [f, e, e]])
     case _:
       raise NotImplementedError("Not implemented yet")
 
@@ -334,6 +368,9 @@ def gauss_legendre_3d_tetra_weights(n: int):
       return np.array([1 / 24, 1 / 24, 1 / 24, 1 / 24])
     case 5:
       return np.array([-0.8, 0.45, 0.45, 0.45, 0.45]) / 6
+    case 14:
+      return np.array([0.01224884051939366] * 4 + [0.01878132095300264] * 4 +
+                      [0.007091003462846911] * 6)
     case _:
       raise NotImplementedError("Not implemented yet")
 
@@ -16,11 +16,15 @@
 
 # solver is used solve and optimize the linear system
 
+import inspect
 import numpy as np
 from abc import ABCMeta, abstractmethod
-from scipy.sparse import csr_array
+from scipy.sparse import csr_array, csr_matrix, csc_matrix, diags
+from scipy.sparse import issparse, triu
 
-from scipy.sparse.linalg import spsolve, bicg, bicgstab, gmres, SuperLU
+from scipy.sparse.linalg import spsolve, bicg, bicgstab, gmres, SuperLU, splu
+from scipy.sparse.linalg import aslinearoperator, LinearOperator
+from scipy.linalg import lapack
 from scipy.sparse.csgraph import reverse_cuthill_mckee
 
 from .Polynomial import Lobatto, Larange
@@ -61,42 +65,329 @@ class BaseSolver(metaclass=ABCMeta):
     pass
 
 
+def is_complex_symmetric(left_hand_side, tol=1e-12):
+  """A = A^T (transpose without conjugation, Helmholtz and Biot u-p
+    operators with complex material coefficients) up to tol*max|A|"""
+  left_hand_side = csr_matrix(left_hand_side)
+  difference = left_hand_side - left_hand_side.T
+  if difference.nnz == 0:
+    return True
+  return abs(difference).max() <= tol * abs(left_hand_side).max()
+
+
+def symmetric_factorization(left_hand_side, diag_pivot_thresh=1e-3):
+  """sparse LU keeping the symmetric structure of a complex symmetric
+    matrix: minimum degree ordering of A^T + A and diagonal pivots while
+    they are larger than diag_pivot_thresh times the column maximum
+    (SuperLU symmetric mode), less fill than the column ordering of
+    spsolve; the LDL^T factorization is done by MUMPS with PETScSolver.
+    The full matrix is stored, SuperLU has no triangular storage
+    returns:
+    SuperLU object
+    """
+  return splu(csc_matrix(left_hand_side),
+              permc_spec='MMD_AT_PLUS_A',
+              diag_pivot_thresh=diag_pivot_thresh,
+              options=dict(SymmetricMode=True))
+
+
+def symmetric_solve(left_hand_side, right_hand_side, tol=None):
+  """solve with symmetric_factorization, the normwise backward error
+        ||b - A x|| / (||A|| ||x|| + ||b||) (infinity norms)
+    is checked and the system is solved again by spsolve (partial
+    pivoting) if it exceeds tol, 1e3*eps if None
+    returns:
+    x: ndarray
+    """
+  if issparse(right_hand_side):
+    right_hand_side = right_hand_side.toarray()
+  right_hand_side = np.asarray(right_hand_side)
+  dtype = np.result_type(left_hand_side.dtype, right_hand_side.dtype)
+  left_hand_side = csc_matrix(left_hand_side, dtype=dtype)
+  if tol is None:
+    tol = 1e3 * np.finfo(dtype).eps
+  x = symmetric_factorization(left_hand_side).solve(
+      right_hand_side.astype(dtype))
+  residual = right_hand_side - left_hand_side @ x
+  scale = (abs(left_hand_side).sum(axis=1).max() * np.abs(x).max() +
+           np.abs(right_hand_side).max())
+  if not np.abs(residual).max() <= tol * scale:
+    x = spsolve(left_hand_side, right_hand_side)
+  if x.ndim == 2 and x.shape[1] == 1:
+    x = x[:, 0]
+  return x
+
+
+def cocg(left_hand_side, right_hand_side, x0=None, tol=1e-8, maxiter=None,
+         M=None):
+  """conjugate orthogonal conjugate gradient for complex symmetric
+    systems, CG with the bilinear form r^T z instead of r^H z: short
+    recurrences, one product per iteration
+    parameters:
+    left_hand_side: sparse matrix or LinearOperator, complex symmetric
+    right_hand_side: ndarray
+    tol: float
+        relative residual tolerance
+    maxiter: int
+        10*n if None
+    M: sparse matrix or LinearOperator
+        complex symmetric preconditioner (approximation of A^-1)
+    returns:
+    x: ndarray
+    info: int
+        0 if converged, number of iterations otherwise
+    """
+  A = aslinearoperator(left_hand_side)
+  b = np.ravel(right_hand_side)
+  dtype = np.result_type(A.dtype, b.dtype, np.complex64)
+  n = b.shape[0]
+  maxiter = 10 * n if maxiter is None else maxiter
+  precondition = (lambda r: r) if M is None else aslinearoperator(M).matvec
+  x = np.zeros(n, dtype=dtype) if x0 is None else np.array(x0, dtype=dtype)
+  r = b - A.matvec(x)
+  norm_b = np.linalg.norm(b)
+  if norm_b == 0.:
+    return x, 0
+  z = precondition(r)
+  p = z.copy()
+  rho = r @ z
+  for iteration in range(1, maxiter + 1):
+    q = A.matvec(p)
+    alpha = rho / (p @ q)
+    x += alpha * p
+    r -= alpha * q
+    if np.linalg.norm(r) <= tol * norm_b:
+      return x, 0
+    z = precondition(r)
+    rho_new = r @ z
+    p = z + rho_new / rho * p
+    rho = rho_new
+  return x, maxiter
+
+
+LOW_PRECISION = {
+    np.dtype(np.float64): np.float32,
+    np.dtype(np.complex128): np.complex64
+}
+
+# the relative tolerance of gmres is 'tol' before scipy 1.12, 'rtol' after
+GMRES_TOLERANCE = 'rtol' if 'rtol' in inspect.signature(
+    gmres).parameters else 'tol'
+
+
+def mixed_precision_solve(left_hand_side,
+                          right_hand_side,
+                          tol=1e-10,
+                          maxiter=10,
+                          symmetric=False):
+  """direct solve with a single precision factorization (half the memory of
+    the factors), the double precision accuracy is recovered by iterative
+    refinement; if the refinement stagnates the low precision factor
+    preconditions GMRES, and if GMRES fails too the system is factorized
+    in double precision
+    parameters:
+    tol: float
+        relative residual tolerance
+    maxiter: int
+        maximum number of refinement steps
+    symmetric: bool
+        complex symmetric system, see symmetric_factorization
+    returns:
+    x: ndarray
+    method: str
+        'refinement', 'gmres' or 'full'
+    """
+  if issparse(right_hand_side):
+    right_hand_side = right_hand_side.toarray()
+  b = np.ravel(right_hand_side)
+  dtype = np.result_type(left_hand_side.dtype, b.dtype, np.float64)
+  left_hand_side = csc_matrix(left_hand_side, dtype=dtype)
+  b = b.astype(dtype)
+  factorization = symmetric_factorization if symmetric else splu
+  try:
+    lu = factorization(left_hand_side.astype(LOW_PRECISION[np.dtype(dtype)]))
+  except RuntimeError:
+    # singular in single precision
+    return factorization(left_hand_side).solve(b), 'full'
+
+  def low_precision_solve(r):
+    # scaled: the residuals underflow in single precision
+    scale = np.abs(r).max()
+    if scale == 0.:
+      return np.zeros_like(r)
+    return scale * lu.solve((r / scale).astype(lu.U.dtype)).astype(dtype)
+
+  norm_b = np.linalg.norm(b)
+  x = low_precision_solve(b)
+  previous = np.inf
+  for _ in range(maxiter):
+    r = b - left_hand_side @ x
+    residual = np.linalg.norm(r) / norm_b
+    if residual <= tol:
+      return x, 'refinement'
+    if residual > 0.5 * previous or not np.isfinite(residual):
+      break
+    previous = residual
+    x += low_precision_solve(r)
+
+  if np.all(np.isfinite(x)):
+    preconditioner = LinearOperator(left_hand_side.shape,
+                                    matvec=low_precision_solve,
+                                    dtype=dtype)
+    x, info = gmres(left_hand_side,
+                    b,
+                    x0=x,
+                    atol=0.,
+                    restart=20,
+                    maxiter=5,
+                    M=preconditioner,
+                    **{GMRES_TOLERANCE: tol})
+    if info == 0:
+      return x, 'gmres'
+  return factorization(left_hand_side).solve(b), 'full'
+
+
+class PETScSolver:
+  """persistent PETSc solver for frequency sweeps: the Mat, the KSP/PC and
+    the work vectors are created once, the matrix values are updated in
+    place when the nonzero pattern does not change, so that the symbolic
+    analysis of the factorization (MUMPS) is reused and only the numeric
+    factorization is redone
+    parameters:
+    options: dict
+        PETSc options without the leading '-', e.g. {'ksp_type': 'gmres',
+        'pc_type': 'ilu'}, default: direct MUMPS LU
+    prefix: str
+        options prefix of the KSP
+    symmetric: bool
+        complex symmetric operator: only the upper triangle is stored
+        (SBAIJ) and factorized with the MUMPS LDL^T (Cholesky PC, sym=2)
+    """
+  default_options = {
+      'ksp_type': 'preonly',
+      'pc_type': 'lu',
+      'pc_factor_mat_solver_type': 'mumps'
+  }
+  events = ['update', 'factorization', 'solve']
+
+  def __init__(self, options=None, prefix='sacous_', symmetric=False):
+    if not PETSC_on:
+      raise ImportError("petsc4py is required for the PETSc solver")
+    self.symmetric = symmetric
+    self.options = dict(self.default_options)
+    if symmetric:
+      self.options['pc_type'] = 'cholesky'
+
+    if options is not None:
+      self.options.update(options)
+    self.prefix = prefix
+    petsc_options = PETSc.Options(prefix)
+    for key, value in self.options.items():
+      petsc_options[key] = value
+    self.ksp = PETSc.KSP().create()
+    self.ksp.setOptionsPrefix(prefix)
+    self.ksp.setFromOptions()
+    self.A = None
+    self.pattern = None
+    self.x = None
+    self.b = None
+    PETSc.Log.begin()
+    self.log_events = {
+        name: PETSc.Log.Event(f'SAcouS {name}') for name in self.events
+    }
+
+  def set_operator(self, left_hand_side):
+    """new left hand side, CSR matrix or PETSc.Mat"""
+    event = self.log_events['update']
+    event.begin()
+    if isinstance(left_hand_side, PETSc.Mat):
+      new_pattern = left_hand_side is not self.A
+      self.A = left_hand_side
+      self.pattern = None
+    else:
+      left_hand_side = csr_matrix(left_hand_side)
+      if self.symmetric:
+        left_hand_side = triu(left_hand_side, format='csr')
+      left_hand_side.sort_indices()
+      indptr = left_hand_side.indptr.astype(PETSc.IntType)
+      indices = left_hand_side.indices.astype(PETSc.IntType)
+      data = left_hand_side.data.astype(PETSc.ScalarType)
+      new_pattern = self.pattern is None or not (
+          np.array_equal(self.pattern[0], indptr) and
+          np.array_equal(self.pattern[1], indices))
+      if new_pattern:
+        if self.symmetric:
+          self.A = PETSc.Mat().createSBAIJ(size=left_hand_side.shape,
+                                           bsize=1,
+                                           csr=(indptr, indices))
+          self.A.setOption(PETSc.Mat.Option.SYMMETRIC, True)
+          self.A.setOption(PETSc.Mat.Option.HERMITIAN, False)
+        else:
+          self.A = PETSc.Mat().createAIJ(size=left_hand_side.shape,
+                                         csr=(indptr, indices))
+        self.pattern = (indptr, indices)
+      # same pattern: the values are overwritten in place
+      self.A.setValuesCSR(indptr, indices, data)
+      self.A.assemble()
+    if new_pattern:
+      self.x, self.b = self.A.createVecs()
+    self.ksp.setOperators(self.A)
+    event.end()
+
+  def solve(self, right_hand_side, left_hand_side=None):
+    """solve with the current operator (or set it first)
+        returns:
+        u: ndarray
+        """
+    if left_hand_side is not None:
+      self.set_operator(left_hand_side)
+    self.b.setArray(np.ravel(right_hand_side))
+    event = self.log_events['factorization']
+    event.begin()
+    self.ksp.setUp()
+    event.end()
+    event = self.log_events['solve']
+    event.begin()
+    self.ksp.solve(self.b, self.x)
+    event.end()
+    return self.x.getArray().copy()
+
+  def timings(self):
+    """cumulated time (s) and count of each stage from the PETSc log"""
+    timings = {}
+    for name, event in self.log_events.items():
+      info = event.getPerfInfo()
+      timings[name] = (info['time'], info['count'])
+    return timings
+
+  def destroy(self):
+    self.ksp.destroy()
+    for item in (self.A, self.x, self.b):
+      if item is not None:
+        item.destroy()
+    self.A = self.x = self.b = None
+    self.pattern = None
+
+
 def petsc_solver(left_hand_side, right_hand_side):
-  """petsc solver
+  """petsc solver (one shot), use PETScSolver in frequency loops
     parameters:
     left_hand_side: CSR matrix
         left hand side matrix
     right_hand_side: ndarray
         right hand side vector
     """
-  if not isinstance(left_hand_side, PETSc.Mat):
-    left_hand_side = PETSc.Mat().createAIJ(size=left_hand_side.shape,
-                                           csr=(left_hand_side.indptr,
-                                                left_hand_side.indices,
-                                                left_hand_side.data))
-    left_hand_side.assemblyBegin()
-    left_hand_side.assemblyEnd()
-  else:
-    assert (isinstance(left_hand_side, PETSc.Mat))
-  b = PETSc.Vec().createWithArray(right_hand_side)
-  x = PETSc.Vec().createSeq(right_hand_side.shape[0])
-  ksp = PETSc.KSP().create()
-  ksp.setOperators(left_hand_side)
-  ksp.setType(
-      PETSc.KSP.Type.PREONLY)    # Use preconditioner only (direct solve)
-
-  pc = ksp.getPC()
-  pc.setType(PETSc.PC.Type.LU)    # Set the preconditioner to LU
-  pc.setFactorSolverType(PETSc.Mat.SolverType.MUMPS)
-
-  ksp.setFromOptions()
-  ksp.solve(b, x)
-  print('PETSc dirct solver used')
-  return x.getArray()
+  solver = PETScSolver()
+  u = solver.solve(right_hand_side, left_hand_side)
+  solver.destroy()
+  return u
 
 
 class LinearSolver(BaseSolver):
-  """linear solver class
+  """linear solver class, with the sym flag the complex symmetric systems
+    are factorized symmetrically (LDL^T with PETSc, symmetric SuperLU
+    otherwise) or solved with COCG (solver='cocg'), solver='mixed' factorizes
+    in single precision, see mixed_precision_solve
     parameters:
     left_hand_side: ndarray
         left hand side matrix
@@ -107,8 +398,32 @@ class LinearSolver(BaseSolver):
   def solve(self, left_hand_side, right_hand_side, solver='spsolve'):
     import time
     start = time.time()
+    if isinstance(left_hand_side, LinearOperator):
+      # matrix-free operator (MatrixFreeHelmholtz): Krylov solvers only
+      symmetric = self.sym
+    else:
+      symmetric = self.sym and is_complex_symmetric(left_hand_side)
     if solver == 'petsc' and PETSC_on:
-      u = petsc_solver(left_hand_side, right_hand_side)
+      # the PETSc objects are kept for the next solve (frequency loop)
+      petsc = getattr(self, 'petsc', None)
+      if petsc is None or petsc.symmetric != symmetric:
+        self.petsc = PETScSolver(symmetric=symmetric)
+      u = self.petsc.solve(right_hand_side, left_hand_side)
+    elif solver == 'cocg':
+      if not symmetric:
+        raise ValueError("COCG requires a complex symmetric system")
+      jacobi = diags(1 / left_hand_side.diagonal())
+      u, info = cocg(left_hand_side, right_hand_side, M=jacobi)
+      if info > 0:
+        print("COCG did not converge in ", info, " iterations")
+    elif solver == 'mixed':
+      u, method = mixed_precision_solve(left_hand_side,
+                                        right_hand_side,
+                                        symmetric=symmetric)
+      if method == 'full':
+        print("mixed precision solve fell back to double precision")
+    elif symmetric:
+      u = symmetric_solve(left_hand_side, right_hand_side)
     else:
       u = spsolve(left_hand_side, right_hand_side)
     # u = np.linalg.solve(left_hand_side.toarray(), right_hand_side)
@@ -137,21 +452,28 @@ class LinearSolver(BaseSolver):
         row[0]], right_hand_side[I_rcm[0]]
     return left_hand_side, right_hand_side
 
-  def static_condensation(self):
-    """condensation of linear system
+  def static_condensation(self, left_hand_side, right_hand_side):
+    """condensation of the internal dofs of the assembled linear system
         parameters:
-        internal_dofs: ndarray
-            internal dofs
+        left_hand_side: sparse matrix
+            left hand side matrix
+        right_hand_side: ndarray
+            right hand side vector
+        returns:
+        schur_complement: sparse matrix on the external dofs
+        right_hand_side: condensed right hand side vector
         """
+    left_hand_side = csr_matrix(left_hand_side)
+    K_ee = left_hand_side[:self.external_dofs, :self.external_dofs]
+    K_ei = left_hand_side[:self.external_dofs, self.external_dofs:]
+    K_ie = left_hand_side[self.external_dofs:, :self.external_dofs]
+    K_ii = left_hand_side[self.external_dofs:, self.external_dofs:].tocsc()
 
-    K_ee = self.lhs[:self.external_dofs, :self.external_dofs]
-    K_ei = self.lhs[:self.external_dofs, self.external_dofs:]
-    K_ie = self.lhs[self.external_dofs:, :self.external_dofs]
-    K_ii = self.lhs[self.external_dofs:, self.external_dofs:]
-
-    schur_complement = K_ee - K_ei.dot(np.linalg.inv(K_ii)).dot(K_ei.T)
-    self.rhs = K_ei.dot(np.linalg.inv(K_ii)).dot(self.rhs[self.external_dofs:])
-    return schur_complement, self.rhs
+    # K_ii^-1 K_ie stays sparse, no dense inverse is formed
+    schur_complement = K_ee - K_ei @ spsolve(K_ii, K_ie.tocsc())
+    condensed_rhs = right_hand_side[:self.external_dofs] - K_ei @ spsolve(
+        K_ii, right_hand_side[self.external_dofs:])
+    return csr_matrix(schur_complement), condensed_rhs
 
 
 class AdmittanceSolver:
@@ -171,3 +493,124 @@ class AdmittanceSolver:
   def solve(self):
     u = spsolve(self.admittance, self.right_hand_side)
     self.sol = u
+
+
+def tridiagonal_solve(lower, diag, upper, right_hand_side):
+  """Thomas algorithm for (batched) tridiagonal systems
+    parameters:
+    lower: ndarray (..., n-1)
+        sub-diagonal
+    diag: ndarray (..., n)
+        diagonal
+    upper: ndarray (..., n-1)
+        super-diagonal
+    right_hand_side: ndarray (..., n)
+        the leading dimensions (e.g. frequencies) are solved together
+    returns:
+    u: ndarray (..., n)
+    """
+  lower, diag, upper, right_hand_side = (np.asarray(band) for band in (
+      lower, diag, upper, right_hand_side))
+  shape = np.broadcast_shapes(diag.shape, right_hand_side.shape)
+  dtype = np.result_type(lower, diag, upper, right_hand_side)
+  n = shape[-1]
+  # one leading (batch) dimension for the sweep and the fallback
+  batch = int(np.prod(shape[:-1]))
+  lower = np.broadcast_to(lower, shape[:-1] + (n - 1,)).reshape(batch, n - 1)
+  upper = np.broadcast_to(upper, shape[:-1] + (n - 1,)).reshape(batch, n - 1)
+  diag = np.broadcast_to(diag, shape).reshape(batch, n)
+  right_hand_side = np.broadcast_to(right_hand_side, shape).reshape(batch, n)
+  c = np.empty(lower.shape, dtype=dtype)
+  u = np.empty(diag.shape, dtype=dtype)
+  # pivots this small against the entries lose the accuracy of the sweep
+  tolerance = np.sqrt(np.finfo(dtype).eps) * np.maximum(
+      np.abs(diag).max(axis=-1),
+      np.maximum(np.abs(lower).max(axis=-1, initial=0.),
+                 np.abs(upper).max(axis=-1, initial=0.)))
+  with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+    pivot = diag[:, 0]
+    small = np.abs(pivot) <= tolerance
+    u[:, 0] = right_hand_side[:, 0] / pivot
+    for i in range(1, n):
+      c[:, i - 1] = upper[:, i - 1] / pivot
+      pivot = diag[:, i] - lower[:, i - 1] * c[:, i - 1]
+      small |= np.abs(pivot) <= tolerance
+      u[:, i] = (right_hand_side[:, i] - lower[:, i - 1] * u[:, i - 1]) / pivot
+    for i in range(n - 2, -1, -1):
+      u[:, i] -= c[:, i] * u[:, i + 1]
+
+  # no pivoting in the Thomas sweep, the (rare) broken down systems are
+  # solved again with the partial pivoting LAPACK solver
+  failed = small | ~np.all(np.isfinite(u), axis=-1)
+  if np.any(failed):
+    gtsv = lapack.get_lapack_funcs('gtsv', dtype=dtype)
+    for index in np.nonzero(failed)[0]:
+      u[index] = gtsv(lower[index].astype(dtype), diag[index].astype(dtype),
+                      upper[index].astype(dtype),
+                      right_hand_side[index].astype(dtype))[3]
+  return u.reshape(shape)
+
+
+def block_tridiagonal_solve(lower, diag, upper, right_hand_side):
+  """block Thomas algorithm for (batched) block tridiagonal systems, the
+    blocks are broadcast against the right hand sides (e.g. one matrix for
+    several loads)
+    parameters:
+    lower: ndarray (..., n-1, b, b)
+        sub-diagonal blocks
+    diag: ndarray (..., n, b, b)
+        diagonal blocks
+    upper: ndarray (..., n-1, b, b)
+        super-diagonal blocks
+    right_hand_side: ndarray (..., n, b)
+    returns:
+    u: ndarray (..., n, b)
+    """
+  lower, diag, upper, right_hand_side = (np.asarray(band) for band in (
+      lower, diag, upper, right_hand_side))
+  n, b = diag.shape[-3:-1]
+  batch = np.broadcast_shapes(lower.shape[:-3], diag.shape[:-3],
+                              upper.shape[:-3], right_hand_side.shape[:-2])
+  lower = np.broadcast_to(lower, batch + (n - 1, b, b))
+  diag = np.broadcast_to(diag, batch + (n, b, b))
+  upper = np.broadcast_to(upper, batch + (n - 1, b, b))
+  right_hand_side = np.broadcast_to(right_hand_side, batch + (n, b))
+  dtype = np.result_type(lower, diag, upper, right_hand_side)
+  C = np.empty(upper.shape, dtype=dtype)
+  u = np.empty(right_hand_side.shape, dtype=dtype)
+  for i in range(n):
+    pivot = diag[..., i, :, :]
+    rhs = right_hand_side[..., i, :]
+    if i > 0:
+      pivot = pivot - lower[..., i - 1, :, :] @ C[..., i - 1, :, :]
+      rhs = rhs - (lower[..., i - 1, :, :] @ u[..., i - 1, :, None])[..., 0]
+    if i < n - 1:
+      # the coupling block and the rhs share the same factorization
+      X = np.linalg.solve(
+          pivot, np.concatenate((upper[..., i, :, :], rhs[..., None]),
+                                axis=-1))
+      C[..., i, :, :] = X[..., :-1]
+      u[..., i, :] = X[..., -1]
+    else:
+      u[..., i, :] = np.linalg.solve(pivot, rhs[..., None])[..., 0]
+  for i in range(n - 2, -1, -1):
+    u[..., i, :] -= (C[..., i, :, :] @ u[..., i + 1, :, None])[..., 0]
+  return u
+
+
+class TridiagonalSolver:
+  """tridiagonal (banded) solver class, same usage as AdmittanceSolver
+    parameters:
+    bands: tuple of ndarray
+        (lower, diag, upper) of shape (..., n-1), (..., n), (..., n-1)
+    right_hand_side: ndarray
+        right hand side vector(s) (..., n)
+    """
+
+  def __init__(self, bands, right_hand_side):
+    self.bands = bands
+    self.right_hand_side = right_hand_side
+    self.sol = None
+
+  def solve(self):
+    self.sol = tridiagonal_solve(*self.bands, self.right_hand_side)
@@ -0,0 +1,192 @@
+# This file is part of PyXfem, a software distributed under the MIT license.
+# For any question, please contact the authors cited below.
+#
+# Copyright (c) 2023
+# 	Shaoqi WU <shaoqiwu@outlook.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+
+
+# tensor-product Lagrange elements (quadrangles, hexahedra): the shape
+# functions are products of 1D Lagrange polynomials on the Gauss-Lobatto
+# points, the operators are applied one direction at a time (sum
+# factorization), O(p^(dim+1)) per element instead of O(p^(2 dim))
+
+from functools import lru_cache
+
+import numpy as np
+from numpy.polynomial import legendre
+
+
+def gauss_lobatto_points_weights(n):
+  """Gauss-Lobatto-Legendre points and weights on [-1, 1]
+    parameters:
+    n: int
+        number of points, n >= 2
+    """
+  P = legendre.Legendre.basis(n - 1)
+  points = np.concatenate(([-1.], np.sort(P.deriv().roots().real), [1.]))
+  weights = 2 / (n * (n - 1) * P(points)**2)
+  return points, weights
+
+
+def lagrange_basis_1d(nodes, points):
+  """values and derivatives of the 1D Lagrange polynomials of the nodes on
+    the points
+    returns:
+    N, D: ndarray (n_points, n_nodes)
+    """
+  degree = len(nodes) - 1
+  coefficients = np.linalg.inv(legendre.legvander(nodes, degree))
+  N = legendre.legvander(points, degree) @ coefficients
+  D = legendre.legvander(points, degree - 1) @ legendre.legder(coefficients)
+  return N, D
+
+
+def apply_1d(u, matrices):
+  """apply matrices[d] (m, n) along the direction d of u (..., n_z, n_y, n_x),
+    the direction 0 (x) is the last axis (lexicographic order)"""
+  for d, matrix in enumerate(matrices):
+    axis = u.ndim - 1 - d
+    u = np.moveaxis(np.tensordot(u, matrix, axes=([axis], [1])), -1, axis)
+  return u
+
+
+class TensorProductElement:
+  """Lagrange element of order p on [-1, 1]^dim, the (p+1)^dim nodes are the
+    tensor grid of the Gauss-Lobatto points in lexicographic order (x
+    fastest) and the quadrature is the tensor Gauss-Legendre rule
+    2D, order 1:  2----3    order 2:  6--7--8
+                  |    |              3  4  5
+                  0----1              0--1--2
+    parameters:
+    dim: int
+        2 (quadrangle) or 3 (hexahedron)
+    order: int
+    nb_points: int
+        Gauss points per direction, order + 1 if None
+    """
+
+  def __init__(self, dim, order, nb_points=None):
+    self.dim = dim
+    self.order = order
+    self.nodes_1d, _ = gauss_lobatto_points_weights(order + 1)
+    points, weights = legendre.leggauss(order +
+                                        1 if nb_points is None else nb_points)
+    self.N_1d, self.D_1d = lagrange_basis_1d(self.nodes_1d, points)
+    self.weights = weights
+    for _ in range(dim - 1):
+      self.weights = np.multiply.outer(weights, self.weights)
+    self.weights = self.weights.ravel()
+
+  @property
+  def nb_nodes(self):
+    return (self.order + 1)**self.dim
+
+  def tensor(self, u, n):
+    return u.reshape(u.shape[:-1] + (n,) * self.dim)
+
+  def values(self, u):
+    """values on the quadrature points of the nodal values u (..., n_loc)
+        returns:
+        ndarray (..., n_q)
+        """
+    u = apply_1d(self.tensor(u, self.order + 1), [self.N_1d] * self.dim)
+    return u.reshape(u.shape[:-self.dim] + (-1,))
+
+  def gradients(self, u):
+    """reference gradients on the quadrature points of the nodal values u
+        returns:
+        ndarray (..., dim, n_q)
+        """
+    u = self.tensor(u, self.order + 1)
+    gradients = []
+    for d in range(self.dim):
+      matrices = [self.N_1d] * self.dim
+      matrices[d] = self.D_1d
+      g = apply_1d(u, matrices)
+      gradients.append(g.reshape(g.shape[:-self.dim] + (-1,)))
+    return np.stack(gradients, axis=-2)
+
+  def values_transpose(self, v):
+    """sum_q N_i(x_q) v_q: (..., n_q) -> (..., n_loc)"""
+    v = apply_1d(self.tensor(v, len(self.N_1d)), [self.N_1d.T] * self.dim)
+    return v.reshape(v.shape[:-self.dim] + (-1,))
+
+  def gradients_transpose(self, g):
+    """sum_q grad N_i(x_q) . g_q: (..., dim, n_q) -> (..., n_loc)"""
+    result = 0.
+    for d in range(self.dim):
+      matrices = [self.N_1d.T] * self.dim
+      matrices[d] = self.D_1d.T
+      result = result + apply_1d(self.tensor(g[..., d, :], len(self.N_1d)),
+                                 matrices)
+    return result.reshape(result.shape[:-self.dim] + (-1,))
+
+  def geometric_factors(self, vertices):
+    """isoparametric geometry of a batch of elements
+        parameters:
+        vertices: ndarray (n_e, n_loc, dim) element nodes, lexicographic
+        returns:
+        G: ndarray (n_e, n_q, dim, dim) w_q |det J| J^-1 J^-T
+        mass: ndarray (n_e, n_q) w_q |det J|
+        """
+    # J[e, q, i, j] = dx_j/dxi_i
+    J = np.transpose(self.gradients(np.swapaxes(vertices, 1, 2)), (0, 3, 2, 1))
+    inv_J = np.linalg.inv(J)
+    mass = np.abs(np.linalg.det(J)) * self.weights
+    G = (np.swapaxes(inv_J, -1, -2) @ inv_J) * mass[..., np.newaxis,
+                                                    np.newaxis]
+    return G, mass
+
+  def apply_stiffness(self, u, G):
+    """sum_q grad N_i . G_q grad u(x_q) of a batch (n_e, n_loc)"""
+    fluxes = np.einsum('eqab,ebq->eaq', G, self.gradients(u))
+    return self.gradients_transpose(fluxes)
+
+  def apply_mass(self, u, mass):
+    """sum_q N_i m_q u(x_q) of a batch (n_e, n_loc)"""
+    return self.values_transpose(self.values(u) * mass)
+
+
+@lru_cache
+def tensor_product_element(dim, order, nb_points=None):
+  return TensorProductElement(dim, order, nb_points)
+
+
+def tensor_element_matrices(vertices, order=1, coeffs=None, nb_points=None):
+  """stiffness and mass matrices of a batch of quadrangles/hexahedra, the
+    shape functions of the reference element are tabulated once and the
+    quadrature sums are factorized direction by direction
+    parameters:
+    vertices: ndarray (n_e, (order+1)**dim, dim) element nodes, lexicographic
+    order: int
+    coeffs: ndarray (n_e, 2) coefficients of ke and me, geometric matrices
+        if None
+    nb_points: int
+        Gauss points per direction, order + 1 if None
+    returns:
+    ke, me: ndarray (n_e, n_loc, n_loc)
+    """
+  vertices = np.asarray(vertices)
+  element = tensor_product_element(vertices.shape[2], order, nb_points)
+  G, mass = element.geometric_factors(vertices)
+  identity = np.identity(element.nb_nodes)
+  B = element.gradients(identity)
+  N = element.values(identity)
+  ke = element.gradients_transpose(np.einsum('eqab,jbq->ejaq', G, B))
+  me = element.values_transpose(N[np.newaxis] * mass[:, np.newaxis])
+  if coeffs is not None:
+    coeffs = np.asarray(coeffs)
+    ke = ke * coeffs[:, 0, np.newaxis, np.newaxis]
+    me = me * coeffs[:, 1, np.newaxis, np.newaxis]
+  return ke, me
@@ -1,4 +1,5 @@
 from .Basis import Helmholtz2DElement, Helmholtz1DElement, Lobbato1DElement, Lagrange2DTriElement, Lagrange3DTetraElement, Helmholtz3DElement
+from .Basis import Lagrange2DQuadElement, Helmholtz2DQuadElement, Lagrange3DHexElement, Helmholtz3DHexElement
 
 from .Polynomial import Lobatto, Lagrange2DTri
 
@@ -9,6 +10,9 @@ from .Utilities import check_material_compability, display_matrix_in_array, plot
 from .Assembly import Assembler, Assembler4Biot
 from .PhysicAssembler import HelmholtzAssembler, BiotAssembler, CouplingAssember
 
-from .Solver import BaseSolver, LinearSolver, AdmittanceSolver
+from .Solver import BaseSolver, LinearSolver, AdmittanceSolver, TridiagonalSolver, PETScSolver
+from .Solver import tridiagonal_solve, block_tridiagonal_solve
 
 from .BCsImpose import ApplyBoundaryConditions
+
+from .Condensation import StaticCondensation
@@ -0,0 +1,240 @@
+import numpy as np
+from functools import partial
+
+from SAcouS.Mesh import Mesh1D
+from SAcouS.acxfem import Helmholtz1DElement, FESpace, HelmholtzAssembler
+from SAcouS.acxfem.PhysicAssembler import stiffness_coefficient, mass_coefficient
+from .myEIM import nonIntrusiveEIMV2
+from .myRBSolver import RBSolver_fromResidual
+from .ParallelSnapshots import ParallelSnapshots
+
+
+def velocity_coefficient(omega):
+  """coefficient of a normal fluid velocity load: 1/(j*omega)"""
+  return 1 / (1j * omega)
+
+
+def unit_coefficient(omega):
+  return np.ones_like(omega)
+
+
+class AffineDecomposition:
+  """affine decomposition of a parametric linear system
+        A(mu) = sum_k theta_k(mu) A_k,    f(mu) = sum_k gamma_k(mu) f_k
+    the spatial terms A_k, f_k are assembled once, the coefficients are
+    callables of the parameter (scalar or ndarray)
+    parameters:
+    dtype: data type of linear system
+    """
+
+  def __init__(self, dtype=np.complex128):
+    self.operator_modes = []
+    self.operator_params = []
+    self.rhs_modes = []
+    self.rhs_params = []
+    self.dtype = dtype
+    self.eim = None
+
+  @property
+  def nb_operator_terms(self):
+    return len(self.operator_modes)
+
+  @property
+  def nb_rhs_terms(self):
+    return len(self.rhs_modes)
+
+  def add_operator_term(self, matrix, coefficient):
+    self.operator_modes.append(matrix)
+    self.operator_params.append(coefficient)
+
+  def add_rhs_term(self, vector, coefficient):
+    self.rhs_modes.append(vector)
+    self.rhs_params.append(coefficient)
+
+  def coefficients(self, params, mus):
+    """evaluate coefficient functions on a set of parameters
+        returns:
+        ndarray (nb_terms, nb_mus)
+        """
+    mus = np.atleast_1d(mus)
+    return np.array(
+        [np.broadcast_to(theta(mus), mus.shape) for theta in params],
+        dtype=self.dtype)
+
+  def assemble_operator(self, mu):
+    operator = 0.
+    for A_k, theta in zip(self.operator_modes, self.operator_params):
+      operator = operator + theta(mu) * A_k
+    return operator
+
+  def assemble_rhs(self, mu):
+    rhs = np.zeros(self.rhs_modes[0].shape, dtype=self.dtype)
+    for f_k, gamma in zip(self.rhs_modes, self.rhs_params):
+      rhs += gamma(mu) * f_k
+    return rhs
+
+  def compress_operator(self, training_parameters, tolerance=1e-10,
+                        max_rank=None):
+    """approximate the operator coefficients with the empirical
+        interpolation method (nonIntrusiveEIMV2) on the training parameters
+        theta(mu) ~ V lambda(mu), lambda(mu) is interpolated from the
+        coefficients of the magic terms only, the operator is rewritten with
+        rank(V) terms sum_j lambda_j(mu) (sum_k V_kj A_k)
+        parameters:
+        training_parameters: ndarray
+        tolerance: float
+            relative tolerance of the interpolation
+        max_rank: int
+            maximum number of terms, nb_operator_terms if None
+        returns:
+        AffineDecomposition with the same rhs terms
+        """
+    if max_rank is None:
+      max_rank = self.nb_operator_terms
+    theta = self.coefficients(self.operator_params, training_parameters)
+    # scale every term so that the tolerance is relative
+    scaling = np.abs(theta).max(axis=1)
+    scaling[scaling == 0.] = 1.
+    eim = nonIntrusiveEIMV2(theta / scaling[:, np.newaxis],
+                            max_rank,
+                            tolerance,
+                            dtype_=self.dtype)
+    eim.display = False
+    V, _ = eim.interpolate(intrusive=True)
+    magic_terms = eim.indX[:eim.rank]
+    interpolation = np.linalg.inv(V[magic_terms])
+
+    compressed = AffineDecomposition(self.dtype)
+    compressed.eim = eim
+    compressed.magic_terms = magic_terms
+    magic_params = [self.operator_params[k] for k in magic_terms]
+
+    def eim_coefficient(j, mu):
+      theta_magic = np.array([theta_k(mu) for theta_k in magic_params])
+      return np.tensordot(interpolation[j],
+                          theta_magic / scaling[magic_terms].reshape(
+                              (-1,) + (1,) * np.ndim(mu)),
+                          axes=1)
+
+    for j in range(eim.rank):
+      mode = 0.
+      for k in range(self.nb_operator_terms):
+        if V[k, j] != 0.:
+          mode = mode + V[k, j] * scaling[k] * self.operator_modes[k]
+      compressed.add_operator_term(mode, partial(eim_coefficient, j))
+    for f_k, gamma in zip(self.rhs_modes, self.rhs_params):
+      compressed.add_rhs_term(f_k, gamma)
+    return compressed
+
+  def rb_solver(self, maxmodes, training_parameters, nb_workers=None):
+    """reduced basis solver built on the affine decomposition, the greedy
+        residuals are evaluated by nb_workers processes if given (close
+        solver.snapshotPool when done)"""
+    operator_modes = [
+        A_k.toarray() if hasattr(A_k, 'toarray') else A_k
+        for A_k in self.operator_modes
+    ]
+    solver = RBSolver_fromResidual(maxmodes,
+                                   operator_modes,
+                                   self.operator_params,
+                                   self.rhs_modes,
+                                   self.rhs_params,
+                                   np.asarray(training_parameters),
+                                   dtype_=self.dtype)
+    if nb_workers is not None:
+      solver.snapshotPool = ParallelSnapshots(self,
+                                              nb_workers,
+                                              max_modes=maxmodes)
+    return solver
+
+
+class HelmholtzAffineDecomposition(AffineDecomposition):
+  """affine decomposition in frequency of the 1D Helmholtz problem
+        A(omega) = sum_s 1/(omega**2*rho_s(omega)) K_s - 1/K_s(omega) M_s
+    K_s and M_s are the geometric matrices of the subdomain s, the JCAL
+    parameters of the equivalent fluids only enter the coefficients
+    parameters:
+    mesh: Mesh1D
+    subdomains: dict
+        {material: element indices}
+    orders: int or ndarray
+        interpolation order of each element
+    var: str
+        variable label
+    dtype: data type of linear system
+    """
+
+  def __init__(self, mesh, subdomains, orders, var='Pf', dtype=np.complex128):
+    super().__init__(dtype)
+    self.mesh = mesh
+    self.subdomains = subdomains
+    self.var = var
+    for mat in subdomains.keys():
+      if mat.TYPE != 'Fluid':
+        raise NotImplementedError(
+            f"affine decomposition of {mat.TYPE} material is not supported")
+    mesh.set_subdomains(subdomains)
+    elements2node = mesh.get_mesh_coordinates()
+    orders = np.broadcast_to(orders, (len(elements2node),))
+    # geometric bases: the material coefficients go to the parameter part
+    self.bases = [
+        Helmholtz1DElement(var, orders[i], elements2node[i], (1., 1.))
+        for i in range(len(elements2node))
+    ]
+    self.fe_space = FESpace(mesh, self.bases)
+    assembler = HelmholtzAssembler(self.fe_space, dtype)
+    self.subdomain_matrices = assembler.assemble_subdomain_matrices(
+        self.bases, subdomains, var)
+    for mat, (K_s, M_s) in self.subdomain_matrices.items():
+      self.add_operator_term(K_s, partial(stiffness_coefficient, mat))
+      self.add_operator_term(M_s, partial(mass_coefficient, mat))
+
+  def add_nature_bc(self, nature_bc):
+    """add a point natural boundary condition to the rhs terms"""
+    dof_index = self.fe_space.get_dofs_from_var_coord(nature_bc['position'],
+                                                      self.var)
+    vector = np.zeros(self.fe_space.nb_dofs, dtype=self.dtype)
+    match nature_bc['type']:
+      case 'fluid_velocity':
+        vector[dof_index] = -nature_bc['value']
+        self.add_rhs_term(vector, velocity_coefficient)
+      case 'total_displacement' | 'solid_stress':
+        vector[dof_index] = nature_bc['value']
+        self.add_rhs_term(vector, unit_coefficient)
+      case _:
+        raise ValueError(f"Nature BC type {nature_bc['type']} not supported")
+
+  @classmethod
+  def from_sol_info(cls, sol_info, var='Pf', dtype=np.complex128):
+    """build the decomposition from a parsed .axi input file
+        (AcoustiXPaser.parse), the analysis frequencies are kept as
+        training parameters (angular frequencies)"""
+    topology = sol_info['topology']
+    if topology['dim'] != 1:
+      raise ValueError('The dimension is not supported')
+    mesh = Mesh1D(topology['mesh_nodes'], topology['mesh_elements'])
+    mesh_domains = topology['mesh_domain']
+    materials = sol_info['materials']
+
+    # the last physic domain wins on shared elements
+    elem_material = -np.ones(len(topology['mesh_elements']), dtype=int)
+    for _, material_id, domain_id in sol_info['physic_domain'].values():
+      elem_material[mesh_domains[domain_id]['domain_elements']] = material_id
+    if np.any(elem_material < 0):
+      raise ValueError('Every element has to belong to a physic domain')
+    subdomains = {
+        materials[i]: np.where(elem_material == i)[0]
+        for i in np.unique(elem_material)
+    }
+
+    decomposition = cls(mesh, subdomains, topology['mesh_order'], var, dtype)
+    for bc in sol_info['BCs'].values():
+      # point boundary conditions are defined on 0D node domains
+      node = mesh_domains[bc['position']]['domain_elements'][0]
+      decomposition.add_nature_bc({
+          'type': bc['type'],
+          'value': bc['value'],
+          'position': mesh.nodes[node]
+      })
+    decomposition.training_parameters = 2 * np.pi * sol_info['frequencies']
+    return decomposition
@@ -0,0 +1,241 @@
+import numpy as np
+from functools import partial
+from scipy import sparse
+from scipy.linalg import eig
+from scipy.sparse.linalg import splu, eigs
+
+from SAcouS.acxfem.PhysicAssembler import stiffness_coefficient
+from SAcouS.acxfem.PhysicAssembler import mass_coefficient, coupling_coefficient
+from SAcouS.acxfem.PhysicAssembler import solid_stiffness_coefficient
+from SAcouS.acxfem.PhysicAssembler import solid_mass_coefficient
+
+
+class Component:
+  """substructure of a multi-domain model reduced with the Craig-Bampton
+    method, its dynamic matrix is a sum of frequency-independent terms
+        A(omega) = sum_k theta_k(omega) A_k
+    the A_k are geometric (no material coefficient) and the material
+    dispersion is in the theta_k. The basis is made of the static
+    constraint modes and of the fixed-interface normal modes of the real
+    pencil (stiffness, mass)
+    parameters:
+    terms: list of (matrix, coefficient)
+    stiffness: sparse matrix of the modal pencil
+    mass: sparse matrix of the modal pencil
+    interface_dofs: ndarray
+        local indices of the interface dofs
+    interface_ids: ndarray
+        global numbers of the interface dofs, shared by the components
+        connected through them
+    nb_modes: int
+        number of fixed-interface normal modes
+    """
+
+  def __init__(self, terms, stiffness, mass, interface_dofs, interface_ids,
+               nb_modes):
+    self.terms = terms
+    self.stiffness = sparse.csr_matrix(stiffness)
+    self.mass = sparse.csr_matrix(mass)
+    self.nb_dofs = self.stiffness.shape[0]
+    self.interface_dofs = np.atleast_1d(interface_dofs)
+    self.interface_ids = np.atleast_1d(interface_ids)
+    self.interior_dofs = np.setdiff1d(np.arange(self.nb_dofs),
+                                      self.interface_dofs)
+    self.nb_modes = min(nb_modes, len(self.interior_dofs))
+    self.basis = None
+    self.eig_values = None
+    self.reduced_terms = None
+
+  @classmethod
+  def from_helmholtz(cls,
+                     assembler,
+                     bases,
+                     subdomains,
+                     interface_dofs,
+                     interface_ids,
+                     nb_modes,
+                     omega_ref,
+                     var=None):
+    """component of a HelmholtzAssembler with geometric bases (unit
+        material coefficients)
+            A(omega) = sum_s 1/(omega**2*rho_s) K_s - 1/K_s M_s
+        the modal pencil weights K_s and M_s with |1/rho_s| and |1/K_s| at
+        omega_ref (e.g. the centre of the frequency band)"""
+    terms = []
+    stiffness = 0.
+    mass = 0.
+    for mat, (K_s, M_s) in assembler.assemble_subdomain_matrices(
+        bases, subdomains, var).items():
+      terms += [(K_s, partial(stiffness_coefficient, mat)),
+                (M_s, partial(mass_coefficient, mat))]
+      stiffness += abs(
+          omega_ref**2 * stiffness_coefficient(mat, omega_ref)) * K_s
+      mass += abs(mass_coefficient(mat, omega_ref)) * M_s
+    return cls(terms, stiffness.real, mass.real, interface_dofs,
+               interface_ids, nb_modes)
+
+  @classmethod
+  def from_biot(cls, assembler, bases, vars, subdomains, interface_dofs,
+                interface_ids, nb_modes, omega_ref):
+    """component of a BiotAssembler (u-p formulation) with geometric bases
+        (unit material coefficients), bases and vars are the [pressure,
+        displacement] lists of BiotAssembler.assembly_global_matrix
+            A(omega) = sum_s K_p,s/(omega**2*rho_f) - M_p,s/K_f
+                       + P_hat K_u,s - omega**2 rho_til M_u,s
+                       - gamma_til (C_s + C_s^T)
+        the normal modes are the uncoupled modes of the solid and fluid
+        phases, pencil of the matrices weighted with the magnitude of their
+        coefficients at omega_ref"""
+    pressure = assembler.assemble_subdomain_matrices(bases[0], subdomains,
+                                                     vars[0])
+    solid = assembler.assemble_subdomain_matrices(bases[1], subdomains,
+                                                  vars[1])
+    coupling = assembler.assemble_subdomain_coupling(bases[0], subdomains,
+                                                     vars[1], vars[0])
+    terms = []
+    stiffness = 0.
+    mass = 0.
+    for mat in subdomains:
+      K_p, M_p = pressure[mat]
+      K_u, M_u = solid[mat]
+      terms += [(K_p, partial(stiffness_coefficient, mat)),
+                (M_p, partial(mass_coefficient, mat)),
+                (K_u, partial(solid_stiffness_coefficient, mat)),
+                (M_u, partial(solid_mass_coefficient, mat)),
+                (coupling[mat] + coupling[mat].T,
+                 partial(coupling_coefficient, mat))]
+      stiffness += (
+          abs(omega_ref**2 * stiffness_coefficient(mat, omega_ref)) * K_p +
+          abs(solid_stiffness_coefficient(mat, omega_ref)) * K_u)
+      mass += (abs(mass_coefficient(mat, omega_ref)) * M_p +
+               abs(solid_mass_coefficient(mat, omega_ref) / omega_ref**2) *
+               M_u)
+    return cls(terms, stiffness.real, mass.real, interface_dofs,
+               interface_ids, nb_modes)
+
+  @property
+  def nb_reduced_dofs(self):
+    return len(self.interface_dofs) + self.nb_modes
+
+  def fixed_interface_modes(self, K_ii, M_ii):
+    n_i = K_ii.shape[0]
+    if self.nb_modes == 0:
+      return np.zeros(0), np.zeros((n_i, 0))
+    if n_i <= 1000 or self.nb_modes >= n_i - 1:
+      eig_values, modes = eig(K_ii.toarray(), M_ii.toarray())
+    else:
+      eig_values, modes = eigs(K_ii, self.nb_modes, M_ii, sigma=0)
+    order = np.argsort(np.abs(eig_values))[:self.nb_modes]
+    return eig_values[order], modes[:, order]
+
+  def reduce(self):
+    """Craig-Bampton basis and reduced terms, computed once
+        T = [[I, 0], [-K_ii^-1 K_ib, Phi_i]] (interface, interior blocks)
+        returns:
+        basis: ndarray (nb_dofs, nb_reduced_dofs)
+        """
+    if self.reduced_terms is not None:
+      return self.basis
+    interface = self.interface_dofs
+    interior = self.interior_dofs
+    K_ii = self.stiffness[interior][:, interior]
+    K_ib = self.stiffness[interior][:, interface]
+    M_ii = self.mass[interior][:, interior]
+    lu = splu(sparse.csc_matrix(K_ii))
+    static_modes = -lu.solve(K_ib.toarray().astype(lu.U.dtype))
+    self.eig_values, normal_modes = self.fixed_interface_modes(K_ii, M_ii)
+
+    n_b = len(interface)
+    dtype = np.result_type(static_modes, normal_modes, self.terms[0][0].dtype)
+    T = np.zeros((self.nb_dofs, self.nb_reduced_dofs), dtype=dtype)
+    T[interface, np.arange(n_b)] = 1.
+    T[np.ix_(interior, np.arange(n_b))] = static_modes
+    T[interior, n_b:] = normal_modes
+    self.basis = T
+    self.reduced_terms = [(T.conj().T @ (A_k @ T), theta)
+                          for A_k, theta in self.terms]
+    return self.basis
+
+  def reduced_matrix(self, omega):
+    self.reduce()
+    return sum(theta(omega) * A_r for A_r, theta in self.reduced_terms)
+
+  def reduced_rhs(self, right_hand_vector):
+    self.reduce()
+    return self.basis.conj().T @ right_hand_vector
+
+  def recover_sol(self, reduced_sol):
+    return self.basis @ reduced_sol
+
+
+class ComponentModeSynthesis:
+  """Craig-Bampton component mode synthesis: the reduced components are
+    coupled through their shared interface dofs, the unknowns are the
+    global interface dofs followed by the modal coordinates of every
+    component. Each component keeps its reduced model, replacing one
+    component (e.g. a new material of a layer) only reduces that one again
+    parameters:
+    components: list of Component
+    """
+
+  def __init__(self, components):
+    self.components = list(components)
+    self.nb_reductions = 0
+
+  def set_component(self, i, component):
+    self.components[i] = component
+
+  @property
+  def nb_interface_dofs(self):
+    return max(comp.interface_ids.max() for comp in self.components) + 1
+
+  def reduced_indices(self):
+    """global indices of the reduced dofs of every component"""
+    offset = self.nb_interface_dofs
+    indices = []
+    for comp in self.components:
+      indices.append(
+          np.concatenate(
+              (comp.interface_ids, offset + np.arange(comp.nb_modes))))
+      offset += comp.nb_modes
+    return indices, offset
+
+  def reduce(self):
+    for comp in self.components:
+      if comp.reduced_terms is None:
+        comp.reduce()
+        self.nb_reductions += 1
+
+  def assemble(self, omega):
+    """reduced coupled matrix at omega"""
+    self.reduce()
+    indices, nb_reduced_dofs = self.reduced_indices()
+    dtype = np.result_type(*[comp.basis for comp in self.components])
+    left_hand_matrix = np.zeros((nb_reduced_dofs, nb_reduced_dofs),
+                                dtype=np.result_type(dtype, np.complex128))
+    for comp, index in zip(self.components, indices):
+      left_hand_matrix[np.ix_(index, index)] += comp.reduced_matrix(omega)
+    return left_hand_matrix
+
+  def assemble_rhs(self, right_hand_vectors):
+    """reduced load from the component loads (None for unloaded ones)"""
+    self.reduce()
+    indices, nb_reduced_dofs = self.reduced_indices()
+    right_hand_vector = np.zeros(nb_reduced_dofs, dtype=np.complex128)
+    for comp, index, f in zip(self.components, indices, right_hand_vectors):
+      if f is not None:
+        right_hand_vector[index] += comp.reduced_rhs(f)
+    return right_hand_vector
+
+  def solve(self, omega, right_hand_vectors):
+    """solve the reduced coupled system
+        returns:
+        list of the component solutions (local dofs)
+        """
+    reduced_sol = np.linalg.solve(self.assemble(omega),
+                                  self.assemble_rhs(right_hand_vectors))
+    indices, _ = self.reduced_indices()
+    return [
+        comp.recover_sol(reduced_sol[index])
+        for comp, index in zip(self.components, indices)
+    ]
@@ -0,0 +1,197 @@
+import numpy as np
+from functools import partial
+from scipy.sparse import coo_matrix
+
+from SAcouS.acxfem.Polynomial import Lobatto
+from SAcouS.acxfem.Quadratures import get_quadrature_points_weights
+from .myEIM import nonIntrusiveEIMV2
+
+
+def impedance_atoms(mesh, facets, integr_order=3):
+  """(facet, quadrature point) atoms of the impedance term of
+    ApplyBoundaryConditions.apply_impedance_bc on linear facets
+        C(mu) = sum_a g(x_a, mu) w_a |J_a| N(x_a) N(x_a)^T
+    returns:
+    points: ndarray (n_atoms, dim) quadrature points
+    matrices: ndarray (n_atoms, 2, 2) local matrices w_a |J_a| N N^T
+    dofs: ndarray (n_atoms, 2) global dofs
+    elements: ndarray (n_atoms,) facet of every atom
+    """
+  lines = mesh.exterior_facets[facets]
+  gl_pts, gl_wts = get_quadrature_points_weights(integr_order, 1)
+  shape_functions = Lobatto(1).get_shape_functions()
+  N = np.array([N_i(gl_pts) for N_i in shape_functions]).T    # (n_q, 2)
+  nodes_1 = mesh.nodes[lines[:, 0]]
+  nodes_2 = mesh.nodes[lines[:, 1]]
+  jac = np.linalg.norm(nodes_1 - nodes_2, axis=1) / 2
+
+  points = (N[np.newaxis, :, 0, np.newaxis] * nodes_1[:, np.newaxis] +
+            N[np.newaxis, :, 1, np.newaxis] * nodes_2[:, np.newaxis])
+  matrices = (jac[:, np.newaxis, np.newaxis, np.newaxis] *
+              gl_wts[np.newaxis, :, np.newaxis, np.newaxis] *
+              N[np.newaxis, :, :, np.newaxis] * N[np.newaxis, :, np.newaxis, :])
+  nb_q = len(gl_pts)
+  return (points.reshape(-1, points.shape[-1]), matrices.reshape(-1, 2, 2),
+          np.repeat(lines, nb_q, axis=0), np.repeat(np.asarray(facets), nb_q))
+
+
+def element_atoms(fe_space, bases, matrix='ke', var=None):
+  """element atoms of a material term with one coefficient per element
+    (e.g. JCAL parameters varying in space)
+        A(mu) = sum_e g_e(mu) A_e
+    the bases are built with geometric coefficients, see
+    HelmholtzAffineDecomposition
+    parameters:
+    matrix: str
+        'ke' or 'me'
+    returns:
+    points: ndarray (n_atoms, dim) element centroids
+    matrices: ndarray (n_atoms, n_loc, n_loc)
+    dofs: ndarray (n_atoms, n_loc)
+    elements: ndarray (n_atoms,)
+    """
+  if var is None:
+    dofs_index = fe_space.get_global_dofs()
+  else:
+    dofs_index = fe_space.get_global_dofs_by_base(var)
+  matrices = []
+  for basis in bases:
+    local = basis.local_dofs_index
+    matrices.append(getattr(basis, matrix)[np.ix_(local, local)])
+  points = np.array([np.mean(basis.vertices, axis=0) for basis in bases])
+  return (points, np.array(matrices), np.array([dofs for dofs in dofs_index]),
+          np.arange(len(bases)))
+
+
+class HyperReducedOperator:
+  """discrete empirical interpolation (DEIM) of a non-affine operator
+        A(mu) = sum_a g_a(mu) B_a
+    over atoms a (facet or element, quadrature point). The atom values
+    g(mu) are interpolated from the magic atoms found by nonIntrusiveEIMV2
+        g(mu) ~ V V[magic]^-1 g(mu)[magic]
+    so that A(mu) ~ sum_j lambda_j(mu) A_j with the collateral matrices
+    A_j = sum_a V_aj B_a assembled offline; online only the magic atoms are
+    evaluated, independently of the mesh size
+    parameters:
+    matrices: ndarray (n_atoms, n_loc, n_loc) local matrices B_a
+    dofs: ndarray (n_atoms, n_loc) global dofs of the atoms
+    nb_dofs: int
+        size of the linear system
+    coefficient: callable(atoms, mu) -> ndarray (len(atoms),)
+        values g_a(mu) of the given atoms only, e.g. for an impedance
+        lambda atoms, mu: 1j/(mu*Z(points[atoms], mu))
+    elements: ndarray (n_atoms,) facet/element of every atom
+    dtype: data type of linear system
+    """
+
+  def __init__(self,
+               matrices,
+               dofs,
+               nb_dofs,
+               coefficient,
+               elements=None,
+               dtype=np.complex128):
+    self.matrices = np.asarray(matrices)
+    self.dofs = np.asarray(dofs)
+    self.nb_dofs = nb_dofs
+    self.coefficient = coefficient
+    self.nb_atoms = len(self.matrices)
+    self.elements = np.arange(
+        self.nb_atoms) if elements is None else np.asarray(elements)
+    self.dtype = dtype
+    n_loc = self.dofs.shape[1]
+    self.rows = np.repeat(self.dofs, n_loc, axis=1).ravel()
+    self.cols = np.tile(self.dofs, (1, n_loc)).ravel()
+    self.eim = None
+    self.collateral_matrices = []
+    self.reduced_matrices = None
+
+  @property
+  def rank(self):
+    return len(self.collateral_matrices)
+
+  @property
+  def sampled_elements(self):
+    """facets/elements of the magic atoms: the reduced mesh"""
+    return np.unique(self.elements[self.magic_atoms])
+
+  def assemble(self, values):
+    """sum_a values_a B_a"""
+    data = (self.matrices * np.asarray(values)[:, np.newaxis,
+                                               np.newaxis]).ravel()
+    return coo_matrix((data, (self.rows, self.cols)),
+                      shape=(self.nb_dofs, self.nb_dofs),
+                      dtype=self.dtype).tocsr()
+
+  def full_operator(self, mu):
+    """high-fidelity assembly over all the atoms"""
+    return self.assemble(self.coefficient(np.arange(self.nb_atoms), mu))
+
+  def train(self, training_parameters, tolerance=1e-10, max_rank=None):
+    """empirical interpolation of the atom values on the training set and
+        offline assembly of the collateral matrices
+        returns:
+        rank: int
+        """
+    if max_rank is None:
+      max_rank = len(training_parameters)
+    atoms = np.arange(self.nb_atoms)
+    snapshots = np.array(
+        [self.coefficient(atoms, mu) for mu in training_parameters],
+        dtype=self.dtype).T
+    # relative tolerance
+    scaling = np.abs(snapshots).max()
+    eim = nonIntrusiveEIMV2(snapshots / scaling,
+                            max_rank,
+                            tolerance,
+                            dtype_=self.dtype)
+    eim.display = False
+    V, _ = eim.interpolate(intrusive=True)
+    self.eim = eim
+    self.magic_atoms = eim.indX[:eim.rank]
+    self.interpolation = np.linalg.inv(V[self.magic_atoms])
+    self.collateral_matrices = [self.assemble(V[:, j]) for j in range(eim.rank)]
+    self.reduced_matrices = None
+    return eim.rank
+
+  def interpolation_coefficients(self, mu):
+    """lambda(mu) from the magic atoms only
+        returns:
+        ndarray (rank,) or (rank, n_mu) for an array of parameters
+        """
+    if np.ndim(mu) > 0:
+      return np.array([self.interpolation_coefficients(m) for m in mu]).T
+    return self.interpolation @ self.coefficient(self.magic_atoms, mu)
+
+  def operator(self, mu):
+    """hyper-reduced high-fidelity operator sum_j lambda_j(mu) A_j"""
+    lambda_ = self.interpolation_coefficients(mu)
+    operator = 0.
+    for lambda_j, A_j in zip(lambda_, self.collateral_matrices):
+      operator = operator + lambda_j * A_j
+    return operator
+
+  def project(self, Phi):
+    """Galerkin projection Phi^H A_j Phi of the collateral matrices"""
+    self.reduced_matrices = np.array(
+        [Phi.conj().T @ (A_j @ Phi) for A_j in self.collateral_matrices])
+    return self.reduced_matrices
+
+  def reduced_operator(self, mu):
+    """online reduced operator, the cost only depends on the rank and the
+        size of the reduced basis"""
+    if self.reduced_matrices is None:
+      raise ValueError("project the collateral matrices first")
+    return np.tensordot(self.interpolation_coefficients(mu),
+                        self.reduced_matrices,
+                        axes=1)
+
+  def lambda_coefficient(self, j, mu):
+    return self.interpolation_coefficients(mu)[j]
+
+  def add_to(self, decomposition):
+    """append the hyper-reduced terms to an AffineDecomposition, e.g. to use
+        the non-affine term in the reduced basis solver"""
+    for j, A_j in enumerate(self.collateral_matrices):
+      decomposition.add_operator_term(A_j, partial(self.lambda_coefficient, j))
+    return decomposition
@@ -0,0 +1,100 @@
+import numpy as np
+from scipy import sparse
+from scipy.linalg import qr
+from scipy.sparse.linalg import splu
+
+from .ModalReduction import ModalReduction
+
+
+class KrylovReduction(ModalReduction):
+  """moment-matching (Pade via Arnoldi) reduction of
+        A(omega) = K_w + 1j*omega*C_w - omega**2*M_w
+    the projection basis spans the second-order Krylov subspaces (SOAR) of
+    the expansions of A(omega)^-1 f around the expansion frequencies, one
+    factorization per expansion point
+    parameters:
+    K_w: sparse matrix stiffness matrix
+    M_w: sparse matrix mass matrix
+    expansion_points: float or ndarray
+        expansion angular frequencies
+    nb_moments: int
+        number of matched moments (basis vectors) per expansion point
+    C_w: sparse matrix damping matrix (impedance BCs), None if undamped
+    """
+
+  def __init__(self, K_w, M_w, expansion_points, nb_moments, C_w=None):
+    super().__init__(K_w, M_w, None)
+    self.C_w = C_w
+    self.C_r = None
+    self.expansion_points = np.atleast_1d(expansion_points)
+    self.nb_moments = nb_moments
+
+  def soar(self, omega_0, right_hand_vector, tol=1e-12):
+    """second-order Arnoldi around omega_0, with omega = omega_0 + sigma
+        A(omega) = A_0 + sigma*D - sigma**2*M_w, the moments follow
+        r_j = -A_0^-1 D r_j-1 + A_0^-1 M_w r_j-2 from r_0 = A_0^-1 f
+        returns:
+        Q: ndarray (nb_dofs, nb_moments) orthonormal basis
+        """
+    A_0 = self.K_w - omega_0**2 * self.M_w
+    D = -2 * omega_0 * self.M_w
+    if self.C_w is not None:
+      A_0 = A_0 + 1j * omega_0 * self.C_w
+      D = D + 1j * self.C_w
+    lu = splu(sparse.csc_matrix(A_0))
+
+    r = lu.solve(np.asarray(right_hand_vector, dtype=lu.U.dtype))
+    nb_dofs = r.shape[0]
+    Q = np.zeros((nb_dofs, self.nb_moments), dtype=r.dtype)
+    P = np.zeros((nb_dofs, self.nb_moments), dtype=r.dtype)
+    Q[:, 0] = r / np.linalg.norm(r)
+    for j in range(self.nb_moments - 1):
+      r = lu.solve(self.M_w @ P[:, j] - D @ Q[:, j])
+      s = Q[:, j].copy()
+      # orthogonalization twice against the previous vectors
+      for _ in range(2):
+        t = Q[:, :j + 1].conj().T @ r
+        r -= Q[:, :j + 1] @ t
+        s -= P[:, :j + 1] @ t
+      norm = np.linalg.norm(r)
+      if norm < tol * np.linalg.norm(s):
+        # deflation: the subspace is invariant
+        return Q[:, :j + 1]
+      Q[:, j + 1] = r / norm
+      P[:, j + 1] = s / norm
+    return Q
+
+  def build_basis(self, right_hand_vector, tol=1e-12):
+    """merge the Krylov bases of all the expansion points
+        returns:
+        Phi_m: ndarray orthonormal projection basis
+        """
+    bases = [
+        self.soar(omega_0, right_hand_vector, tol)
+        for omega_0 in self.expansion_points
+    ]
+    # the bases of different points overlap: pivoted QR drops the redundancy
+    Q, R, _ = qr(np.hstack(bases), mode='economic', pivoting=True)
+    rank = np.sum(np.abs(np.diag(R)) > tol * np.abs(R[0, 0]))
+    self.Phi_m = Q[:, :rank]
+    self.K_r = None
+    self.M_r = None
+    self.C_r = None
+    return self.Phi_m
+
+  def frequency_response(self, omegas, right_hand_vector, output_dofs=None):
+    """evaluate the reduced damped model on a frequency vector (stacked
+        dense solves), see ModalReduction.frequency_response"""
+    if self.C_w is None:
+      return super().frequency_response(omegas, right_hand_vector, output_dofs)
+    if self.C_r is None:
+      self.K_r = self.projection(self.K_w)
+      self.M_r = self.projection(self.M_w)
+      self.C_r = self.projection(self.C_w)
+    omegas = np.atleast_1d(omegas)[:, np.newaxis, np.newaxis]
+    Phi_out = self.Phi_m if output_dofs is None else self.Phi_m[output_dofs]
+    f_r = self.projection(right_hand_vector)
+    left_hand_matrices = self.K_r + 1j * omegas * self.C_r - omegas**2 * self.M_r
+    rhs = np.broadcast_to(f_r, (omegas.shape[0], len(f_r)))[..., np.newaxis]
+    q = np.linalg.solve(left_hand_matrices, rhs)[..., 0]
+    return q @ Phi_out.T
@@ -1,5 +1,7 @@
+import numpy as np
 from SAcouS.acxfem import BaseSolver
 from scipy import sparse
+from scipy.linalg import eig
 from scipy.sparse.linalg import spsolve
 
 
@@ -41,6 +43,8 @@ class ModalReduction:
     self.K_w = K_w
     self.M_w = M_w
     self.Phi_m = modes
+    self.K_r = None
+    self.M_r = None
 
   def projection(self, original_array):
     """project original matrix/vector on modal basis to modal space
@@ -54,8 +58,9 @@ class ModalReduction:
       array = self.Phi_m.T @ original_array
       return array
     else:
+      # the reduced matrix is small and full: keep it dense
       array = self.Phi_m.T @ original_array @ self.Phi_m
-      return sparse.csr_matrix(array)
+      return np.asarray(array)
 
   def solve(self, left_hand_matrix, right_hand_vector):
     """solve the reduced system
@@ -70,7 +75,10 @@ class ModalReduction:
         """
     import time
     start = time.time()
-    sol = spsolve(left_hand_matrix, right_hand_vector)
+    if sparse.issparse(left_hand_matrix):
+      sol = spsolve(left_hand_matrix, right_hand_vector)
+    else:
+      sol = np.linalg.solve(left_hand_matrix, right_hand_vector)
     end = time.time()
     print("Reduced Linear solving time: ", end - start)
     return sol
@@ -85,3 +93,55 @@ class ModalReduction:
         """
     sol = self.Phi_m @ reducde_sol
     return sol
+
+  def diagonalize(self):
+    """project K_w and M_w once and diagonalize the reduced pencil
+        K_r V = M_r V Lambda, the eigen modes of EigenSolver are already
+        M-orthonormal and give diagonal reduced matrices
+        """
+    self.K_r = self.projection(self.K_w)
+    self.M_r = self.projection(self.M_w)
+    diag_K = np.diag(self.K_r)
+    diag_M = np.diag(self.M_r)
+    off_diag = np.abs(self.K_r - np.diag(diag_K)).max() + np.abs(
+        self.M_r - np.diag(diag_M)).max()
+    self.eig_values = None
+    if off_diag <= 1e-10 * (np.abs(diag_K).max() + np.abs(diag_M).max()):
+      self.eig_values = diag_K / diag_M
+      self.eig_vectors = np.identity(len(diag_K))
+      self.left_eig_vectors = np.diag(1 / diag_M)
+    else:
+      eig_values, eig_vectors = eig(self.K_r, self.M_r)
+      # defective or ill conditioned pencil: stacked solves are used instead
+      if np.all(np.isfinite(eig_values)) and np.linalg.cond(eig_vectors) < 1e8:
+        self.eig_values = eig_values
+        self.eig_vectors = eig_vectors
+        self.left_eig_vectors = np.linalg.inv(self.M_r @ eig_vectors)
+
+  def frequency_response(self, omegas, right_hand_vector, output_dofs=None):
+    """evaluate the reduced model K_r - omega**2*M_r on a frequency vector
+        parameters:
+        omegas: ndarray (n_freq,)
+            angular frequencies
+        right_hand_vector: ndarray
+            right hand vector in physical space (frequency independent)
+        output_dofs: ndarray
+            physical dofs where the solution is recovered, all if None
+        returns:
+        sol: ndarray (n_freq, n_output)
+        """
+    if self.K_r is None:
+      self.diagonalize()
+    omegas = np.atleast_1d(omegas)
+    Phi_out = self.Phi_m if output_dofs is None else self.Phi_m[output_dofs]
+    f_r = self.projection(right_hand_vector)
+    if self.eig_values is not None:
+      # closed-form modal sum: q = V (Lambda - omega^2)^-1 (M_r V)^-1 f_r
+      g = self.left_eig_vectors @ f_r
+      q = g / (self.eig_values[np.newaxis, :] - omegas[:, np.newaxis]**2)
+      return q @ (Phi_out @ self.eig_vectors).T
+    left_hand_matrices = self.K_r[np.newaxis] - omegas[:, np.newaxis,
+                                                       np.newaxis]**2 * self.M_r
+    rhs = np.broadcast_to(f_r, (len(omegas), len(f_r)))[..., np.newaxis]
+    q = np.linalg.solve(left_hand_matrices, rhs)[..., 0]
+    return q @ Phi_out.T
@@ -0,0 +1,228 @@
+import os
+import glob
+import json
+import hashlib
+import numpy as np
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from scipy import sparse
+from scipy.sparse.linalg import spsolve
+
+from .SnapshotStore import SnapshotStore, SnapshotWriter, parameters_file
+
+# state of the worker processes, inherited at fork time
+_worker_state = {}
+
+
+def _initialize_worker(decomposition, basis_memory, basis_shape, dtype):
+  _worker_state['decomposition'] = decomposition
+  if basis_memory is not None:
+    _worker_state['basis'] = np.ndarray(basis_shape,
+                                        dtype=dtype,
+                                        buffer=basis_memory.buf)
+
+
+def high_fidelity_solve(operator, rhs):
+  if sparse.issparse(operator):
+    return spsolve(operator.tocsc(), rhs)
+  return np.linalg.solve(operator, rhs)
+
+
+def _solve_snapshots(mus):
+  decomposition = _worker_state['decomposition']
+  return np.array([
+      high_fidelity_solve(decomposition.assemble_operator(mu),
+                          decomposition.assemble_rhs(mu)) for mu in mus
+  ]).T
+
+
+def _store_snapshots(chunk_id, mus, directory):
+  # every chunk of parameters is one chunk file, written by its worker; a
+  # chunk left by an interrupted run is overwritten
+  writer = SnapshotWriter(directory, chunk_id, chunk_size=len(mus))
+  writer.nb_chunks = 0
+  with writer:
+    writer.append(_solve_snapshots(mus), mus)
+  return len(mus)
+
+
+def _residual_norms(mus, coeffs):
+  decomposition = _worker_state['decomposition']
+  basis = _worker_state['basis'][:, :coeffs.shape[1]]
+  norms = np.zeros(len(mus))
+  for i, (mu, coeff) in enumerate(zip(mus, coeffs)):
+    residual = decomposition.assemble_rhs(mu) - decomposition.assemble_operator(
+        mu) @ (basis @ coeff)
+    norms[i] = np.linalg.norm(residual)
+  return norms
+
+
+class ParallelSnapshots:
+  """process pool evaluating high-fidelity snapshots and residuals over a
+    training set, the results keep the order of the parameters
+    the workers are forked once: the decomposition is inherited (no pickling
+    of the coefficient functions) and the reduced basis is shared with
+    them through a shared memory block written by the main process
+    parameters:
+    decomposition: AffineDecomposition
+        any object with assemble_operator(mu) and assemble_rhs(mu)
+    nb_workers: int
+        number of processes, os.cpu_count() if None
+    max_modes: int
+        maximum number of reduced basis functions (size of the shared basis)
+    chunks_per_worker: int
+        number of parameter chunks sent to each worker
+    """
+
+  def __init__(self,
+               decomposition,
+               nb_workers=None,
+               max_modes=0,
+               chunks_per_worker=4):
+    self.decomposition = decomposition
+    self.nb_workers = nb_workers or os.cpu_count()
+    self.chunks_per_worker = chunks_per_worker
+    self.nb_dofs = decomposition.rhs_modes[0].shape[0]
+    self.dtype = np.dtype(decomposition.dtype)
+    self.basis_shape = (self.nb_dofs, max_modes)
+    self.basis_memory = None
+    self.basis = None
+    if max_modes > 0:
+      self.basis_memory = shared_memory.SharedMemory(
+          create=True, size=self.nb_dofs * max_modes * self.dtype.itemsize)
+      self.basis = np.ndarray(self.basis_shape,
+                              dtype=self.dtype,
+                              buffer=self.basis_memory.buf)
+    self.executor = ProcessPoolExecutor(
+        self.nb_workers,
+        mp_context=multiprocessing.get_context('fork'),
+        initializer=_initialize_worker,
+        initargs=(decomposition, self.basis_memory, self.basis_shape,
+                  self.dtype))
+    self.nb_solved = 0
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *args):
+    self.close()
+
+  def close(self):
+    self.executor.shutdown()
+    if self.basis_memory is not None:
+      self.basis = None
+      self.basis_memory.close()
+      self.basis_memory.unlink()
+      self.basis_memory = None
+
+  def split(self, indices):
+    if len(indices) == 0:
+      return []
+    nb_chunks = min(len(indices), self.nb_workers * self.chunks_per_worker)
+    return np.array_split(indices, nb_chunks)
+
+  def compute_snapshots(self, parameters, checkpoint_file=None):
+    """high-fidelity solutions for all the parameters
+        parameters:
+        parameters: ndarray (n_mu,)
+        checkpoint_file: str
+            .npz file saved after every chunk, a run on the same parameters
+            resumes from it
+        returns:
+        snapshots: ndarray (nb_dofs, n_mu)
+        """
+    parameters = np.asarray(parameters)
+    snapshots = np.zeros((self.nb_dofs, len(parameters)), dtype=self.dtype)
+    done = np.zeros(len(parameters), dtype=bool)
+    if checkpoint_file is not None and os.path.exists(checkpoint_file):
+      with np.load(checkpoint_file) as checkpoint:
+        if np.array_equal(checkpoint['parameters'], parameters):
+          snapshots[:] = checkpoint['snapshots']
+          done[:] = checkpoint['done']
+
+    chunks = self.split(np.where(~done)[0])
+    results = self.executor.map(_solve_snapshots,
+                                [parameters[chunk] for chunk in chunks])
+    for chunk, result in zip(chunks, results):
+      snapshots[:, chunk] = result
+      done[chunk] = True
+      self.nb_solved += len(chunk)
+      if checkpoint_file is not None:
+        self.save_checkpoint(checkpoint_file, parameters, snapshots, done)
+    return snapshots
+
+  def store_snapshots(self, parameters, directory):
+    """high-fidelity solutions written by the workers to an out-of-core
+        snapshot store, nothing is gathered in the main process; the sweep
+        (parameter hash and chunk bounds) is recorded in manifest.json and
+        the chunks already on disk are skipped, so an interrupted sweep
+        resumes, with any number of workers
+        parameters:
+        parameters: ndarray (n_mu,)
+        directory: str
+            empty or holding an interrupted sweep of the same parameters
+        returns:
+        SnapshotStore
+        """
+    parameters = np.asarray(parameters)
+    os.makedirs(directory, exist_ok=True)
+    manifest_file = os.path.join(directory, 'manifest.json')
+    parameters_hash = hashlib.sha256(
+        np.ascontiguousarray(parameters).tobytes() +
+        str(parameters.dtype).encode()).hexdigest()
+    if os.path.exists(manifest_file):
+      with open(manifest_file) as f:
+        manifest = json.load(f)
+      if manifest['parameters_hash'] != parameters_hash:
+        raise ValueError(
+            f"{directory} holds the snapshots of other parameters")
+      bounds = manifest['chunks']
+    else:
+      if glob.glob(os.path.join(directory, 'chunk_*')):
+        raise ValueError(f"{directory} holds snapshots without a manifest")
+      bounds = [[int(chunk[0]), int(chunk[-1]) + 1]
+                for chunk in self.split(np.arange(len(parameters)))]
+      with open(manifest_file + '.tmp', 'w') as f:
+        json.dump({'parameters_hash': parameters_hash, 'chunks': bounds}, f)
+      os.replace(manifest_file + '.tmp', manifest_file)
+
+    todo = []
+    for chunk_id, (start, stop) in enumerate(bounds):
+      file_name = os.path.join(directory, f'chunk_{chunk_id:06d}_000000.npy')
+      if not (os.path.exists(file_name) and np.array_equal(
+          np.load(parameters_file(file_name)), parameters[start:stop])):
+        todo.append(chunk_id)
+    results = self.executor.map(
+        _store_snapshots, todo,
+        [parameters[slice(*bounds[i])] for i in todo], [directory] * len(todo))
+    self.nb_solved += sum(results)
+    return SnapshotStore(directory)
+
+  def save_checkpoint(self, checkpoint_file, parameters, snapshots, done):
+    # write aside and rename: an interruption never leaves a broken file
+    temp_file = checkpoint_file + '.tmp'
+    with open(temp_file, 'wb') as f:
+      np.savez(f, parameters=parameters, snapshots=snapshots, done=done)
+    os.replace(temp_file, checkpoint_file)
+
+  def residual_norms(self, parameters, basis, coeffs):
+    """high-fidelity residual norms ||f(mu) - A(mu) basis coeffs(mu)||
+        parameters:
+        parameters: ndarray (n_mu,)
+        basis: ndarray (nb_dofs, m), m <= max_modes
+        coeffs: ndarray (n_mu, m)
+        returns:
+        norms: ndarray (n_mu,)
+        """
+    m = basis.shape[1]
+    if m > self.basis_shape[1]:
+      raise ValueError(
+          f"the shared basis holds {self.basis_shape[1]} modes, got {m}")
+    self.basis[:, :m] = basis
+    parameters = np.asarray(parameters)
+    chunks = self.split(np.arange(len(parameters)))
+    results = self.executor.map(_residual_norms,
+                                [parameters[chunk] for chunk in chunks],
+                                [coeffs[chunk] for chunk in chunks])
+    return np.concatenate(list(results))
@@ -0,0 +1,126 @@
+import numpy as np
+from scipy.linalg import qr, svd
+
+
+def adjoint(matrix):
+  # ndarray or scipy LinearOperator
+  if isinstance(matrix, np.ndarray):
+    return matrix.conj().T
+  return matrix.H
+
+
+def randomized_svd(snapshots,
+                   rank,
+                   oversampling=10,
+                   power_iterations=2,
+                   seed=None):
+  """randomized truncated SVD (range finder with power iterations)
+    the snapshot matrix is only accessed through products, it can be a
+    LinearOperator (e.g. streamed from disk)
+    parameters:
+    snapshots: ndarray or LinearOperator (nb_dofs, nb_snapshots)
+    rank: int
+        number of singular triplets
+    oversampling: int
+        additional random directions
+    power_iterations: int
+        number of subspace iterations, improves slowly decaying spectra
+    seed: int
+        seed of the random generator
+    returns:
+    U: ndarray (nb_dofs, rank), s: ndarray (rank,), Vh: ndarray (rank, nb_snapshots)
+    """
+  rng = np.random.default_rng(seed)
+  nb_snapshots = snapshots.shape[1]
+  size = min(rank + oversampling, *snapshots.shape)
+  dtype = np.result_type(snapshots.dtype, np.float64)
+  omega = rng.standard_normal((nb_snapshots, size))
+  if np.issubdtype(dtype, np.complexfloating):
+    omega = omega + 1j * rng.standard_normal((nb_snapshots, size))
+  Q, _ = qr(snapshots @ omega, mode='economic')
+  snapshots_h = adjoint(snapshots)
+  for _ in range(power_iterations):
+    Z, _ = qr(snapshots_h @ Q, mode='economic')
+    Q, _ = qr(snapshots @ Z, mode='economic')
+  B = adjoint(snapshots_h @ Q)
+  U_b, s, Vh = svd(B, full_matrices=False)
+  return (Q @ U_b)[:, :rank], s[:rank], Vh[:rank]
+
+
+class IncrementalSVD:
+  """streaming truncated SVD (Brand) of a snapshot matrix received one
+    snapshot (or one block of snapshots) at a time, the memory is
+    O(nb_dofs*rank) whatever the number of snapshots
+    parameters:
+    tolerance: float
+        singular values below tolerance*s_max are truncated
+    max_rank: int
+        maximum rank kept, no limit if None
+    """
+
+  def __init__(self, tolerance=1e-10, max_rank=None):
+    self.tolerance = tolerance
+    self.max_rank = max_rank
+    self.U = None
+    self.s = None
+    self.V = None
+    self.nb_snapshots = 0
+
+  @property
+  def rank(self):
+    return 0 if self.s is None else len(self.s)
+
+  def truncate(self, U, s, V):
+    rank = np.sum(s > self.tolerance * s[0]) if s[0] > 0 else 0
+    if self.max_rank is not None:
+      rank = min(rank, self.max_rank)
+    self.U, self.s, self.V = U[:, :rank], s[:rank], V[:, :rank]
+
+  def update(self, snapshots):
+    """add snapshots (nb_dofs,) or (nb_dofs, k) to the decomposition"""
+    C = np.asarray(snapshots)
+    if C.ndim == 1:
+      C = C[:, np.newaxis]
+    k = C.shape[1]
+    self.nb_snapshots += k
+    if self.U is None:
+      U, s, Vh = svd(C, full_matrices=False)
+      self.truncate(U, s, Vh.conj().T)
+      return
+
+    # component of the new snapshots out of the current subspace (twice)
+    L = self.U.conj().T @ C
+    H = C - self.U @ L
+    L_2 = self.U.conj().T @ H
+    H -= self.U @ L_2
+    L += L_2
+    J, K = qr(H, mode='economic')
+
+    r = self.rank
+    middle = np.zeros((r + k, r + k), dtype=np.result_type(L, K))
+    middle[:r, :r] = np.diag(self.s)
+    middle[:r, r:] = L
+    middle[r:, r:] = K
+    U_m, s, Vh_m = svd(middle, full_matrices=False)
+
+    U = np.hstack((self.U, J)) @ U_m
+    V = np.zeros((self.V.shape[0] + k, r + k), dtype=middle.dtype)
+    V[:-k, :r] = self.V
+    V[-k:, r:] = np.identity(k)
+    self.truncate(U, s, V @ Vh_m.conj().T)
+
+    # the orthogonality of U degrades slowly with the updates
+    loss = np.abs(self.U.conj().T @ self.U - np.identity(self.rank)).max()
+    if loss > np.sqrt(np.finfo(float).eps):
+      Q, R = qr(self.U, mode='economic')
+      U_r, s, Vh_r = svd(R * self.s, full_matrices=False)
+      self.U, self.s, self.V = Q @ U_r, s, self.V @ Vh_r.conj().T
+
+  def basis(self, rank=None):
+    """left singular vectors, the POD basis"""
+    return self.U[:, :rank]
+
+  def compressed_snapshots(self, rank=None):
+    """U*s: same column space and singular values as the snapshots with
+        rank columns, to feed nonIntrusiveEIMV2"""
+    return self.U[:, :rank] * self.s[:rank]
@@ -0,0 +1,200 @@
+import os
+import glob
+from collections import OrderedDict
+
+import numpy as np
+from scipy.sparse.linalg import LinearOperator
+try:
+  import h5py
+  H5PY_on = True
+except ImportError:
+  H5PY_on = False
+
+
+def parameters_file(chunk_file):
+  """parameters of the npy chunk 'chunk_w_n.npy': 'parameters_w_n.npy'"""
+  directory, name = os.path.split(chunk_file)
+  return os.path.join(directory, 'parameters' + name[len('chunk'):])
+
+
+class SnapshotWriter:
+  """append-only writer of snapshot chunks, every writer (sweep worker)
+    owns its files so that no locking is needed; a npy chunk is a standard
+    .npy array, its parameters are stored aside (see parameters_file)
+    parameters:
+    directory: str
+        directory of the snapshot store
+    writer_id: int
+        identifier of the writer, the chunks are ordered by (writer, number)
+    chunk_size: int
+        number of snapshots per chunk file
+    backend: str
+        'npy' or 'hdf5' (requires h5py)
+    """
+
+  def __init__(self, directory, writer_id=0, chunk_size=64, backend='npy'):
+    if backend == 'hdf5' and not H5PY_on:
+      raise ImportError("h5py is required for the hdf5 backend")
+    if backend not in ['npy', 'hdf5']:
+      raise ValueError("backend must be 'npy' or 'hdf5'")
+    os.makedirs(directory, exist_ok=True)
+    self.directory = directory
+    self.writer_id = writer_id
+    self.chunk_size = chunk_size
+    self.backend = backend
+    self.nb_chunks = len(
+        glob.glob(os.path.join(directory, f'chunk_{writer_id:06d}_*.npy')) +
+        glob.glob(os.path.join(directory, f'chunk_{writer_id:06d}_*.h5')))
+    self.buffer = []
+    self.parameters = []
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *args):
+    self.flush()
+
+  def append(self, snapshots, parameters=None):
+    """append snapshots (nb_dofs,) or (nb_dofs, k) and their parameters"""
+    snapshots = np.asarray(snapshots)
+    if snapshots.ndim == 1:
+      snapshots = snapshots[:, np.newaxis]
+    if parameters is None:
+      parameters = np.full(snapshots.shape[1], np.nan)
+    for column, parameter in zip(snapshots.T, np.atleast_1d(parameters)):
+      self.buffer.append(column)
+      self.parameters.append(parameter)
+      if len(self.buffer) == self.chunk_size:
+        self.flush()
+
+  def flush(self):
+    if not self.buffer:
+      return
+    name = os.path.join(self.directory,
+                        f'chunk_{self.writer_id:06d}_{self.nb_chunks:06d}')
+    block = np.array(self.buffer).T
+    parameters = np.array(self.parameters)
+    # write aside and rename: readers never see a partial chunk, the
+    # snapshots are renamed last
+    if self.backend == 'npy':
+      for file_name, array in ((parameters_file(name), parameters), (name,
+                                                                      block)):
+        with open(file_name + '.tmp', 'wb') as f:
+          np.save(f, array)
+        os.replace(file_name + '.tmp', file_name + '.npy')
+    else:
+      with h5py.File(name + '.tmp', 'w') as f:
+        f.create_dataset('snapshots', data=block)
+        f.create_dataset('parameters', data=parameters)
+      os.replace(name + '.tmp', name + '.h5')
+    self.nb_chunks += 1
+    self.buffer = []
+    self.parameters = []
+
+
+class SnapshotStore:
+  """out-of-core snapshot matrix (nb_dofs, nb_snapshots) made of the chunk
+    files of a directory, the chunks are memory-mapped (npy) and the last
+    used ones are kept in a small cache
+    parameters:
+    directory: str
+    cache_size: int
+        number of chunks kept open
+    """
+
+  def __init__(self, directory, cache_size=4):
+    self.directory = directory
+    self.cache_size = cache_size
+    self.cache = OrderedDict()
+    self.refresh()
+
+  def refresh(self):
+    """rescan the directory for the chunks written since the last scan"""
+    self.files = sorted(
+        glob.glob(os.path.join(self.directory, 'chunk_*.npy')) +
+        glob.glob(os.path.join(self.directory, 'chunk_*.h5')))
+    self.cache.clear()
+    sizes = []
+    parameters = []
+    self.nb_dofs = 0
+    self.dtype = np.float64
+    for i in range(len(self.files)):
+      block, block_parameters = self.chunk(i)
+      sizes.append(block.shape[1])
+      parameters.append(block_parameters)
+      self.nb_dofs = block.shape[0]
+      self.dtype = np.result_type(self.dtype, block.dtype)
+    self.offsets = np.cumsum([0] + sizes)
+    self.parameters = np.concatenate(parameters) if parameters else np.zeros(0)
+
+  @property
+  def nb_snapshots(self):
+    return int(self.offsets[-1])
+
+  @property
+  def shape(self):
+    return (self.nb_dofs, self.nb_snapshots)
+
+  def chunk(self, i):
+    """(snapshots, parameters) of the i-th chunk, read through the cache"""
+    if i in self.cache:
+      self.cache.move_to_end(i)
+      return self.cache[i]
+    file_name = self.files[i]
+    if file_name.endswith('.npy'):
+      block = np.load(file_name, mmap_mode='r')
+      parameters = np.load(parameters_file(file_name))
+    else:
+      with h5py.File(file_name, 'r') as f:
+        block = f['snapshots'][()]
+        parameters = f['parameters'][()]
+    self.cache[i] = (block, parameters)
+    if len(self.cache) > self.cache_size:
+      self.cache.popitem(last=False)
+    return block, parameters
+
+  def blocks(self):
+    """iterate over the column blocks: (first column index, block)"""
+    for i in range(len(self.files)):
+      yield self.offsets[i], self.chunk(i)[0]
+
+  def columns(self, indices):
+    indices = np.atleast_1d(indices)
+    result = np.zeros((self.nb_dofs, len(indices)), dtype=self.dtype)
+    chunk_index = np.searchsorted(self.offsets, indices, side='right') - 1
+    for i in np.unique(chunk_index):
+      mask = chunk_index == i
+      result[:, mask] = self.chunk(i)[0][:, indices[mask] - self.offsets[i]]
+    return result
+
+  def rows(self, indices):
+    result = np.zeros((len(indices), self.nb_snapshots), dtype=self.dtype)
+    for start, block in self.blocks():
+      result[:, start:start + block.shape[1]] = block[indices, :]
+    return result
+
+  def matmat(self, X):
+    """snapshots @ X, X: (nb_snapshots, k)"""
+    result = np.zeros((self.nb_dofs, X.shape[1]),
+                      dtype=np.result_type(self.dtype, X))
+    for start, block in self.blocks():
+      result += block @ X[start:start + block.shape[1]]
+    return result
+
+  def rmatmat(self, Y):
+    """snapshots^H @ Y, Y: (nb_dofs, k)"""
+    result = np.zeros((self.nb_snapshots, Y.shape[1]),
+                      dtype=np.result_type(self.dtype, Y))
+    for start, block in self.blocks():
+      result[start:start + block.shape[1]] = block.conj().T @ Y
+    return result
+
+  def as_linear_operator(self):
+    """LinearOperator view, e.g. for randomized_svd"""
+    return LinearOperator(
+        self.shape,
+        matvec=lambda x: self.matmat(x.reshape(-1, 1))[:, 0],
+        rmatvec=lambda y: self.rmatmat(y.reshape(-1, 1))[:, 0],
+        matmat=self.matmat,
+        rmatmat=self.rmatmat,
+        dtype=self.dtype)
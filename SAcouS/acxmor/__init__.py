@@ -1 +1,8 @@
 from .ModalReduction import EigenSolver, ModalReduction
+from .AffineDecomposition import AffineDecomposition, HelmholtzAffineDecomposition
+from .ParallelSnapshots import ParallelSnapshots
+from .KrylovReduction import KrylovReduction
+from .SnapshotCompression import IncrementalSVD, randomized_svd
+from .SnapshotStore import SnapshotStore, SnapshotWriter
+from .HyperReduction import HyperReducedOperator
+from .ComponentModeSynthesis import Component, ComponentModeSynthesis
@@ -21,12 +21,15 @@ class nonIntrusiveEIMV2:
     def vecMax(self, arr):
         return arr.max(), arr.argmax()
 
-    def interpolate(self, intrusive=False):
+    def interpolate(self, intrusive=False, blockSize=256):
+        if hasattr(self.snapshots, 'blocks'):
+            # snapshots hors memoire (SnapshotStore)
+            return self.interpolateByBlocks(intrusive)
         V = np.zeros((self.snapshots.shape[0], self.maxRank), dtype=self.dtype)
         indXi = np.zeros(self.maxRank, int)
         indX = np.zeros(self.maxRank, int)
-        fullApprox = np.zeros(self.snapshots.shape, dtype=self.dtype)
-        residual = self.snapshots - fullApprox
+        # Une seule copie des snapshots : le residu est mis a jour sur place
+        residual = np.array(self.snapshots, dtype=np.result_type(self.snapshots, self.dtype))
         normResidual, indXi[0] = self.vecMax(self.metric(residual))
         trash, indX[0] = self.vecMax(abs(residual[:, indXi[0]]))
         l = 0
@@ -40,13 +43,13 @@ class nonIntrusiveEIMV2:
             v = v / v[indX[l]]
 
             V[:, l] = v[:]
-            Vl = V[:, :l + 1]
 
-            lambda_ = solve(Vl[indX[:l + 1], :], self.snapshots[indX[:l + 1], :])  # gamma
-
-            fullApprox = np.dot(Vl, lambda_)
-            lastResidual = residual
-            residual = self.snapshots - fullApprox
+            # v s'annule aux points magiques precedents et vaut 1 en indX[l] :
+            # r_l = r_(l-1) - v r_(l-1)[indX[l], :], par blocs de colonnes
+            row = residual[indX[l], :].copy()
+            for start in range(0, residual.shape[1], blockSize):
+                block = slice(start, start + blockSize)
+                residual[:, block] -= np.outer(v, row[block])
 
             l += 1
 
@@ -56,12 +59,11 @@ class nonIntrusiveEIMV2:
                 trash, indX[l] = self.vecMax(abs(residual[:, indXi[l]]))
             else:
                 normResidual, trash = self.vecMax(self.metric(residual))
-            #                aaa
-            #            print(indXi)
 
             if self.display:
                 print('Iteration %3d - Residual %e\n' % (l, normResidual))
-                # print(indXi)
+
+        lambda_ = solve(V[indX[:l], :l], self.snapshots[indX[:l], :])  # gamma
 
         if intrusive:
             self.indXi = indXi
@@ -78,6 +80,56 @@ class nonIntrusiveEIMV2:
 	    # R basis, lambda is the parametric dependence function
             return R, lambda_.T
 
+    def blockResidual(self, block, V, indX):
+        # residu de l'interpolation sur les points magiques indX
+        if V.shape[1] == 0:
+            return block
+        return block - V @ solve(V[indX, :], block[indX, :])
+
+    def maxResidualByBlocks(self, V, indX):
+        # un passage sur les blocs de colonnes, le residu n'est jamais stocke
+        normResidual, indXi = -1., 0
+        for start, block in self.snapshots.blocks():
+            norm, index = self.vecMax(self.metric(self.blockResidual(block, V, indX)))
+            if norm > normResidual:
+                normResidual, indXi = norm, start + index
+        return normResidual, indXi
+
+    def interpolateByBlocks(self, intrusive=False):
+        V = np.zeros((self.snapshots.shape[0], self.maxRank), dtype=self.dtype)
+        indXi = np.zeros(self.maxRank, int)
+        indX = np.zeros(self.maxRank, int)
+        l = 0
+        normResidual, indXi[0] = self.maxResidualByBlocks(V[:, :0], indX[:0])
+        v = self.snapshots.columns(indXi[0])[:, 0].astype(self.dtype)
+        trash, indX[0] = self.vecMax(abs(v))
+
+        if self.display:
+            print('Iteration %3d - Residual %e\n' % (l, normResidual))
+
+        while (self.maxRank > l) and (normResidual > self.tolerance):
+            V[:, l] = v / v[indX[l]]
+            l += 1
 
+            if l < self.maxRank:
+                normResidual, indXi[l] = self.maxResidualByBlocks(V[:, :l], indX[:l])
+                v = self.blockResidual(self.snapshots.columns(indXi[l]), V[:, :l], indX[:l])[:, 0]
+                trash, indX[l] = self.vecMax(abs(v))
+            else:
+                normResidual, trash = self.maxResidualByBlocks(V[:, :l], indX[:l])
 
+            if self.display:
+                print('Iteration %3d - Residual %e\n' % (l, normResidual))
 
+        self.rank = l
+        if intrusive:
+            self.indXi = indXi
+            self.indX = indX
+            lambda_ = solve(V[indX[:l], :l], self.snapshots.rows(indX[:l]))
+            return V[:, :l], lambda_.T
+        else:
+            self.indXi = indXi[:l]
+            self.indX = indX[:l]
+            R = self.snapshots.columns(indXi[:l])
+            lambda_ = solve(R[indX[:l], :], self.snapshots.rows(indX[:l]))
+            return R, lambda_.T
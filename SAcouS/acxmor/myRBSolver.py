@@ -1,6 +1,80 @@
 import numpy as np
 
 
+class ResidualErrorEstimator:
+    """
+    Offline/online decomposition of the residual norm
+        ||r(mu)||^2 = ||sum_q gamma_q(mu) f_q - sum_k theta_k(mu) A_k B c(mu)||^2
+    the Gram matrices of the rhs terms and of the operator terms applied to
+    the reduced basis are precomputed (offline) and updated when a mode is
+    added, the norm for a parameter costs O((Qa m)^2) and no high-fidelity
+    vector (online). The cancellation limits the relative accuracy to about
+    sqrt(machine precision).
+    """
+
+    def __init__(self, operatorModesSpace, rhsModesSpace, dtype_=float):
+        self.operatorModesSpace = operatorModesSpace
+        self.F = np.array(rhsModesSpace).T  # (N, Qf)
+        self.nbOperatorTerms = len(operatorModesSpace)
+        self.nbRhsTerms = len(rhsModesSpace)
+        nbDofs = self.F.shape[0]
+        dtype_ = np.result_type(dtype_, self.F)
+
+        # Partie offline independante de la base
+        self.G_ff = self.F.conj().T @ self.F
+        # A_k B pour chaque terme de l'operateur : (Qa, N, m)
+        self.AB = np.zeros((self.nbOperatorTerms, nbDofs, 0), dtype=dtype_)
+        # G_fA[q, k, i] = f_q^H A_k b_i
+        self.G_fA = np.zeros((self.nbRhsTerms, self.nbOperatorTerms, 0), dtype=dtype_)
+        # G_AA[k, l, i, j] = (A_k b_i)^H A_l b_j
+        self.G_AA = np.zeros((self.nbOperatorTerms, self.nbOperatorTerms, 0, 0), dtype=dtype_)
+        self.nbModes = 0
+
+    def addMode(self, newBasis):
+        m = self.nbModes
+        Qa = self.nbOperatorTerms
+        P = np.array([A_k @ newBasis for A_k in self.operatorModesSpace])  # (Qa, N)
+        dtype_ = np.result_type(self.AB, P)
+
+        G_fA = np.zeros((self.nbRhsTerms, Qa, m + 1), dtype=dtype_)
+        G_fA[:, :, :m] = self.G_fA
+        G_fA[:, :, m] = self.F.conj().T @ P.T
+
+        G_AA = np.zeros((Qa, Qa, m + 1, m + 1), dtype=dtype_)
+        G_AA[:, :, :m, :m] = self.G_AA
+        cross = np.einsum('kni,ln->kli', self.AB.conj(), P)
+        G_AA[:, :, :m, m] = cross
+        G_AA[:, :, m, :m] = cross.conj().transpose(1, 0, 2)
+        G_AA[:, :, m, m] = P.conj() @ P.T
+
+        self.AB = np.concatenate((self.AB, P[:, :, np.newaxis]), axis=2)
+        self.G_fA = G_fA
+        self.G_AA = G_AA
+        self.nbModes = m + 1
+
+    def rhsNorms(self, paramRhs):
+        # norme du second membre pour chaque parametre (residu avec base vide)
+        return np.sqrt(np.maximum(np.einsum('ni,ij,nj->n', paramRhs.conj(), self.G_ff, paramRhs).real, 0.))
+
+    def residualNorms(self, paramOp, paramRhs, coeffs):
+        """
+        paramOp: (n_mu, Qa) operator coefficients theta_k(mu)
+        paramRhs: (n_mu, Qf) rhs coefficients gamma_q(mu)
+        coeffs: (n_mu, m) reduced coefficients
+        returns: (n_mu,) residual norms
+        """
+        nbMus, m = coeffs.shape
+        Qa = self.nbOperatorTerms
+        x = (paramOp[:, :, np.newaxis] * coeffs[:, np.newaxis, :]).reshape(nbMus, Qa * m)
+        G_fA = self.G_fA[:, :, :m].reshape(self.nbRhsTerms, Qa * m)
+        G_AA = self.G_AA[:, :, :m, :m].transpose(0, 2, 1, 3).reshape(Qa * m, Qa * m)
+
+        ff = np.einsum('ni,ij,nj->n', paramRhs.conj(), self.G_ff, paramRhs).real
+        fA = np.einsum('ni,ij,nj->n', paramRhs.conj(), G_fA, x).real
+        AA = np.einsum('ni,ij,nj->n', x.conj(), G_AA, x).real
+        return np.sqrt(np.maximum(ff - 2 * fA + AA, 0.))
+
+
 class RBSolver_fromResidual:
 
     def __init__(self, maxmodes, operatorModesSpace, operatorModesParam, rhsModesSpace, rhsModesParam,
@@ -20,6 +94,8 @@ class RBSolver_fromResidual:
 
         self.RB_Basis = np.zeros((self.operatorModesSpace[0].shape[0], self.maxModes), dtype=dtype_)
         self.RB_Coeffs = np.zeros((len(self.parameterTrainingSpace), self.maxModes), dtype=dtype_)
+        # Facteur R de la QR incrementale des fonctions de base
+        self.RB_R = np.zeros((self.maxModes, self.maxModes), dtype=dtype_)
         self.nbModes = 0
         self.worstParamHistory = []
 
@@ -27,8 +103,22 @@ class RBSolver_fromResidual:
         self.Atilde_k = []  # Precomputed projected affine decomposition (operator space part)
         self.Btilde_k = []  # Precomputed projected affine decomposition (rhs space part)
 
+        self.paramOp = None  # theta_k(mu_i) on the training space (n_mu, Qa)
+        self.paramRhs = None  # gamma_k(mu_i) on the training space (n_mu, Qf)
+        self.estimator = None
+        self.snapshotPool = None  # ParallelSnapshots for the residuals on the training space
+
         self.dtype = dtype_
 
+    # Evaluate once the parametric functions on the training space
+    def evaluateParameterFunctions(self):
+        if self.paramOp is None:
+            self.paramOp = np.array([[theta(mui) for theta in self.operatorModesParam]
+                                     for mui in self.parameterTrainingSpace], dtype=self.dtype)
+            self.paramRhs = np.array([[theta(mui) for theta in self.rhsModesParam]
+                                      for mui in self.parameterTrainingSpace], dtype=self.dtype)
+        return self.paramOp, self.paramRhs
+
     # From the current state of the greedy strategy :
     # Computes:
     # * the worst snapshot and associated residual
@@ -36,6 +126,17 @@ class RBSolver_fromResidual:
 
     def computeWorstParameterAndAssociatedData(self, basis, coeffs):
 
+        if self.snapshotPool is not None:
+            # Residus calcules en parallele, seul celui du pire parametre est reconstruit
+            residNorms = self.snapshotPool.residual_norms(self.parameterTrainingSpace, basis, coeffs)
+            imuTilde = int(np.argmax(residNorms))
+            mui = self.parameterTrainingSpace[imuTilde]
+            Bcurr = sum(self.rhsModesSpace[k] * self.rhsModesParam[k](mui) for k in range(len(self.rhsModesSpace)))
+            Acurr = sum(self.operatorModesSpace[k] * self.operatorModesParam[k](mui) for k in range(len(self.operatorModesSpace)))
+            maxResid = Bcurr - Acurr @ (basis @ coeffs[imuTilde])
+            print('Max residual norm', residNorms[imuTilde], 'for snapshot', imuTilde)
+            return maxResid, Acurr, Bcurr, imuTilde
+
         maxResidNorm = -1.
         imuTilde = 0
 
@@ -97,7 +198,11 @@ class RBSolver_fromResidual:
             self.Atilde_k = []
 
             for k in range(len(self.operatorModesSpace)):
-                Atilde = basis[:, :m].T @ (self.operatorModesSpace[k] @ basis[:, :m])
+                if self.estimator is not None and self.estimator.nbModes == m:
+                    # A_k B deja calcule par l'estimateur
+                    Atilde = basis[:, :m].T @ self.estimator.AB[k]
+                else:
+                    Atilde = basis[:, :m].T @ (self.operatorModesSpace[k] @ basis[:, :m])
                 self.Atilde_k.append(Atilde)
 
             # Construction des Btilde_k
@@ -114,22 +219,13 @@ class RBSolver_fromResidual:
 
 
         ###### Resolution du problème réduit pour les snapshots
-        # Loop over mu_i
-        for imu, mui in enumerate(self.parameterTrainingSpace):
-
-
-            # Particularisation du problème réduit pour mu
-            RB_Matrix = np.zeros((m, m), dtype=self.dtype)
-            RB_RHS = np.zeros(m, dtype=self.dtype)
+        # Particularisation du problème réduit pour tous les mu (resolution empilee)
+        paramOp, paramRhs = self.evaluateParameterFunctions()
+        RB_Matrix = np.einsum('nk,kij->nij', paramOp, np.array(self.Atilde_k))
+        RB_RHS = paramRhs @ np.array(self.Btilde_k)
 
-            for k in range(len(self.operatorModesParam)):
-                RB_Matrix += self.operatorModesParam[k](mui) * self.Atilde_k[k]
-
-            for k in range(len(self.rhsModesParam)):
-                RB_RHS += self.rhsModesParam[k](mui) * self.Btilde_k[k]
-            # aaaaa
-            # Solve
-            coeffs[imu] = np.linalg.solve(RB_Matrix, RB_RHS)
+        # Solve
+        coeffs[:] = np.linalg.solve(RB_Matrix, RB_RHS[:, :, np.newaxis])[:, :, 0]
 
         return coeffs
 
@@ -143,6 +239,37 @@ class RBSolver_fromResidual:
 
 
 
+    # QR incrementale : Gram-Schmidt classique par blocs repete deux fois (CGS2)
+    # stable au sens de "twice is enough", renvoie False si la fonction est dependante
+    def appendBasis(self, newBasis, tol=1e-12):
+        m = self.nbModes
+        Q = self.RB_Basis[:, :m]
+        v = np.array(newBasis, dtype=self.dtype)
+        r = np.zeros(m, dtype=self.dtype)
+        normInit = np.linalg.norm(v)
+        for _ in range(2):
+            s = Q.conj().T @ v
+            v -= Q @ s
+            r += s
+        normV = np.linalg.norm(v)
+        if normV <= tol * normInit:
+            print('New basis function is linearly dependent on the reduced basis')
+            return False
+        self.RB_Basis[:, m] = v / normV
+        self.RB_R[:m, m] = r
+        self.RB_R[m, m] = normV
+        self.nbModes = m + 1
+        return True
+
+    # Initialisation de la base reduite avec une base compressee (POD, SVD incrementale)
+    def initializeBasis(self, basis):
+        for j in range(basis.shape[1]):
+            if self.nbModes == self.maxModes or not self.appendBasis(basis[:, j]):
+                break
+        m = self.nbModes
+        self.RB_Coeffs[:, :m] = self.solveRomEqn(self.RB_Basis[:, :m])
+        return m
+
     # Solve Greedy
     def solveGreedyLeblond(self, tol):
         m = 0
@@ -159,15 +286,10 @@ class RBSolver_fromResidual:
             self.worstParamHistory.append(imuTilde)
             newBasis = self.updateBasis(Acurr, maxResid)
 
-            # MAJ des bases reduites
-            # gramm schmit orthogonalization
-            othoNewBasis = newBasis - np.sum(np.dot(self.RB_Basis[:, j], newBasis)/np.dot(self.RB_Basis[:, j], self.RB_Basis[:, j]) *self.RB_Basis[:, j]  for j in range(m))
-            othoNewBasis /= np.linalg.norm(othoNewBasis)
-            
-            self.RB_Basis[:, m] = othoNewBasis
-            # self.RB_Basis[:, m], R = np.linalg.qr(self.RB_Basis[:, m])
-            m += 1
-            self.nbModes = m
+            # MAJ des bases reduites (QR incrementale)
+            if not self.appendBasis(newBasis):
+                break
+            m = self.nbModes
 
             # Projection de la solution sur la base reduite
             self.RB_Coeffs[:, :m] = self.solveRomEqn(self.RB_Basis[:, :m])
@@ -202,13 +324,10 @@ class RBSolver_fromResidual:
             self.worstParamHistory.append(imuTilde)
             newBasis = self.updateBasis(Acurr, Bcurr)
 
-            # orthonormalization
-            othoNewBasis = newBasis - np.sum(np.dot(self.RB_Basis[:, j], newBasis)/np.dot(self.RB_Basis[:, j], self.RB_Basis[:, j]) *self.RB_Basis[:, j]  for j in range(m))
-            othoNewBasis /= np.linalg.norm(othoNewBasis)
-            # MAJ des bases reduites
-            self.RB_Basis[:, m] = othoNewBasis
-            m += 1
-            self.nbModes = m
+            # MAJ des bases reduites (QR incrementale)
+            if not self.appendBasis(newBasis):
+                break
+            m = self.nbModes
 
             # Projection de la solution sur la base reduite
             self.RB_Coeffs[:, :m] = self.solveRomEqn(self.RB_Basis[:, :m])
@@ -228,6 +347,44 @@ class RBSolver_fromResidual:
 
         return errorHistory
 
+    # Solve Greedy avec l'estimateur offline/online du residu
+    # le residu haute fidelite n'est assemble que pour le pire parametre
+    def solveGreedyWithEstimator(self, tol):
+        paramOp, paramRhs = self.evaluateParameterFunctions()
+        self.estimator = ResidualErrorEstimator(self.operatorModesSpace, self.rhsModesSpace, self.dtype)
+        rhsNorms = self.estimator.rhsNorms(paramRhs)
+        rhsNorms[rhsNorms == 0.] = 1.
+        errorHistory = []
+
+        # Avec une base vide le residu est le second membre
+        imuTilde = np.argmax(rhsNorms)
+
+        while self.nbModes < self.maxModes:
+            self.worstParamHistory.append(imuTilde)
+            Acurr = sum(self.operatorModesSpace[k] * paramOp[imuTilde, k] for k in range(len(self.operatorModesSpace)))
+            Bcurr = sum(self.rhsModesSpace[k] * paramRhs[imuTilde, k] for k in range(len(self.rhsModesSpace)))
+            newBasis = self.updateBasis(Acurr, Bcurr)
+
+            # MAJ des bases reduites (QR incrementale) et des matrices de Gram
+            if not self.appendBasis(newBasis):
+                break
+            m = self.nbModes
+            self.estimator.addMode(self.RB_Basis[:, m - 1])
+
+            # Projection de la solution sur la base reduite
+            self.RB_Coeffs[:, :m] = self.solveRomEqn(self.RB_Basis[:, :m])
+
+            # Estimation du residu relatif sur tout l'espace d'entrainement
+            errors = self.estimator.residualNorms(paramOp, paramRhs, self.RB_Coeffs[:, :m]) / rhsNorms
+            imuTilde = np.argmax(errors)
+            err = errors[imuTilde]
+            errorHistory.append(err)
+
+            print('Mode', m, 'Estimated error', err, 'Worst snapshot', imuTilde, '\n')
+            if err <= tol:
+                break
+
+        return errorHistory
 
     # mu is part of the training space: we just take its id
     def reconstructHiFiApproximatedSolution(self, imu):
@@ -1,4 +1,5 @@
 import numpy as np
+from numpy.lib.scimath import sqrt
 from scipy.sparse import csr_array, lil_array
 
 from .AdmBasis import AdmFluid as fluid_elem
@@ -15,6 +16,7 @@ class AdmAssembler:
     self.elem_mats = {}
     for key, elems in subdomains.items():
       self.elem_mats.update({elem: key for elem in elems})
+    self.nb_elems = len(self.mesh)
 
   def assemble_global_adm(self, theta, k_0, mode='continue'):
     """assemble admittance matrix
@@ -35,12 +37,55 @@ class AdmAssembler:
 
     return self.global_adm.tocsr()
 
+  def assemble_banded_adm(self, theta, k_0, mode='continue'):
+    """assemble the tridiagonal admittance matrix as bands, the frequency
+        can be a vector: all the frequencies are assembled at once
+        parameters:
+        theta: incidence angle (degree)
+        k_0: wave number in air (same shape as omega)
+        mode: 'continue' (exact transfer matrix) or 'discrete'
+        returns:
+        lower, diag, upper: ndarray (..., nb_dofs-1), (..., nb_dofs), (..., nb_dofs-1)
+        only fluid layers: the poroelastic admittance (AdmPoroElastic2) is
+        not scalar per node
+        """
+    if mode not in ['continue', 'discrete']:
+      raise ValueError("mode must be 'continue' or 'discrete'")
+    omega = np.asarray(self.omega, dtype=float)[..., np.newaxis]
+    ky = np.asarray(k_0)[..., np.newaxis] * np.sin(theta * np.pi / 180)
+    shape = omega.shape[:-1]
+    diag = np.zeros(shape + (self.nb_dofs,), dtype=self.dtype)
+    off_diag = np.zeros(shape + (self.nb_dofs - 1,), dtype=self.dtype)
+    elements = np.arange(self.nb_elems)
+    thickness = np.array([np.abs(self.mesh[i][0] - self.mesh[i][1])
+                          for i in elements])
+    materials = np.array([self.elem_mats[i] for i in elements])
+    if any(mat.TYPE not in ['Fluid'] for mat in set(materials)):
+      raise NotImplementedError(
+          "banded assembly is only implemented for fluid elements")
+    for mat in set(materials):
+      elems = elements[materials == mat]
+      d = thickness[elems]
+      mat.set_frequency(omega)
+      kx = sqrt((omega / mat.c_f)**2 - ky**2)
+      if mode == 'continue':
+        tm_11 = tm_22 = np.cos(kx * d)
+        tm_12 = -1 * omega * mat.Z_f * np.sin(kx * d)
+      elif mode == 'discrete':
+        tm_11 = tm_22 = np.ones_like(kx * d)
+        tm_12 = 1 - d * mat.rho_f * omega**2
+      # element admittance 1/tm_12*[[-tm_22, 1], [1, -tm_11]]
+      diag[..., elems] += -tm_22 / tm_12
+      diag[..., elems + 1] += -tm_11 / tm_12
+      off_diag[..., elems] += 1 / tm_12
+    return off_diag, diag, off_diag.copy()
+
   def assemble_nature_bc(self, nature_bc):
-    F = np.zeros(self.nb_dofs, dtype=self.dtype)
+    F = np.zeros(np.shape(self.omega) + (self.nb_dofs,), dtype=self.dtype)
     if nature_bc['type'] == 'fluid_velocity':
-      F[nature_bc['position']] = -1 * nature_bc['value'] / (1j * self.omega)
+      F[..., nature_bc['position']] = -1 * nature_bc['value'] / (1j * self.omega)
     elif nature_bc['type'] == 'total_displacement':
-      F[nature_bc['position']] = nature_bc['value']
+      F[..., nature_bc['position']] = nature_bc['value']
     else:
       print("Nature BC type not supported")
 
@@ -0,0 +1,238 @@
+import numpy as np
+import scipy.linalg as SA
+from numpy.lib.scimath import sqrt
+
+from ..Materials import Air
+from .BCMatrix import bcm_fluid_poro2, bcm_rigid_wall2
+
+
+def frequency_angle_grid(omegas, thetas):
+    """
+    broadcastable frequency/angle grid
+    omegas: angular frequencies (n_freq,)
+    thetas: incidence angles in degree (n_angle,)
+    returns: omega (n_freq, 1), k_0 (n_freq, 1), ky (n_freq, n_angle)"""
+    omega = np.atleast_1d(np.asarray(omegas, dtype=float))[:, np.newaxis]
+    theta = np.atleast_1d(np.asarray(thetas, dtype=float))[np.newaxis, :]
+    k_0 = omega/Air.c
+    ky = k_0*np.sin(theta*np.pi/180)
+    return omega, k_0, ky
+
+
+def stack_matrix(entries, size, shape):
+    """
+    build a (..., size, size) stack from a dict {(i, j): broadcastable array}"""
+    tm = np.zeros(shape+(size, size), dtype=np.complex128)
+    for (i, j), value in entries.items():
+        tm[..., i, j] = value
+    return tm
+
+
+class BatchTMMFluid:
+    """
+    stacked fluid transfer matrices over the frequency x angle grid,
+    the material is evaluated once for all the frequencies
+    state vector: [p, u] (pressure, normal displacement)"""
+    STATE_SIZE = 2
+
+    def __init__(self, mat, omegas, thetas) -> None:
+        self.mat = mat
+        self.omega, self.k_0, self.ky = frequency_angle_grid(omegas, thetas)
+        self.shape = self.ky.shape
+        self.mat.set_frequency(self.omega)
+        self.k = self.omega/self.mat.c_f
+        self.kx = sqrt(self.k**2-self.ky**2)
+
+    def transfer_matrix(self, thickness):
+        """
+        returns: (n_freq, n_angle, 2, 2) transfer matrices"""
+        cos = np.cos(self.kx*thickness)
+        sin = np.sin(self.kx*thickness)
+        Z = self.mat.rho_f*self.omega/self.kx    # oblique impedance
+        # velocity (p, v) form written for the displacement u = v/(j*omega)
+        entries = {(0, 0): cos,
+                   (0, 1): -self.omega*Z*sin,
+                   (1, 0): sin/(self.omega*Z),
+                   (1, 1): cos}
+        return stack_matrix(entries, self.STATE_SIZE, self.shape)
+
+
+class BatchTMMPoroElastic:
+    """
+    stacked Biot (up formulation) transfer matrices over the frequency x
+    angle grid, same state matrix as TMMPoroElastic3
+    state vector: [sigma_xz, u_z, w_z, sigma_hat_zz, p, u_x]"""
+    STATE_SIZE = 6
+
+    def __init__(self, mat, omegas, thetas) -> None:
+        self.mat = mat
+        self.omega, self.k_0, self.ky = frequency_angle_grid(omegas, thetas)
+        self.shape = self.ky.shape
+        self.mat.set_frequency(self.omega)
+
+    def alpha_matrix(self):
+        mat = self.mat
+        omega = self.omega
+        ky = self.ky
+        entries = {
+            (0, 3): 1j*ky*mat.A_hat/mat.P_hat,
+            (0, 4): 1j*mat.gamma_til*ky,
+            (0, 5): -(mat.A_hat**2-mat.P_hat**2)*ky**2/mat.P_hat-mat.rho_til*omega**2,
+            (1, 3): 1/mat.P_hat,
+            (1, 5): 1j*ky*mat.A_hat/mat.P_hat,
+            (2, 4): -1./mat.K_eq_til+ky**2/(mat.rho_eq_til*omega**2),
+            (2, 5): -1j*ky*mat.gamma_til,
+            (3, 0): 1j*ky,
+            (3, 1): -mat.rho_s_til*omega**2,
+            (3, 2): -mat.rho_eq_til*mat.gamma_til*omega**2,
+            (4, 1): mat.rho_eq_til*mat.gamma_til*omega**2,
+            (4, 2): mat.rho_eq_til*omega**2,
+            (5, 0): 1./mat.N,
+            (5, 1): 1j*ky}
+        return stack_matrix(entries, self.STATE_SIZE, self.shape)
+
+    def transfer_matrix(self, thickness):
+        """
+        returns: (n_freq, n_angle, 6, 6) transfer matrices"""
+        # scipy expm works on the stacked (..., 6, 6) array directly
+        return SA.expm(-thickness*self.alpha_matrix())
+
+
+class BatchTMM:
+    """
+    multilayer transfer matrix method on a full frequency x angle grid
+    layers: list of (material, thickness) from the incident side
+    omegas: angular frequencies (n_freq,)
+    thetas: incidence angles in degree (n_angle,)
+    backing: 'rigid' (rigid wall) or 'air' (semi-infinite air, transmission)
+    consecutive layers of the same kind are chained with batched matmul,
+    the interfaces are solved with one batched global system"""
+
+    def __init__(self, layers, omegas, thetas, backing='rigid') -> None:
+        if backing not in ['rigid', 'air']:
+            raise ValueError("backing must be 'rigid' or 'air'")
+        self.layers = layers
+        self.backing = backing
+        self.omegas = omegas
+        self.thetas = thetas
+        self.omega, self.k_0, self.ky = frequency_angle_grid(omegas, thetas)
+        self.shape = self.ky.shape
+        self.cos_theta = np.sqrt(1-(self.ky/self.k_0)**2)
+        self.blocks = self.chain_layers()
+        self.R = None
+        self.T = None
+
+    def chain_layers(self):
+        """
+        chain the consecutive layers of the same kind
+        returns: list of [kind, porosity, (n_freq, n_angle, n, n) matrix]"""
+        blocks = []
+        omegas, thetas = self.omegas, self.thetas
+        for mat, thickness in self.layers:
+            if mat.TYPE in ['Fluid']:
+                kind = 'fluid'
+                tm = BatchTMMFluid(mat, omegas, thetas).transfer_matrix(thickness)
+                phi = None
+            elif mat.TYPE in ['Poroelastic']:
+                kind = 'poroelastic'
+                tm = BatchTMMPoroElastic(mat, omegas, thetas).transfer_matrix(thickness)
+                phi = mat.phi
+            else:
+                raise NotImplementedError(f"{mat.TYPE} layer is not supported")
+            if blocks and blocks[-1][0] == kind:
+                if kind == 'poroelastic' and blocks[-1][1] != phi:
+                    raise ValueError("bonded poroelastic layers must have the same porosity")
+                blocks[-1][2] = blocks[-1][2]@tm
+            else:
+                blocks.append([kind, phi, tm])
+        return blocks
+
+    def interface_matrices(self, kind_1, kind_2, phi):
+        """
+        interface matrices I, J such that I@V_1 + J@V_2 = 0"""
+        if kind_1 == 'fluid' and kind_2 == 'fluid':
+            return np.identity(2), -np.identity(2)
+        elif kind_1 == 'fluid' and kind_2 == 'poroelastic':
+            return bcm_fluid_poro2(phi)
+        elif kind_1 == 'poroelastic' and kind_2 == 'fluid':
+            I_fp, J_pf = bcm_fluid_poro2(phi)
+            return J_pf, I_fp
+        raise NotImplementedError(f"{kind_1}-{kind_2} interface is not supported")
+
+    def solve(self):
+        """
+        solve the reflection (and transmission) coefficients on the grid
+        returns: R, T (n_freq, n_angle)"""
+        # unknowns: [R, state at the bottom of each block, transmitted air state]
+        kinds = ['fluid']+[block[0] for block in self.blocks]
+        sizes = [1]+[block[2].shape[-1] for block in self.blocks]
+        if self.backing == 'air':
+            kinds.append('fluid')
+            sizes.append(2)
+        offsets = np.cumsum([0]+sizes)
+        nb_unknowns = offsets[-1]
+        D = np.zeros(self.shape+(nb_unknowns, nb_unknowns), dtype=np.complex128)
+        rhs = np.zeros(self.shape+(nb_unknowns,), dtype=np.complex128)
+
+        # incident air state at the surface [p, u] = a + R*b
+        u_inc = self.cos_theta/(Air.Z*1j*self.omega)
+        a = np.stack(np.broadcast_arrays(np.ones(self.shape), u_inc), axis=-1)
+        b = np.stack(np.broadcast_arrays(np.ones(self.shape), -u_inc), axis=-1)
+
+        row = 0
+        for i, block in enumerate(self.blocks):
+            I, J = self.interface_matrices(kinds[i], kinds[i+1], block[1])
+            nb_rows = I.shape[0]
+            rows = slice(row, row+nb_rows)
+            if i == 0:
+                D[..., rows, 0] = b@I.T
+                rhs[..., rows] = -a@I.T
+            else:
+                D[..., rows, offsets[i]:offsets[i+1]] = I
+            D[..., rows, offsets[i+1]:offsets[i+2]] = J@block[2]
+            row += nb_rows
+
+        last = len(self.blocks)
+        if self.backing == 'rigid':
+            if self.blocks[-1][0] == 'fluid':
+                Y = np.array([[0., 1.]])
+            else:
+                Y = bcm_rigid_wall2()
+            D[..., row:, offsets[last]:offsets[last+1]] = Y
+        else:
+            I, J = self.interface_matrices(kinds[last], 'fluid', self.blocks[-1][1])
+            nb_rows = I.shape[0]
+            D[..., row:row+nb_rows, offsets[last]:offsets[last+1]] = I
+            D[..., row:row+nb_rows, offsets[last+1]:] = J
+            # anechoic termination p = Z/cos(theta)*v
+            D[..., -1, -2] = 1.
+            D[..., -1, -1] = -Air.Z*1j*self.omega/self.cos_theta
+
+        sol = np.linalg.solve(D, rhs[..., np.newaxis])[..., 0]
+        self.R = sol[..., 0]
+        if self.backing == 'air':
+            self.T = sol[..., -2]
+        else:
+            self.T = np.zeros_like(self.R)
+        return self.R, self.T
+
+    def surface_impedance(self):
+        """
+        normal surface impedance Zs (n_freq, n_angle)"""
+        if self.R is None:
+            self.solve()
+        return Air.Z*(1+self.R)/((1-self.R)*self.cos_theta)
+
+    def absorption(self):
+        """
+        absorption coefficient (n_freq, n_angle)"""
+        if self.R is None:
+            self.solve()
+        return 1-np.abs(self.R)**2-np.abs(self.T)**2
+
+    def transmission(self):
+        """
+        power transmission coefficient (n_freq, n_angle)"""
+        if self.R is None:
+            self.solve()
+        return np.abs(self.T)**2
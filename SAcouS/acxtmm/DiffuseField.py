@@ -0,0 +1,53 @@
+import numpy as np
+
+from ..acxfem.Quadratures import gauss_legendre_1d_interval
+from .BatchTmm import BatchTMM
+
+
+class DiffuseField:
+    """
+    diffuse field indicators of a multilayer from the batched TMM
+    layers: list of (material, thickness) from the incident side
+    omegas: angular frequencies (n_freq,)
+    theta_max: maximum incidence angle in degree (78 for field incidence)
+    nb_points: Gauss-Legendre points per angular sub-interval (<= 10)
+    nb_intervals: number of angular sub-intervals
+    chunk_size: number of frequencies solved together (bounds the memory)
+    the materials are evaluated once per frequency for all the angles and
+    the angular integral uses the Paris formula with sin(2*theta) weight"""
+
+    def __init__(self, layers, omegas, theta_max=78., nb_points=10, nb_intervals=2, chunk_size=2000) -> None:
+        self.layers = layers
+        self.omegas = np.atleast_1d(np.asarray(omegas, dtype=float))
+        self.theta_max = theta_max
+        self.chunk_size = chunk_size
+        self.thetas, weights = gauss_legendre_1d_interval(nb_points, 0., float(theta_max), nb_intervals)
+        # Paris weights: sin(2 theta) dtheta / int_0^theta_max sin(2 theta) dtheta
+        theta_rad = self.thetas*np.pi/180
+        self.weights = weights*np.pi/180*np.sin(2*theta_rad)/np.sin(theta_max*np.pi/180)**2
+
+    def integrate(self, backing, indicator):
+        """
+        integrate an indicator of BatchTMM over the incidence angles
+        returns: (n_freq,) diffuse field indicator"""
+        result = np.zeros(self.omegas.shape[0])
+        for start in range(0, self.omegas.shape[0], self.chunk_size):
+            chunk = slice(start, start+self.chunk_size)
+            tmm = BatchTMM(self.layers, self.omegas[chunk], self.thetas, backing)
+            result[chunk] = getattr(tmm, indicator)()@self.weights
+        return result
+
+    def absorption(self, backing='rigid'):
+        """
+        diffuse field absorption coefficient (n_freq,)"""
+        return self.integrate(backing, 'absorption')
+
+    def transmission(self):
+        """
+        diffuse field power transmission coefficient (n_freq,)"""
+        return self.integrate('air', 'transmission')
+
+    def transmission_loss(self):
+        """
+        diffuse field transmission loss in dB (n_freq,)"""
+        return -10*np.log10(self.transmission())
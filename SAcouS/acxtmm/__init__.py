@@ -2,3 +2,5 @@ from .AdmAssembler import AdmAssembler
 from .AdmBasis import AdmFluid, AdmPoroElastic2
 from .BCMatrix import bcm_fluid_poro2, bcm_poro_fluid, bcm_poro_rigid_wall, bcm_rigid_wall, bcm_rigid_wall2
 from .Tmm import TMMFluid, TMMPoroElastic1, TMMPoroElastic2, TMMPoroElastic3
+from .BatchTmm import BatchTMM, BatchTMMFluid, BatchTMMPoroElastic
+from .DiffuseField import DiffuseField
@@ -1,18 +1,8 @@
-from collections import defaultdict
-import numpy as np
-
 from SAcouS.interface.parser import ParserFactory
+from SAcouS.interface.sweep import FrequencySweep
 
-from SAcouS.Mesh import Mesh1D
 from SAcouS.PostProcess import PostProcessField, PostProcessFRF
 
-from SAcouS.acxfem import Lobbato1DElement
-from SAcouS.acxfem import FESpace
-from SAcouS.acxfem import HelmholtzAssembler
-from SAcouS.acxfem import ApplyBoundaryConditions
-from SAcouS.acxfem import LinearSolver
-from SAcouS.acxfem import check_material_compability
-
 
 class PyAcoustiXSetuper:
 
@@ -34,64 +24,8 @@ class PyAcoustiXSetuper:
   def exit(self):
     print('now exiting PyAcoustiX...')
 
-  def fem_run(self, mesh, mesh_order, omega):
-    if self.sol_info['topology']['dim'] == 1:
-      base_element = Lobbato1DElement
-    else:
-      raise ValueError('The dimension is not supported')
-
-    mesh_domains = self.sol_info['topology']['mesh_domain']
-
-    materials = self.sol_info['materials']
-    physic_domains = self.sol_info['physic_domain']
-    subdomains = {}
-    for _, phy_domain in physic_domains.items():
-      material = materials[phy_domain[2]]
-      domain_elements = mesh_domains[phy_domain[1]]['domain_elements']
-      subdomains[material] = domain_elements
-
-    mesh.set_subdomains(subdomains)
-    check_material_compability(subdomains)
-    elements2node = mesh.get_mesh_coordinates()
-
-    bases = []
-    for mat, elems in subdomains.items():
-      if mat.TYPE == 'fluid':
-        bases += [
-            base_element('Pf', mesh_order[i], elements2node[elem])
-            for i, elem in enumerate(elems)
-        ]
-
-    fe_space = FESpace(mesh, bases)
-    Helmholtz_assember = HelmholtzAssembler(fe_space,
-                                            subdomains,
-                                            dtype=np.complex128)
-    Helmholtz_assember.assembly_global_matrix(bases, 'Pf', omega)
-    left_hand_matrix = Helmholtz_assember.get_global_matrix()
-
-    right_hand_vec = np.zeros(Helmholtz_assember.nb_global_dofs,
-                              dtype=np.complex128)
-    BCs_applier = ApplyBoundaryConditions(mesh, fe_space, left_hand_matrix,
-                                          right_hand_vec, omega)
-
-    bcs = self.sol_info['boundary_conditions']
-    for bc in bcs:
-      if bc['type'] == 'fluid_velocity':
-        bc['value'] *= np.exp(-1j * omega)
-        BCs_applier.apply_nature_bc(bc, var='Pf')
-      elif bc['type'] == 'total_displacement':
-        BCs_applier.apply_nature_bc(bc, var='Pb')
-      elif bc['type'] == 'solid_stress':
-        BCs_applier.apply_nature_bc(bc, var='Ux')
-
-    linear_solver = LinearSolver(fe_space=fe_space)
-    linear_solver.solve(left_hand_matrix, right_hand_vec)
-    sol = linear_solver.u
-
-    return sol
-
   def post_process(self):
-    frf_processer = PostProcessFRF(self.sol_info['frequency'],
+    frf_processer = PostProcessFRF(self.sol_info['frequencies'],
                                    r'1D Helmholtz FRF', 'SPL(dB)')
     postprocess_info = self.sol_info['post_processing']
     for post_type, values in postprocess_info.items():
@@ -108,26 +42,19 @@ class PyAcoustiXSetuper:
       else:
         raise ValueError('The post processing block is not supported yet')
 
-  def setup(self):
-    nodes = self.sol_info['topology']['mesh_nodes']
-    connectivity = self.sol_info['topology']['mesh_elements']
-    mesh_order = self.sol_info['topology']['mesh_order']
-    freqs = self.sol_info['frequency']
-    self.solution_pool = defaultdict(dict)
-    if self.sol_info['topology']['dim'] == 1:
-      mesh = Mesh1D(nodes, connectivity)
-
-    for freq in freqs:
-      omega = 2 * np.pi * freq
-      lambda_f = self.sol_info['materials'][0].c_f / freq
-      h_max = lambda_f / 8
-      elem_min_size = mesh.get_min_size()
-      while elem_min_size > h_max:
-        mesh_order += 1    # p-refinement
-        elem_min_size /= mesh_order
-
-      sol = self.fem_run(mesh, mesh_order, omega)
-      self.solution_pool[freq] = sol
+  def setup(self, chunk_size=4, output_file=None, comm=None):
+    """solve the frequencies of the input file, sequentially on a single
+        rank, with the MPI frequency sweep otherwise (see FrequencySweep),
+        the solutions are gathered in self.solution_pool on rank 0; K and M
+        are assembled once at the mesh order of the input file for all the
+        frequencies (no per-frequency p-refinement)"""
+    sweep = FrequencySweep(self.sol_info, chunk_size, output_file, comm)
+    results = sweep.run()
+    self.solution_pool = {}
+    if results is not None:
+      for freq, sol in zip(sweep.frequencies, results):
+        self.solution_pool[freq] = sol
+    return self.solution_pool
 
 
 # wirte the test code for above parser class
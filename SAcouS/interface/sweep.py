@@ -0,0 +1,142 @@
+import time
+
+import numpy as np
+from scipy.sparse.linalg import spsolve
+try:
+  from mpi4py import MPI
+  MPI_on = True
+except ImportError:
+  MPI_on = False
+
+from SAcouS.acxmor import HelmholtzAffineDecomposition
+
+TAG_REQUEST = 1
+TAG_TASK = 2
+
+
+class FrequencySweep:
+  """frequency sweep of a parsed input file (AcoustiXPaser.parse) over the
+    MPI ranks with dynamic master/worker scheduling: rank 0 hands out
+    chunks of frequencies, the highest first since they take longer, to the
+    first worker asking for work. Every rank assembles K and M once (affine
+    decomposition in frequency), on a single rank the frequencies are
+    solved sequentially
+    parameters:
+    sol_info: dict
+        parsed input file
+    chunk_size: int
+        number of frequencies per task
+    output_file: str
+        .npy result file (n_freq, nb_dofs) written in place by the workers
+        (memory-mapped, shared file system), the results are sent to rank
+        0 if None
+    comm: MPI communicator, MPI.COMM_WORLD if None
+    """
+
+  def __init__(self, sol_info, chunk_size=4, output_file=None, comm=None):
+    self.frequencies = np.asarray(sol_info['frequencies'])
+    self.decomposition = HelmholtzAffineDecomposition.from_sol_info(sol_info)
+    self.nb_dofs = int(self.decomposition.fe_space.nb_dofs)
+    self.dtype = self.decomposition.dtype
+    self.chunk_size = chunk_size
+    self.output_file = output_file
+    if comm is None and MPI_on:
+      comm = MPI.COMM_WORLD
+    self.comm = comm
+    self.rank = 0 if comm is None else comm.Get_rank()
+    self.size = 1 if comm is None else comm.Get_size()
+    self.nb_solved = 0
+
+  def solve(self, freq):
+    omega = 2 * np.pi * freq
+    left_hand_matrix = self.decomposition.assemble_operator(omega)
+    right_hand_vec = self.decomposition.assemble_rhs(omega)
+    self.nb_solved += 1
+    return spsolve(left_hand_matrix.tocsc(), right_hand_vec)
+
+  def tasks(self):
+    # longest tasks first for a better balance
+    order = np.argsort(self.frequencies, kind='stable')[::-1]
+    return [
+        order[i:i + self.chunk_size]
+        for i in range(0, len(order), self.chunk_size)
+    ]
+
+  def result_array(self, mode):
+    shape = (len(self.frequencies), self.nb_dofs)
+    if self.output_file is None:
+      return np.zeros(shape, dtype=self.dtype)
+    return np.lib.format.open_memmap(self.output_file,
+                                     mode=mode,
+                                     dtype=self.dtype,
+                                     shape=shape if mode == 'w+' else None)
+
+  def run(self):
+    """solve all the frequencies
+        returns:
+        ndarray (n_freq, nb_dofs) on rank 0, None on the other ranks
+        """
+    if self.size == 1:
+      return self.run_sequential()
+    if self.rank == 0 and self.output_file is not None:
+      self.result_array('w+').flush()
+    self.comm.Barrier()
+    if self.rank == 0:
+      results = self.master()
+    else:
+      self.worker()
+      results = None
+    self.comm.Barrier()
+    if self.rank == 0 and self.output_file is not None:
+      results = self.result_array('r')
+    return results
+
+  def run_sequential(self):
+    results = self.result_array('w+')
+    for i, freq in enumerate(self.frequencies):
+      results[i] = self.solve(freq)
+    return results
+
+  def master(self):
+    results = None if self.output_file is not None else self.result_array(
+        None)
+    tasks = self.tasks()
+    next_task = 0
+    nb_workers = self.size - 1
+    status = MPI.Status()
+    while nb_workers > 0:
+      # poll instead of a blocking recv: an idle master must not take the
+      # core of a worker when the ranks are oversubscribed
+      while not self.comm.Iprobe(source=MPI.ANY_SOURCE, tag=TAG_REQUEST):
+        time.sleep(1e-3)
+      message = self.comm.recv(source=MPI.ANY_SOURCE,
+                               tag=TAG_REQUEST,
+                               status=status)
+      worker = status.Get_source()
+      if message is not None:
+        indices, values = message
+        results[indices] = values
+      if next_task < len(tasks):
+        self.comm.send(tasks[next_task], dest=worker, tag=TAG_TASK)
+        next_task += 1
+      else:
+        self.comm.send(None, dest=worker, tag=TAG_TASK)
+        nb_workers -= 1
+    return results
+
+  def worker(self):
+    output = None if self.output_file is None else self.result_array('r+')
+    message = None
+    while True:
+      # the request for work carries the results of the previous task
+      self.comm.send(message, dest=0, tag=TAG_REQUEST)
+      task = self.comm.recv(source=0, tag=TAG_TASK)
+      if task is None:
+        break
+      values = np.array([self.solve(freq) for freq in self.frequencies[task]])
+      if output is None:
+        message = (task, values)
+      else:
+        output[task] = values
+        output.flush()
+        message = None
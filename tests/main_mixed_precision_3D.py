@@ -0,0 +1,101 @@
+# This file is part of PyXfem, a software distributed under the MIT license.
+# For any question, please contact the authors cited below.
+#
+# Copyright (c) 2023
+# 	Shaoqi WU <shaoqiwu@outlook.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+
+# Benchmark of the mixed precision direct solve on the 3D tube meshes:
+# factor memory, solving time and accuracy against the double precision LU
+import os
+
+current_dir = os.path.dirname(os.path.realpath(__file__))
+working_dir = os.path.join(current_dir, "..")
+import sys
+
+sys.path.append(working_dir)
+
+import time
+import numpy as np
+from scipy.sparse import csc_matrix
+
+from SAcouS.Mesh import MeshReader
+from SAcouS.Materials import Air
+from SAcouS.acxfem import Helmholtz3DElement
+from SAcouS.acxfem import FESpace
+from SAcouS.acxfem import HelmholtzAssembler
+from SAcouS.acxfem import ApplyBoundaryConditions
+from SAcouS.acxfem.Solver import symmetric_factorization, mixed_precision_solve
+
+
+def factor_nbytes(lu):
+  return lu.L.data.nbytes + lu.U.data.nbytes
+
+
+def benchmark(mesh_name, freqs):
+  air = Air('classical air')
+  mesh_reader = MeshReader(current_dir + "/mesh/" + mesh_name, dim=3)
+  mesh = mesh_reader.get_mesh()
+  mesh.set_subdomains({air: np.arange(mesh.nb_elems)})
+  elements2node = mesh.get_mesh_coordinates()
+  bases = [
+      Helmholtz3DElement('Pf', 1, elements2node[elem],
+                         (1 / air.rho_f, 1 / air.K_f))
+      for elem in range(mesh.nb_elems)
+  ]
+  fe_space = FESpace(mesh, bases)
+  assembler = HelmholtzAssembler(fe_space, dtype=float)
+  assembler.assembly_global_matrix(bases, 'Pf')
+  inlet = mesh_reader.get_facet_by_physical('inlet')
+
+  print(mesh_name, ", nb dofs: ", fe_space.nb_dofs)
+  for freq in freqs:
+    omega = 2 * np.pi * freq
+    left_hand_matrix = assembler.get_global_matrix(omega)
+    right_hand_vec = np.zeros(fe_space.nb_dofs, dtype=np.complex128)
+    BCs_applier = ApplyBoundaryConditions(mesh, fe_space, left_hand_matrix,
+                                          right_hand_vec, omega)
+    BCs_applier.apply_nature_bc(
+        {
+            'type': 'fluid_velocity',
+            'value': lambda x, y, z: np.array([np.exp(-1j * omega), 0, 0]),
+            'position': inlet
+        }, 'Pf', 13)
+    left_hand_matrix = csc_matrix(left_hand_matrix, dtype=np.complex128)
+
+    start = time.time()
+    lu = symmetric_factorization(left_hand_matrix)
+    reference = lu.solve(right_hand_vec)
+    time_full = time.time() - start
+    memory_full = factor_nbytes(lu)
+
+    start = time.time()
+    u, method = mixed_precision_solve(left_hand_matrix,
+                                      right_hand_vec,
+                                      symmetric=True)
+    time_mixed = time.time() - start
+    memory_mixed = factor_nbytes(
+        symmetric_factorization(left_hand_matrix.astype(np.complex64)))
+
+    error = np.linalg.norm(u - reference) / np.linalg.norm(reference)
+    residual = np.linalg.norm(left_hand_matrix @ u -
+                              right_hand_vec) / np.linalg.norm(right_hand_vec)
+    print(f"  {freq:6.0f} Hz | factor (MB) {memory_full / 1e6:8.2f} -> "
+          f"{memory_mixed / 1e6:8.2f} | time (s) {time_full:6.3f} -> "
+          f"{time_mixed:6.3f} | {method} | error {error:.1e} | "
+          f"residual {residual:.1e}")
+
+
+if __name__ == "__main__":
+  for mesh_name in ['unit_tube_3D_refine.msh', 'unit_tube_3D_ufine.msh']:
+    benchmark(mesh_name, [200., 1000., 3000.])
@@ -0,0 +1,103 @@
+# This file is part of PyXfem, a software distributed under the MIT license.
+# For any question, please contact the authors cited below.
+#
+# Copyright (c) 2023
+# 	Shaoqi WU <shaoqiwu@outlook.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# Main Test case
+import os
+
+current_dir = os.path.dirname(os.path.realpath(__file__))
+working_dir = os.path.join(current_dir, "..")
+import sys
+
+sys.path.append(working_dir)
+
+import numpy as np
+
+from SAcouS.interface.parser import ParserFactory
+from SAcouS.acxfem import Helmholtz1DElement
+from SAcouS.acxfem import FESpace
+from SAcouS.acxfem import HelmholtzAssembler
+from SAcouS.acxfem import ApplyBoundaryConditions
+from SAcouS.acxmor import HelmholtzAffineDecomposition
+
+
+def FEM_model(omega, decomposition, nature_bc):
+  # direct assembly with the material coefficients at omega
+  mesh = decomposition.mesh
+  elements2node = mesh.get_mesh_coordinates()
+  elem_mat = decomposition.fe_space.element_index2material
+  bases = []
+  for i, basis in enumerate(decomposition.bases):
+    mat = elem_mat[i]
+    mat.set_frequency(omega)
+    bases.append(
+        Helmholtz1DElement('Pf', basis.order, elements2node[i],
+                           (1 / mat.rho_f, 1 / mat.K_f)))
+  fe_space = FESpace(mesh, bases)
+  assembler = HelmholtzAssembler(fe_space, dtype=np.complex128)
+  assembler.assembly_global_matrix(bases, 'Pf')
+  left_hand_matrix = assembler.get_global_matrix(omega)
+  right_hand_vec = np.zeros(assembler.nb_global_dofs, dtype=np.complex128)
+  BCs_applier = ApplyBoundaryConditions(mesh, fe_space, left_hand_matrix,
+                                        right_hand_vec, omega)
+  BCs_applier.apply_nature_bc(nature_bc, var='Pf')
+  return left_hand_matrix, right_hand_vec
+
+
+def test_case():
+  file_path = os.path.join(working_dir, 'SAcouS', 'interface', 'two_fluid.axi')
+  parser = ParserFactory.create_parser(file_path)
+  sol_info = parser.parse()
+  decomposition = HelmholtzAffineDecomposition.from_sol_info(sol_info)
+  nature_bc = {'type': 'fluid_velocity', 'value': -1.0, 'position': -1.0}
+
+  # ================= exact decomposition against direct assembly =================
+  error_affine = 0.
+  for omega in 2 * np.pi * np.array([10., 333., 1000.]):
+    A, f = FEM_model(omega, decomposition, nature_bc)
+    A_affine = decomposition.assemble_operator(omega)
+    f_affine = decomposition.assemble_rhs(omega)
+    error_affine = max(error_affine,
+                       abs(A_affine - A).max() / abs(A).max(),
+                       np.abs(f_affine - f).max() / np.abs(f).max())
+  print("affine decomposition error:", error_affine)
+
+  # ================= EIM compression of the coefficients =================
+  omegas = decomposition.training_parameters
+  compressed = decomposition.compress_operator(omegas, tolerance=1e-12)
+  omega_test = 2 * np.pi * 517.
+  A = decomposition.assemble_operator(omega_test)
+  A_eim = compressed.assemble_operator(omega_test)
+  error_eim = abs(A_eim - A).max() / abs(A).max()
+  print("EIM terms:", compressed.nb_operator_terms, "error:", error_eim)
+
+  # ================= reduced basis from the decomposition =================
+  rb_solver = compressed.rb_solver(20, omegas[::4])
+  rb_solver.solveGreedy(1e-8)
+  sol_rb = rb_solver.reconstructHiFiApproximatedSolutionArbitrary(omega_test)
+  sol = np.linalg.solve(A.toarray(), decomposition.assemble_rhs(omega_test))
+  error_rb = np.linalg.norm(sol_rb - sol) / np.linalg.norm(sol)
+  print("reduced basis modes:", rb_solver.nbModes, "error:", error_rb)
+
+  if error_affine < 1e-12 and error_eim < 1e-8 and error_rb < 1e-6:
+    print("Test passed!")
+    return True
+  else:
+    print("Test failed!")
+    return False
+
+
+if __name__ == "__main__":
+  result = test_case()
@@ -0,0 +1,205 @@
+# This file is part of PyXfem, a software distributed under the MIT license.
+# For any question, please contact the authors cited below.
+#
+# Copyright (c) 2023
+# 	Shaoqi WU <shaoqiwu@outlook.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+
+# Main Test case
+import os
+
+current_dir = os.path.dirname(os.path.realpath(__file__))
+working_dir = os.path.join(current_dir, "..")
+import sys
+
+sys.path.append(working_dir)
+
+import numpy as np
+from scipy.sparse.linalg import spsolve
+
+from SAcouS.Mesh import Mesh1D
+from SAcouS.Materials import Air, Fluid, EquivalentFluid, PoroElasticMaterial
+from SAcouS.acxfem import Helmholtz1DElement, FESpace, HelmholtzAssembler
+from SAcouS.acxfem import BiotAssembler
+from SAcouS.acxmor import Component, ComponentModeSynthesis
+
+
+def helmholtz_model(nodes, subdomains, order, geometric=False):
+  """geometric: unit material coefficients"""
+  num_elem = len(nodes) - 1
+  connectivity = np.vstack((np.arange(num_elem), np.arange(1, num_elem + 1))).T
+  mesh = Mesh1D(nodes, connectivity)
+  mesh.set_subdomains(subdomains)
+  elements2node = mesh.get_mesh_coordinates()
+  bases = [None] * num_elem
+  for mat, elems in subdomains.items():
+    for elem in elems:
+      coeffs = (1., 1.) if geometric else (1 / mat.rho_f, 1 / mat.K_f)
+      bases[elem] = Helmholtz1DElement('Pf', order, elements2node[elem],
+                                       coeffs)
+  fe_space = FESpace(mesh, bases)
+  assembler = HelmholtzAssembler(fe_space, dtype=np.complex128)
+  assembler.assembly_global_matrix(bases, 'Pf')
+  return fe_space, assembler, bases
+
+
+def biot_model(nodes, mat, order, geometric=False):
+  """u-p Biot model of one poroelastic layer, vertex dofs: pressure at the
+  nodes, then displacement at the nodes"""
+  num_elem = len(nodes) - 1
+  connectivity = np.vstack((np.arange(num_elem), np.arange(1, num_elem + 1))).T
+  mesh = Mesh1D(nodes, connectivity)
+  subdomains = {mat: np.arange(num_elem)}
+  mesh.set_subdomains(subdomains)
+  elements2node = mesh.get_mesh_coordinates()
+  if geometric:
+    coeffs_p, coeffs_u = (1., 1., 1.), (1., 1., 1.)
+  else:
+    coeffs_p = (1 / mat.rho_f, 1 / mat.K_f, mat.gamma_til)
+    coeffs_u = (mat.P_hat, mat.rho_til, mat.gamma_til)
+  Pb_bases = [
+      Helmholtz1DElement('Pb', order, elements2node[elem], coeffs_p)
+      for elem in range(num_elem)
+  ]
+  Ux_bases = [
+      Helmholtz1DElement('Ux', order, elements2node[elem], coeffs_u)
+      for elem in range(num_elem)
+  ]
+  fe_space = FESpace(mesh, Pb_bases, Ux_bases)
+  assembler = BiotAssembler(fe_space, dtype=np.complex128)
+  assembler.assembly_global_matrix([Pb_bases, Ux_bases], ['Pb', 'Ux'])
+  return fe_space, assembler, [Pb_bases, Ux_bases], subdomains
+
+
+def biot_case():
+  """two reduced poroelastic layers against the full Biot solve"""
+  xfm = PoroElasticMaterial('xfm', 0.99, 1.0567e4, 1.2, 490e-6, 240e-6, 9.2,
+                            3.155e5, 0.285, 0.032)
+  num_elem, order = 50, 2
+  nodes_1 = np.linspace(-0.1, 0, num_elem + 1)
+  nodes_2 = np.linspace(0, 0.1, num_elem + 1)
+  nb_nodes = num_elem + 1
+  components = []
+  # interface: pressure and displacement at x=0, the loaded pressure dof
+  for nodes, interface_dofs, interface_ids in [
+      (nodes_1, [num_elem, 2 * num_elem + 1, 0], [0, 1, 2]),
+      (nodes_2, [0, nb_nodes], [0, 1])
+  ]:
+    _, assembler, bases, subdomains = biot_model(nodes, xfm, order, True)
+    components.append(
+        Component.from_biot(assembler, bases, ['Pb', 'Ux'], subdomains,
+                            interface_dofs, interface_ids, 80,
+                            2 * np.pi * 1000.))
+  cms = ComponentModeSynthesis(components)
+
+  nodes = np.concatenate((nodes_1, nodes_2[1:]))
+  error = 0.
+  for freq in [200., 1000., 3000.]:
+    omega = 2 * np.pi * freq
+    xfm.set_frequency(omega)
+    fe_space, assembler, _, _ = biot_model(nodes, xfm, order)
+    f = np.zeros(fe_space.nb_dofs, dtype=np.complex128)
+    f[0] = 1.
+    sol_ref = spsolve(assembler.get_global_matrix(omega).tocsc(), f)
+    f_1 = np.zeros(components[0].nb_dofs, dtype=np.complex128)
+    f_1[0] = 1.
+    sol_1, sol_2 = cms.solve(omega, [f_1, None])
+    # vertex pressure and displacement
+    nb_full = 2 * num_elem + 1
+    for shift, shift_ref in [(0, 0), (nb_nodes, nb_full)]:
+      sol = np.concatenate((sol_1[shift:shift + nb_nodes],
+                            sol_2[shift + 1:shift + nb_nodes]))
+      ref = sol_ref[shift_ref:shift_ref + nb_full]
+      error = max(error, np.linalg.norm(sol - ref) / np.linalg.norm(ref))
+  print("Biot reduced dofs: ", cms.assemble(omega).shape[0], "error: ", error)
+  return error
+
+
+def test_case():
+  air = Air('classical air')
+  fluid_1 = Fluid('heavy fluid', 2.5, 250.)
+  foam = EquivalentFluid('foam', 0.98, 3.75e3, 1.17, 742e-6, 110e-6)
+  num_elem, order = 100, 2
+  nodes_1 = np.linspace(-1, 0, num_elem + 1)
+  nodes_2 = np.linspace(0, 1, num_elem + 1)
+  v = 1.
+
+  def reference(mat_2, omega):
+    nodes = np.concatenate((nodes_1, nodes_2[1:]))
+    subdomains = {
+        air: np.arange(num_elem),
+        mat_2: np.arange(num_elem, 2 * num_elem)
+    }
+    for mat in subdomains:
+      mat.set_frequency(omega)
+    fe_space, assembler, _ = helmholtz_model(nodes, subdomains, order)
+    f = np.zeros(fe_space.nb_dofs, dtype=np.complex128)
+    f[fe_space.get_dofs_from_var_coord(-1., 'Pf')] = -v / (1j * omega)
+    sol = spsolve(assembler.get_global_matrix(omega).tocsc(), f)
+    return sol[:2 * num_elem + 1]
+
+  def layer(nodes, mat, interface_dofs, interface_ids, nb_modes):
+    subdomains = {mat: np.arange(num_elem)}
+    _, assembler, bases = helmholtz_model(nodes, subdomains, order, True)
+    return Component.from_helmholtz(assembler, bases, subdomains,
+                                    interface_dofs, interface_ids, nb_modes,
+                                    2 * np.pi * 300.)
+
+  # ============ two layers sharing one interface node ============
+  # the loaded dof is kept as a boundary dof of its own (global number 1)
+  source_dof = 0
+  air_layer = layer(nodes_1, air, [num_elem, source_dof], [0, 1], 60)
+  fluid_layer = layer(nodes_2, fluid_1, 0, 0, 60)
+  cms = ComponentModeSynthesis([air_layer, fluid_layer])
+
+  error = 0.
+  for freq in [100., 300., 500.]:
+    omega = 2 * np.pi * freq
+    f_1 = np.zeros(air_layer.nb_dofs, dtype=np.complex128)
+    f_1[source_dof] = -v / (1j * omega)
+    sol_1, sol_2 = cms.solve(omega, [f_1, None])
+    sol = np.concatenate((sol_1[:num_elem + 1], sol_2[1:num_elem + 1]))
+    sol_ref = reference(fluid_1, omega)
+    error = max(error, np.linalg.norm(sol - sol_ref) / np.linalg.norm(sol_ref))
+  print("reduced dofs: ", cms.assemble(omega).shape[0], "full dofs: ",
+        air_layer.nb_dofs + fluid_layer.nb_dofs - 1, "error: ", error)
+
+  # ============ new (dispersive) material of the second layer ============
+  # reduced once, valid at every frequency
+  new_layer = layer(nodes_2, foam, 0, 0, 60)
+  cms.set_component(1, new_layer)
+  error_update = 0.
+  for freq in [100., 300., 500.]:
+    omega = 2 * np.pi * freq
+    f_1 = np.zeros(air_layer.nb_dofs, dtype=np.complex128)
+    f_1[source_dof] = -v / (1j * omega)
+    sol_1, sol_2 = cms.solve(omega, [f_1, None])
+    sol = np.concatenate((sol_1[:num_elem + 1], sol_2[1:num_elem + 1]))
+    sol_ref = reference(foam, omega)
+    error_update = max(error_update,
+                       np.linalg.norm(sol - sol_ref) / np.linalg.norm(sol_ref))
+  print("reductions: ", cms.nb_reductions, "error: ", error_update)
+
+  error_biot = biot_case()
+
+  if (error < 1e-3 and error_update < 1e-3 and cms.nb_reductions == 3 and
+      error_biot < 1e-2):
+    print("Test passed!")
+    return True
+  else:
+    print("Test failed!")
+    return False
+
+
+if __name__ == "__main__":
+  result = test_case()
@@ -0,0 +1,81 @@
+# This file is part of PyXfem, a software distributed under the MIT license.
+# For any question, please contact the authors cited below.
+#
+# Copyright (c) 2023
+# 	Shaoqi WU <shaoqiwu@outlook.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# Main Test case
+import os
+
+current_dir = os.path.dirname(os.path.realpath(__file__))
+working_dir = os.path.join(current_dir, "..")
+import sys
+
+sys.path.append(working_dir)
+
+import time
+import numpy as np
+from scipy.integrate import trapezoid
+
+from SAcouS.Materials import Air, EquivalentFluid, PoroElasticMaterial
+from SAcouS.acxtmm import BatchTMM, DiffuseField
+
+air = Air('classical air')
+foam = PoroElasticMaterial('foam', 0.99, 10900, 1.02, 130e-6, 100e-6, 8.8,
+                           1.4e5, 0.0, 0.1)
+xfm = EquivalentFluid('xfm', 0.98, 3.75e3, 1.17, 742e-6, 110e-6)
+
+
+def brute_force(layers, omegas, theta_max, backing, indicator):
+  # fine trapezoidal rule in angle
+  thetas = np.linspace(0, theta_max, 4001)
+  values = getattr(BatchTMM(layers, omegas, thetas, backing), indicator)()
+  theta_rad = thetas * np.pi / 180
+  integrand = values * np.sin(2 * theta_rad)
+  return trapezoid(integrand, theta_rad, axis=1) / np.sin(
+      theta_max * np.pi / 180)**2
+
+
+def test_case():
+  omegas = 2 * np.pi * np.linspace(100, 4000, 20)
+
+  layers = [(foam, 0.05)]
+  diffuse = DiffuseField(layers, omegas, theta_max=78.)
+  alpha_d = diffuse.absorption()
+  alpha_ref = brute_force(layers, omegas, 78., 'rigid', 'absorption')
+  error_absorption = np.abs(alpha_d - alpha_ref).max()
+
+  layers = [(xfm, 0.05), (air, 0.01)]
+  diffuse = DiffuseField(layers, omegas, theta_max=78., chunk_size=7)
+  tl = diffuse.transmission_loss()
+  tl_ref = -10 * np.log10(
+      brute_force(layers, omegas, 78., 'air', 'transmission'))
+  error_tl = np.abs(tl - tl_ref).max()
+
+  # thousands of frequencies in one pass
+  start = time.time()
+  DiffuseField([(foam, 0.05)], 2 * np.pi * np.linspace(50, 6000,
+                                                       5000)).absorption()
+  print("5000 frequencies diffuse absorption time:", time.time() - start)
+
+  print("error:", error_absorption, error_tl)
+  if error_absorption < 1e-5 and error_tl < 1e-4:
+    print("Test passed!")
+    return True
+  else:
+    print("Test failed!")
+    return False
+
+
+if __name__ == "__main__":
+  result = test_case()
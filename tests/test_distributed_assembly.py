@@ -0,0 +1,100 @@
+# This file is part of PyXfem, a software distributed under the MIT license.
+# For any question, please contact the authors cited below.
+#
+# Copyright (c) 2023
+# 	Shaoqi WU <shaoqiwu@outlook.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+
+# Main Test case, also run in parallel with
+#   mpirun -n 4 python tests/test_distributed_assembly.py
+import os
+
+current_dir = os.path.dirname(os.path.realpath(__file__))
+working_dir = os.path.join(current_dir, "..")
+import sys
+
+sys.path.append(working_dir)
+
+import numpy as np
+from mpi4py import MPI
+from scipy.sparse.linalg import spsolve
+
+from SAcouS.Mesh import MeshReader
+from SAcouS.Materials import Air
+from SAcouS.acxfem import Helmholtz2DElement, FESpace, HelmholtzAssembler
+from SAcouS.acxfem.Parallel import partition_elements
+from SAcouS.acxfem.Parallel import DistributedAssembler, DistributedSolver
+
+
+def test_case():
+  comm = MPI.COMM_WORLD
+  air = Air('classical air')
+  omega = 2 * np.pi * 300. * (1 + 0.01j)
+  mesh_reader = MeshReader(current_dir + "/mesh/square_air_imp.msh")
+  mesh = mesh_reader.get_mesh()
+  elements2node = mesh.get_mesh_coordinates()
+  air_elements = mesh_reader.get_elem_by_physical('air')
+  mesh.set_subdomains({air: air_elements})
+  bases = [
+      Helmholtz2DElement('Pf', 1, elements2node[elem],
+                         (1 / air.rho_f, 1 / air.K_f)) for elem in air_elements
+  ]
+  fe_space = FESpace(mesh, bases)
+  right_hand_vec = np.zeros(fe_space.nb_dofs, dtype=np.complex128)
+  right_hand_vec[0] = 1.
+
+  # balanced partitions
+  centroids = [np.mean(elements2node[i], axis=0) for i in range(len(bases))]
+  counts = np.bincount(partition_elements(centroids, 4))
+  balanced = counts.max() - counts.min() <= 1
+
+  assembler = DistributedAssembler(mesh, fe_space, bases, 'Pf', comm=comm)
+  solver = DistributedSolver(assembler)
+  sol = solver.solve(omega, right_hand_vec)
+  K_owned, M_owned = assembler.K, assembler.M
+  # frequency loop: the PETSc matrix (if any) is updated in place
+  A_petsc = assembler.A_petsc
+  sol_2 = solver.solve(2 * omega, right_hand_vec)
+  reused = assembler.A_petsc is A_petsc
+
+  # serial reference
+  reference = HelmholtzAssembler(fe_space, dtype=np.complex128)
+  reference.assembly_global_matrix(bases, 'Pf')
+  sol_ref = spsolve(reference.get_global_matrix(omega).tocsc(), right_hand_vec)
+  owned_rows = assembler.permutation[assembler.start:assembler.end]
+  K_ref = reference.K[owned_rows][:, assembler.permutation]
+  error_matrix = comm.allreduce(abs(K_owned - K_ref).max() / abs(K_ref).max(),
+                                op=MPI.MAX)
+  error = np.linalg.norm(sol - sol_ref) / np.linalg.norm(sol_ref)
+  sol_ref = spsolve(reference.get_global_matrix(2 * omega).tocsc(),
+                    right_hand_vec)
+  error = max(error, np.linalg.norm(sol_2 - sol_ref) / np.linalg.norm(sol_ref))
+  nb_owned = comm.allreduce(assembler.nb_owned_dofs)
+  nb_ghosts = comm.allreduce(len(assembler.ghost_dofs))
+  if comm.Get_rank() == 0:
+    print("ranks: ", comm.Get_size(), "ghost dofs: ", nb_ghosts,
+          "matrix error: ", error_matrix, "solution error: ", error)
+
+  if balanced and error_matrix < 1e-14 and error < 1e-10 and \
+      nb_owned == fe_space.nb_dofs and reused:
+    if comm.Get_rank() == 0:
+      print("Test passed!")
+    return True
+  else:
+    if comm.Get_rank() == 0:
+      print("Test failed!")
+    return False
+
+
+if __name__ == "__main__":
+  result = test_case()
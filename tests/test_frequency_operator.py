@@ -0,0 +1,117 @@
+# This file is part of PyXfem, a software distributed under the MIT license.
+# For any question, please contact the authors cited below.
+#
+# Copyright (c) 2023
+# 	Shaoqi WU <shaoqiwu@outlook.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+
+# Main Test case
+import os
+
+current_dir = os.path.dirname(os.path.realpath(__file__))
+working_dir = os.path.join(current_dir, "..")
+import sys
+
+sys.path.append(working_dir)
+
+import numpy as np
+
+from SAcouS.Mesh import MeshReader
+from SAcouS.Materials import Air, EquivalentFluid
+from SAcouS.acxfem import Helmholtz2DElement
+from SAcouS.acxfem import FESpace
+from SAcouS.acxfem import HelmholtzAssembler
+from SAcouS.acxfem import ApplyBoundaryConditions
+from SAcouS.acxfem.BCsImpose import impedance_mass_matrix
+
+
+def matrix_nbytes(matrix):
+  return matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes
+
+
+def test_case():
+  air = Air('classical air')
+  xfm = EquivalentFluid('foam', 0.98, 3.75e3, 1.17, 742e-6, 110e-6)
+  mesh_reader = MeshReader(current_dir + "/mesh/half_tube_2.msh")
+  mesh = mesh_reader.get_mesh()
+  subdomains = {
+      air: mesh_reader.get_elem_by_physical('air'),
+      xfm: mesh_reader.get_elem_by_physical('foam')
+  }
+  mesh.set_subdomains(subdomains)
+  boundary = mesh_reader.get_facet_by_physical('int')
+  elements2node = mesh.get_mesh_coordinates()
+  impedance = air.rho_f * air.c_f * (1 + 0.5j)
+
+  # real storage: geometric bases, materials and impedance in coefficients
+  geometric_bases = [
+      Helmholtz2DElement('Pf', 1, elements2node[elem], (1., 1.))
+      for elem in range(mesh.get_nb_elems())
+  ]
+  fe_space = FESpace(mesh, geometric_bases)
+  assembler = HelmholtzAssembler(fe_space, dtype=np.float64)
+  operator = assembler.frequency_operator(geometric_bases, subdomains, 'Pf')
+  operator.add_term(
+      impedance_mass_matrix(mesh, boundary, fe_space.nb_dofs),
+      lambda omega: 1j / (omega * impedance))
+
+  error = 0.
+  reference_nbytes = 0
+  previous = None
+  for freq in [200., 1000.]:
+    omega = 2 * np.pi * freq
+    left_hand_matrix = operator.assemble(omega)
+
+    # complex storage of the material matrices
+    xfm.set_frequency(omega)
+    bases = []
+    for mat, elems in subdomains.items():
+      bases += [
+          Helmholtz2DElement('Pf', 1, elements2node[elem],
+                             (1 / mat.rho_f, 1 / mat.K_f)) for elem in elems
+      ]
+    assembler_ref = HelmholtzAssembler(FESpace(mesh, bases),
+                                       dtype=np.complex128)
+    assembler_ref.assembly_global_matrix(bases, 'Pf')
+    left_hand_ref = assembler_ref.get_global_matrix(omega)
+    right_hand_vec = np.zeros(fe_space.nb_dofs, dtype=np.complex128)
+    BCs_applier = ApplyBoundaryConditions(mesh, fe_space, left_hand_ref,
+                                          right_hand_vec, omega)
+    left_hand_ref = BCs_applier.apply_impedance_bc(
+        {
+            'type': 'impedance',
+            'value': lambda x, y: impedance,
+            'position': boundary
+        }, 'Pf')
+    error = max(error,
+                abs(left_hand_matrix - left_hand_ref).max() /
+                abs(left_hand_ref).max())
+    reference_nbytes = matrix_nbytes(assembler_ref.K) + matrix_nbytes(
+        assembler_ref.M)
+    # one buffer for all the frequencies
+    reused = previous is None or np.shares_memory(previous.data,
+                                                  left_hand_matrix.data)
+    previous = left_hand_matrix
+
+  print("error: ", error)
+  print("memory (MB): ", reference_nbytes / 1e6, "->", operator.nbytes / 1e6)
+  if error < 1e-12 and reused and operator.nbytes < reference_nbytes:
+    print("Test passed!")
+    return True
+  else:
+    print("Test failed!")
+    return False
+
+
+if __name__ == "__main__":
+  result = test_case()
@@ -0,0 +1,83 @@
+# This file is part of PyXfem, a software distributed under the MIT license.
+# For any question, please contact the authors cited below.
+#
+# Copyright (c) 2023
+# 	Shaoqi WU <shaoqiwu@outlook.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+
+# Main Test case, also run in parallel with
+#   mpirun -n 3 python tests/test_frequency_sweep.py
+import os
+
+current_dir = os.path.dirname(os.path.realpath(__file__))
+working_dir = os.path.join(current_dir, "..")
+import sys
+
+sys.path.append(working_dir)
+
+import shutil
+import tempfile
+import numpy as np
+from mpi4py import MPI
+
+from SAcouS.interface.sol_setup import PyAcoustiXSetuper
+from SAcouS.interface.sweep import FrequencySweep
+
+
+def test_case():
+  comm = MPI.COMM_WORLD
+  file_path = os.path.join(working_dir, 'SAcouS', 'interface', 'two_fluid.axi')
+  setuper = PyAcoustiXSetuper()
+  setuper.parse_input(file_path)
+
+  # results sent to rank 0
+  solution_pool = setuper.setup(chunk_size=7, comm=comm)
+  # results written by the workers in a shared file
+  directory = comm.bcast(tempfile.mkdtemp() if comm.Get_rank() == 0 else None)
+  sweep = FrequencySweep(setuper.sol_info,
+                         chunk_size=5,
+                         output_file=os.path.join(directory, 'sweep.npy'),
+                         comm=comm)
+  results = sweep.run()
+  nb_solved = comm.allreduce(sweep.nb_solved)
+
+  passed = False
+  if comm.Get_rank() == 0:
+    reference = FrequencySweep(setuper.sol_info, comm=MPI.COMM_SELF)
+    error = 0.
+    for i, freq in enumerate(reference.frequencies):
+      sol_ref = reference.solve(freq)
+      scale = np.linalg.norm(sol_ref)
+      error = max(error,
+                  np.linalg.norm(solution_pool[freq] - sol_ref) / scale,
+                  np.linalg.norm(results[i] - sol_ref) / scale)
+    del results
+    shutil.rmtree(directory)
+    print("ranks: ", comm.Get_size(), "frequencies: ", len(solution_pool),
+          "error: ", error)
+    passed = error < 1e-12 and len(solution_pool) == len(
+        reference.frequencies) and nb_solved == len(reference.frequencies)
+  passed = comm.bcast(passed)
+
+  if passed:
+    if comm.Get_rank() == 0:
+      print("Test passed!")
+    return True
+  else:
+    if comm.Get_rank() == 0:
+      print("Test failed!")
+    return False
+
+
+if __name__ == "__main__":
+  result = test_case()
@@ -0,0 +1,140 @@
+# This file is part of PyXfem, a software distributed under the MIT license.
+# For any question, please contact the authors cited below.
+#
+# Copyright (c) 2023
+# 	Shaoqi WU <shaoqiwu@outlook.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+
+# Main Test case
+import os
+
+current_dir = os.path.dirname(os.path.realpath(__file__))
+working_dir = os.path.join(current_dir, "..")
+import sys
+
+sys.path.append(working_dir)
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.linalg import spsolve
+
+from SAcouS.Mesh import MeshReader
+from SAcouS.Materials import Air
+from SAcouS.acxfem import FESpace, HelmholtzAssembler, Helmholtz2DElement
+from SAcouS.acxfem import ApplyBoundaryConditions
+from SAcouS.acxmor import AffineDecomposition, HyperReducedOperator
+from SAcouS.acxmor.HyperReduction import impedance_atoms, element_atoms
+
+
+def test_case():
+  air = Air('classical air')
+  mesh_reader = MeshReader(current_dir + "/mesh/square_air_imp.msh")
+  mesh = mesh_reader.get_mesh()
+  elements2node = mesh.get_mesh_coordinates()
+  air_elements = mesh_reader.get_elem_by_physical('air')
+  imp_boundary = mesh_reader.get_facet_by_physical('impedance')
+  mesh.set_subdomains({air: air_elements})
+  # geometric bases
+  Pf_bases = [
+      Helmholtz2DElement('Pf', 1, elements2node[elem], (1., 1.))
+      for elem in air_elements
+  ]
+  fe_space = FESpace(mesh, Pf_bases)
+  assembler = HelmholtzAssembler(fe_space, dtype=np.complex128)
+  K = assembler.assemble_material_K(Pf_bases, 'Pf')
+  M = assembler.assemble_material_M(Pf_bases, 'Pf')
+  nb_dofs = fe_space.nb_dofs
+
+  # Delany-Bazley impedance of a liner with a graded flow resistivity,
+  # non-affine in (x, omega)
+  sigma = lambda x, y: 1e4 * (1 + x + 0.5 * y**2)
+  def impedance(x, y, omega):
+    X = air.rho_f * omega / (2 * np.pi * sigma(x, y))
+    return air.rho_f * air.c_f * (1 + 0.0571 * X**-0.754 -
+                                  1j * 0.087 * X**-0.732)
+
+  points, matrices, dofs, facets = impedance_atoms(mesh, imp_boundary)
+  coefficient = lambda atoms, omega: 1j / (omega * impedance(
+      points[atoms, 0], points[atoms, 1], omega))
+  hyper = HyperReducedOperator(matrices, dofs, nb_dofs, coefficient, facets)
+
+  # ============ same term as ApplyBoundaryConditions ============
+  omega_test = 2 * np.pi * 1234.5
+  BCs_applier = ApplyBoundaryConditions(
+      mesh, fe_space, csr_matrix((nb_dofs, nb_dofs), dtype=np.complex128),
+      np.zeros((nb_dofs, 1), dtype=np.complex128), omega_test)
+  C_ref = BCs_applier.apply_impedance_bc(
+      {
+          'type': 'impedance',
+          'value': lambda x, y: impedance(x, y, omega_test),
+          'position': imp_boundary
+      }, 'Pf')
+  C_full = hyper.full_operator(omega_test)
+  error_assembly = abs(C_full - C_ref).max() / abs(C_ref).max()
+  _, matrices_K, dofs_K, _ = element_atoms(fe_space, Pf_bases, 'ke', 'Pf')
+  error_assembly = max(
+      error_assembly,
+      abs(
+          HyperReducedOperator(matrices_K, dofs_K, nb_dofs, None).assemble(
+              np.ones(len(Pf_bases))) - K).max() / abs(K).max())
+  print("assembly error: ", error_assembly)
+
+  # ============ offline DEIM, online magic atoms only ============
+  omegas = 2 * np.pi * np.linspace(1000, 2000, 30)
+  rank = hyper.train(omegas, tolerance=1e-10)
+  print("DEIM rank: ", rank, "sampled facets: ", len(hyper.sampled_elements),
+        "/", len(imp_boundary), "atoms: ", hyper.nb_atoms)
+  error_operator = abs(hyper.operator(omega_test) - C_full).max() / abs(
+      C_full).max()
+  print("hyper-reduced operator error: ", error_operator)
+
+  # the hyper-reduced terms in an affine decomposition
+  decomposition = AffineDecomposition()
+  decomposition.add_operator_term(K, lambda omega: 1 / (omega**2 * air.rho_f))
+  decomposition.add_operator_term(M, lambda omega: -1 / air.K_f)
+  hyper.add_to(decomposition)
+  rhs = np.zeros(nb_dofs, dtype=np.complex128)
+  rhs[0] = 1.
+  decomposition.add_rhs_term(rhs, lambda omega: 1.)
+  A_full = K / (omega_test**2 * air.rho_f) - M / air.K_f + C_full
+  u_ref = spsolve(A_full.tocsc(), rhs)
+  u_hyper = spsolve(
+      decomposition.assemble_operator(omega_test).tocsc(),
+      decomposition.assemble_rhs(omega_test))
+  error_solution = np.linalg.norm(u_hyper - u_ref) / np.linalg.norm(u_ref)
+  print("solution error: ", error_solution)
+
+  # ============ reduced operator ============
+  snapshots = np.array([
+      spsolve(decomposition.assemble_operator(omega).tocsc(), rhs)
+      for omega in omegas[::3]
+  ]).T
+  Phi, _ = np.linalg.qr(snapshots)
+  hyper.project(Phi)
+  C_r_ref = Phi.conj().T @ (C_full @ Phi)
+  error_reduced = np.abs(hyper.reduced_operator(omega_test) -
+                         C_r_ref).max() / np.abs(C_r_ref).max()
+  print("reduced operator error: ", error_reduced)
+
+  if error_assembly < 1e-12 and error_operator < 1e-8 and \
+      error_solution < 1e-8 and error_reduced < 1e-8 and \
+      rank < hyper.nb_atoms:
+    print("Test passed!")
+    return True
+  else:
+    print("Test failed!")
+    return False
+
+
+if __name__ == "__main__":
+  result = test_case()
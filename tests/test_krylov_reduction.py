@@ -0,0 +1,127 @@
+# This file is part of PyXfem, a software distributed under the MIT license.
+# For any question, please contact the authors cited below.
+#
+# Copyright (c) 2023
+# 	Shaoqi WU <shaoqiwu@outlook.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# Main Test case
+import os
+
+current_dir = os.path.dirname(os.path.realpath(__file__))
+working_dir = os.path.join(current_dir, "..")
+import sys
+
+sys.path.append(working_dir)
+
+import time
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.linalg import spsolve
+
+from SAcouS.Mesh import Mesh1D
+from SAcouS.Materials import Air
+
+from SAcouS.acxfem import Lobbato1DElement
+from SAcouS.acxfem import DofHandler1D
+from SAcouS.acxfem import Assembler
+from SAcouS.acxfem import check_material_compability
+
+from SAcouS.acxmor import EigenSolver, ModalReduction, KrylovReduction
+
+
+def test_case():
+  # ====================== Pysical Problem ======================
+  air = Air('classical air')
+  freq = np.linspace(10, 2000, 100)    # frequency range
+  omegas = 2 * np.pi * freq    # angular frequency
+
+  num_elem = 500    # number of elements
+  num_nodes = num_elem + 1    # number of nodes
+  nodes = np.linspace(-1, 0, num_nodes)
+  elem_connec1 = np.arange(0, num_elem)
+  elem_connec2 = np.arange(1, num_nodes)
+  connectivity = np.vstack((elem_connec1, elem_connec2)).T
+  mesh = Mesh1D(nodes, connectivity)
+  elements_set = mesh.get_mesh_coordinates()
+  subdomains = {air: np.arange(0, num_nodes)}
+  check_material_compability(subdomains)
+  bases = [Lobbato1DElement('P', 1, elem) for elem in elements_set.values()]
+  dof_handler = DofHandler1D(mesh, bases)
+
+  assembler = Assembler(dof_handler, bases, subdomains, dtype=np.complex128)
+  nature_bcs = {'type': 'total_displacement', 'value': 1, 'position': 0}
+  assembler.initial_matrix()
+  K_w = assembler.assemble_material_K(omega=1)
+  M_w = assembler.assemble_material_M(omega=1)
+  right_hand_vector = assembler.assemble_nature_bc(nature_bcs)
+  # anechoic termination: damping term 1j*omega*C_w at the tube end
+  C_w = csr_matrix(([1 / air.Z], ([num_nodes - 1], [num_nodes - 1])),
+                   shape=K_w.shape,
+                   dtype=np.complex128)
+  output_dof = [int(num_nodes / 2)]
+
+  # ====================== full model ======================
+  sol_fem = np.array([
+      spsolve((K_w + 1j * omega * C_w - omega**2 * M_w).tocsc(),
+              right_hand_vector)[output_dof[0]] for omega in omegas
+  ])
+
+  # ====================== Krylov (SOAR) reduction ======================
+  start = time.time()
+  expansion_points = 2 * np.pi * np.array([500., 1500.])
+  krylov = KrylovReduction(K_w, M_w, expansion_points, 15, C_w)
+  krylov.build_basis(right_hand_vector)
+  sol_krylov = krylov.frequency_response(omegas, right_hand_vector,
+                                         output_dof)[:, 0]
+  print("Krylov reduction time: ", time.time() - start, "basis size: ",
+        krylov.Phi_m.shape[1])
+  error_krylov = np.abs(sol_krylov - sol_fem).max() / np.abs(sol_fem).max()
+
+  # same interface as the modal reduction
+  omega = omegas[37]
+  K_r = krylov.projection(K_w)
+  M_r = krylov.projection(M_w)
+  C_r = krylov.projection(C_w)
+  f_r = krylov.projection(right_hand_vector)
+  reduced_sol = krylov.solve(K_r + 1j * omega * C_r - omega**2 * M_r, f_r)
+  error_solve = abs(
+      krylov.recover_sol(reduced_sol)[output_dof[0]] -
+      sol_krylov[37]) / abs(sol_krylov[37])
+
+  # undamped modes with the same basis size, for comparison
+  eig_omega_sq, modes = EigenSolver(dof_handler).solve(K_w, M_w,
+                                                       krylov.Phi_m.shape[1])
+  modal = ModalReduction(K_w, M_w, modes)
+  K_r, M_r, C_r = modal.projection(K_w), modal.projection(
+      M_w), modal.projection(C_w)
+  f_r = modal.projection(right_hand_vector)
+  sol_modal = np.array([
+      modal.recover_sol(
+          modal.solve(K_r + 1j * omega * C_r - omega**2 * M_r,
+                      f_r))[output_dof[0]] for omega in omegas
+  ])
+  error_modal = np.abs(sol_modal - sol_fem).max() / np.abs(sol_fem).max()
+  print("error Krylov: ", error_krylov, "error modal: ", error_modal,
+        "error solve: ", error_solve)
+
+  if error_krylov < 1e-6 and error_krylov < error_modal and \
+      error_solve < 1e-10:
+    print("Test passed!")
+    return True
+  else:
+    print("Test failed!")
+    return False
+
+
+if __name__ == "__main__":
+  result = test_case()
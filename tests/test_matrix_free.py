@@ -0,0 +1,135 @@
+# This file is part of PyXfem, a software distributed under the MIT license.
+# For any question, please contact the authors cited below.
+#
+# Copyright (c) 2023
+# 	Shaoqi WU <shaoqiwu@outlook.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+
+
+# Main Test case
+import os
+
+current_dir = os.path.dirname(os.path.realpath(__file__))
+working_dir = os.path.join(current_dir, "..")
+import sys
+
+sys.path.append(working_dir)
+
+import numpy as np
+from scipy.sparse import coo_matrix, diags
+from scipy.sparse.linalg import spsolve
+
+from SAcouS.Mesh import MeshReader, Mesh3D
+from SAcouS.Materials import Air
+from SAcouS.acxfem import Helmholtz3DElement
+from SAcouS.acxfem import FESpace
+from SAcouS.acxfem import HelmholtzAssembler
+from SAcouS.acxfem import ApplyBoundaryConditions
+from SAcouS.acxfem import LinearSolver
+from SAcouS.acxfem.Solver import cocg
+from SAcouS.acxfem.MatrixFree import MatrixFreeHelmholtz
+from SAcouS.acxfem.ElementKernels import simplex_element_matrices
+
+
+def quadratic_mesh(mesh):
+  """P2 tetrahedra: edge mid-nodes in the order of Lagrange3DTetra(2)"""
+  connectivity = mesh.connectivity
+  pairs = [(0, 1), (1, 2), (1, 3), (0, 2), (2, 3), (0, 3)]
+  edges = np.sort(np.concatenate([connectivity[:, p] for p in pairs]), axis=1)
+  edges, index = np.unique(edges, axis=0, return_inverse=True)
+  connectivity = np.hstack(
+      (connectivity, mesh.get_nb_nodes() + index.reshape(6, -1).T))
+  nodes = np.vstack((mesh.nodes, mesh.nodes[edges].mean(axis=1)))
+  return Mesh3D(nodes, connectivity, None)
+
+
+def test_case():
+  air = Air('classical air')
+  omega = 2 * np.pi * 200
+  mesh_reader = MeshReader(current_dir + "/mesh/unit_tube_3D_refine.msh",
+                           dim=3)
+  mesh = mesh_reader.get_mesh()
+  mesh.set_subdomains({air: np.arange(mesh.nb_elems)})
+  elements2node = mesh.get_mesh_coordinates()
+  bases = [
+      Helmholtz3DElement('Pf', 1, elements2node[elem],
+                         (1 / air.rho_f, 1 / air.K_f))
+      for elem in range(mesh.nb_elems)
+  ]
+  fe_space = FESpace(mesh, bases)
+  assembler = HelmholtzAssembler(fe_space, dtype=float)
+  assembler.assembly_global_matrix(bases, 'Pf')
+  left_hand_matrix = assembler.get_global_matrix(omega)
+  right_hand_vec = np.zeros(fe_space.nb_dofs, dtype=np.complex128)
+  BCs_applier = ApplyBoundaryConditions(mesh, fe_space, left_hand_matrix,
+                                        right_hand_vec, omega)
+  BCs_applier.apply_nature_bc(
+      {
+          'type': 'fluid_velocity',
+          'value': lambda x, y, z: np.array([np.exp(-1j * omega), 0, 0]),
+          'position': mesh_reader.get_facet_by_physical('inlet')
+      }, 'Pf', 13)
+  reference = spsolve(left_hand_matrix.tocsc(), right_hand_vec)
+
+  # P1: same product as the assembled matrix, Krylov solve
+  operator = MatrixFreeHelmholtz.from_mesh(mesh)
+  x = np.random.rand(fe_space.nb_dofs) + 1j * np.random.rand(fe_space.nb_dofs)
+  error_p1 = np.abs(operator.matvec(x, omega) -
+                    left_hand_matrix @ x).max() / np.abs(
+                        left_hand_matrix @ x).max()
+  u, info = cocg(operator.as_linear_operator(omega),
+                 right_hand_vec,
+                 tol=1e-10,
+                 M=diags(1 / operator.diagonal(omega)))
+  error_solve = np.linalg.norm(u - reference) / np.linalg.norm(reference)
+  linear_solver = LinearSolver(fe_space=fe_space)
+  linear_solver.solve(operator.as_linear_operator(omega),
+                      right_hand_vec,
+                      solver='cocg')
+  error_solver = np.linalg.norm(linear_solver.u -
+                                reference) / np.linalg.norm(reference)
+
+  # P2: element matrices never stored
+  mesh_p2 = quadratic_mesh(mesh)
+  mesh_p2.set_subdomains({air: np.arange(mesh.nb_elems)})
+  operator_p2 = MatrixFreeHelmholtz.from_mesh(mesh_p2)
+  connectivity = mesh_p2.connectivity
+  coeffs = np.tile([1 / air.rho_f, 1 / air.K_f], (mesh.nb_elems, 1))
+  ke, me = simplex_element_matrices(mesh_p2.nodes[connectivity], 2, coeffs)
+  nb_dofs = mesh_p2.get_nb_nodes()
+  rows = np.repeat(connectivity, 10, axis=1).ravel()
+  cols = np.tile(connectivity, (1, 10)).ravel()
+  left_hand_p2 = coo_matrix(((ke / omega**2 - me).ravel(), (rows, cols)),
+                            shape=(nb_dofs, nb_dofs)).tocsr()
+  x = np.random.rand(nb_dofs)
+  error_p2 = np.abs(operator_p2.matvec(x, omega) -
+                    left_hand_p2 @ x).max() / np.abs(left_hand_p2 @ x).max()
+  matrix_nbytes = (left_hand_p2.data.nbytes + left_hand_p2.indices.nbytes +
+                   left_hand_p2.indptr.nbytes)
+
+  print("error P1, P2 product: ", error_p1, error_p2)
+  print("error COCG: ", error_solve, error_solver, info)
+  print("memory P2 (MB): ", matrix_nbytes / 1e6, "->",
+        operator_p2.nbytes / 1e6)
+  if (error_p1 < 1e-12 and error_p2 < 1e-12 and error_solve < 1e-8 and
+      error_solver < 1e-8 and info == 0 and
+      operator_p2.nbytes < matrix_nbytes / 2):
+    print("Test passed!")
+    return True
+  else:
+    print("Test failed!")
+    return False
+
+
+if __name__ == "__main__":
+  result = test_case()
@@ -0,0 +1,131 @@
+# This file is part of PyXfem, a software distributed under the MIT license.
+# For any question, please contact the authors cited below.
+#
+# Copyright (c) 2023
+# 	Shaoqi WU <shaoqiwu@outlook.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+
+# Main Test case
+import os
+
+current_dir = os.path.dirname(os.path.realpath(__file__))
+working_dir = os.path.join(current_dir, "..")
+import sys
+
+sys.path.append(working_dir)
+
+import numpy as np
+from scipy.sparse.linalg import spsolve
+
+from SAcouS.Mesh import MeshReader
+from SAcouS.Materials import Air, EquivalentFluid
+from SAcouS.acxfem import Helmholtz2DElement
+from SAcouS.acxfem import FESpace
+from SAcouS.acxfem import HelmholtzAssembler
+from SAcouS.acxfem import ApplyBoundaryConditions
+
+
+def solve_two_fluid(renumber, omega):
+  air = Air('classical air')
+  xfm = EquivalentFluid('foam', 0.98, 3.75e3, 1.17, 742e-6, 110e-6)
+  xfm.set_frequency(omega)
+  mesh_reader = MeshReader(current_dir + "/mesh/half_tube_2.msh")
+  mesh = mesh_reader.get_mesh(renumber=renumber)
+  mesh.set_subdomains({
+      air: mesh_reader.get_elem_by_physical('air'),
+      xfm: mesh_reader.get_elem_by_physical('foam')
+  })
+  elements2node = mesh.get_mesh_coordinates()
+  Pf_bases = []
+  for mat, elems in mesh.subdomains.items():
+    Pf_bases += [
+        Helmholtz2DElement('Pf', 1, elements2node[elem],
+                           (1 / mat.rho_f, 1 / mat.K_f)) for elem in elems
+    ]
+  fe_space = FESpace(mesh, Pf_bases)
+  assembler = HelmholtzAssembler(fe_space, dtype=np.complex128)
+  assembler.assembly_global_matrix(Pf_bases, 'Pf')
+  left_hand_matrix = assembler.get_global_matrix(omega)
+  right_hand_vec = np.zeros(assembler.nb_global_dofs, dtype=np.complex128)
+  natural_bcs = {
+      'type': 'fluid_velocity',
+      'value': lambda x, y: np.array([1 * np.exp(-1j * omega), 0]),
+      'position': mesh_reader.get_facet_by_physical('int')
+  }
+  BCs_applier = ApplyBoundaryConditions(mesh, fe_space, left_hand_matrix,
+                                        right_hand_vec, omega)
+  BCs_applier.apply_nature_bc(natural_bcs, 'Pf')
+  sol = spsolve(left_hand_matrix.tocsc(), right_hand_vec)
+  rows, cols = left_hand_matrix.nonzero()
+  bandwidth = np.abs(rows - cols).max()
+  return mesh_reader.to_gmsh_numbering(sol), bandwidth
+
+
+def test_case():
+  omega = 2 * np.pi * 1000
+  sol_ref, bandwidth_ref = solve_two_fluid(None, omega)
+  sol_rcm, bandwidth_rcm = solve_two_fluid('rcm', omega)
+  sol_morton, _ = solve_two_fluid('morton', omega)
+  error = max(
+      np.linalg.norm(sol_rcm - sol_ref) / np.linalg.norm(sol_ref),
+      np.linalg.norm(sol_morton - sol_ref) / np.linalg.norm(sol_ref))
+  print("bandwidth gmsh: ", bandwidth_ref, "rcm: ", bandwidth_rcm)
+  print("error: ", error)
+
+  # partitioned 3D mesh: contiguous balanced parts, same facets
+  mesh_reader = MeshReader(current_dir + "/mesh/unit_tube_3D_refine.msh", dim=3)
+  mesh = mesh_reader.get_mesh()
+  inlet = mesh.nodes[mesh.exterior_facets[mesh_reader.get_facet_by_physical(
+      'inlet')]]
+  mesh = mesh_reader.get_mesh(renumber='rcm', nb_parts=4)
+  inlet_rcm = mesh.nodes[mesh.exterior_facets[
+      mesh_reader.get_facet_by_physical('inlet')]]
+  same_facets = np.allclose(
+      np.sort(inlet.reshape(-1, 3), axis=0),
+      np.sort(inlet_rcm.reshape(-1, 3), axis=0))
+  counts = np.bincount(mesh.parts)
+  contiguous = np.all(np.diff(mesh.parts) >= 0)
+  print("part sizes: ", counts)
+
+  # parts cutting across the groups: the groups split along y, the bisection
+  # along x, a subdomain must stay contiguous
+  mesh_reader = MeshReader(current_dir + "/mesh/half_tube_2.msh")
+  mesh = mesh_reader.get_mesh()
+  centers = mesh.nodes[mesh.elem_connect].mean(axis=1)
+  groups = (centers[:, 1] > np.median(centers[:, 1])).astype(int)
+  mesh.set_subdomains({
+      'low': np.where(groups == 0)[0],
+      'high': np.where(groups == 1)[0]
+  })
+  _, elem_order, _ = mesh.renumber('rcm', nb_parts=2, groups=groups)
+  groups = groups[elem_order]
+  crossing = all(
+      len(np.unique(mesh.parts[groups == group])) == 2 for group in (0, 1))
+  grouped = (np.all(np.diff(groups) >= 0) and np.array_equal(
+      np.concatenate(list(mesh.subdomains.values())), np.arange(
+          mesh.nb_elems)) and all(
+              np.all(np.diff(mesh.parts[groups == group]) >= 0)
+              for group in (0, 1)))
+  print("parts across groups: ", crossing, ", groups contiguous: ", grouped)
+
+  if error < 1e-10 and bandwidth_rcm < bandwidth_ref and same_facets and contiguous and counts.max(
+  ) - counts.min() <= 1 and crossing and grouped:
+    print("Test passed!")
+    return True
+  else:
+    print("Test failed!")
+    return False
+
+
+if __name__ == "__main__":
+  result = test_case()
@@ -0,0 +1,120 @@
+# This file is part of PyXfem, a software distributed under the MIT license.
+# For any question, please contact the authors cited below.
+#
+# Copyright (c) 2023
+# 	Shaoqi WU <shaoqiwu@outlook.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+
+
+# Main Test case
+import os
+
+current_dir = os.path.dirname(os.path.realpath(__file__))
+working_dir = os.path.join(current_dir, "..")
+import sys
+
+sys.path.append(working_dir)
+
+import numpy as np
+from scipy.sparse import csc_matrix, diags
+from scipy.sparse.linalg import spsolve, splu
+
+from SAcouS.Mesh import MeshReader
+from SAcouS.Materials import Air, EquivalentFluid
+from SAcouS.acxfem import Helmholtz2DElement
+from SAcouS.acxfem import FESpace
+from SAcouS.acxfem import HelmholtzAssembler
+from SAcouS.acxfem import ApplyBoundaryConditions
+from SAcouS.acxfem import LinearSolver
+from SAcouS.acxfem.Solver import mixed_precision_solve
+
+
+def factor_nbytes(lu):
+  return lu.L.data.nbytes + lu.U.data.nbytes
+
+
+def test_case():
+  air = Air('classical air')
+  xfm = EquivalentFluid('foam', 0.98, 3.75e3, 1.17, 742e-6, 110e-6)
+  omega = 2 * np.pi * 1000
+  xfm.set_frequency(omega)
+  mesh_reader = MeshReader(current_dir + "/mesh/half_tube_2.msh")
+  mesh = mesh_reader.get_mesh()
+  subdomains = {
+      air: mesh_reader.get_elem_by_physical('air'),
+      xfm: mesh_reader.get_elem_by_physical('foam')
+  }
+  mesh.set_subdomains(subdomains)
+  elements2node = mesh.get_mesh_coordinates()
+  bases = []
+  for mat, elems in subdomains.items():
+    bases += [
+        Helmholtz2DElement('Pf', 1, elements2node[elem],
+                           (1 / mat.rho_f, 1 / mat.K_f)) for elem in elems
+    ]
+  fe_space = FESpace(mesh, bases)
+  assembler = HelmholtzAssembler(fe_space, dtype=np.complex128)
+  assembler.assembly_global_matrix(bases, 'Pf')
+  left_hand_matrix = assembler.get_global_matrix(omega)
+  right_hand_vec = np.zeros(fe_space.nb_dofs, dtype=np.complex128)
+  BCs_applier = ApplyBoundaryConditions(mesh, fe_space, left_hand_matrix,
+                                        right_hand_vec, omega)
+  left_hand_matrix = BCs_applier.apply_impedance_bc(
+      {
+          'type': 'impedance',
+          'value': lambda x, y: air.rho_f * air.c_f * (1 + 0.5j),
+          'position': mesh_reader.get_facet_by_physical('int')
+      }, 'Pf')
+  right_hand_vec[0] = 1.
+  reference = spsolve(csc_matrix(left_hand_matrix), right_hand_vec)
+
+  # single precision factor refined to double precision accuracy
+  u, method = mixed_precision_solve(left_hand_matrix, right_hand_vec)
+  error = np.linalg.norm(u - reference) / np.linalg.norm(reference)
+  linear_solver = LinearSolver(fe_space=fe_space)
+  linear_solver.solve(left_hand_matrix, right_hand_vec, solver='mixed')
+  error_solver = np.linalg.norm(linear_solver.u -
+                                reference) / np.linalg.norm(reference)
+  memory = factor_nbytes(splu(csc_matrix(left_hand_matrix, dtype=np.complex64)))
+  memory_ref = factor_nbytes(splu(csc_matrix(left_hand_matrix)))
+
+  # singular in single precision: double precision fallback
+  u_fallback, method_fallback = mixed_precision_solve(
+      diags([1., 1e-50]).tocsc(), np.ones(2))
+
+  # nearly singular shifted laplacian: refinement stagnates, gmres converges
+  n = 200
+  shift = (2 - 2 * np.cos(np.pi / (n + 1))) * (1 - 1e-4)
+  laplacian = diags([2 - shift, -1., -1.], [0, -1, 1], shape=(n, n)).tocsc()
+  u_gmres, method_gmres = mixed_precision_solve(laplacian,
+                                                np.ones(n),
+                                                tol=1e-8)
+  residual_gmres = np.linalg.norm(laplacian @ u_gmres - 1.) / np.sqrt(n)
+
+  print("method: ", method, ", error: ", error, error_solver)
+  print("factor memory (MB): ", memory_ref / 1e6, "->", memory / 1e6)
+  print("fallback: ", method_fallback, u_fallback)
+  print("gmres: ", method_gmres, residual_gmres)
+  if (method == 'refinement' and error < 1e-10 and error_solver < 1e-10 and
+      memory < 0.6 * memory_ref and method_fallback == 'full' and
+      np.allclose(u_fallback, [1., 1e50]) and method_gmres == 'gmres' and
+      residual_gmres < 1e-8):
+    print("Test passed!")
+    return True
+  else:
+    print("Test failed!")
+    return False
+
+
+if __name__ == "__main__":
+  result = test_case()
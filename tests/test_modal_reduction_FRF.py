@@ -147,6 +147,12 @@ if __name__ == "__main__":
     sol_modal[i] = reduction_model(omega, K_r, M_r, f_r)[int(num_nodes / 2)]
   end = time.time()
   print("Modal reduction solving time: ", end - start)
+  # whole frequency vector at once, recovered at the output dof only
+  start = time.time()
+  sol_batch = modal_reduction_method.frequency_response(
+      omegas, right_hand_vector, output_dofs=[int(num_nodes / 2)])[:, 0]
+  print("Batched modal reduction solving time: ", time.time() - start)
+  error_batch = np.abs(sol_batch - sol_modal).max() / np.abs(sol_modal).max()
   # ====================== Analytical Solution ======================
   # analytical solution
   # kundlt_tube = ImpedenceKundltTube(mesh, air, omega, nature_bcs, impedence_bcs)
@@ -165,6 +171,6 @@ if __name__ == "__main__":
 
   # compute the error
   error = post_process.compute_error(sol_fem, sol_modal)
-  print("error: ", error)
-  if error < 1e-4:
+  print("error: ", error, error_batch)
+  if error < 1e-4 and error_batch < 1e-8:
     print("Test passed!")
@@ -148,11 +148,11 @@ if __name__ == "__main__":
   M_r = modal_reduction_method.projection(M_w)
   f_r = modal_reduction_method.projection(right_hand_vector)
 
-  sol_modal = np.zeros((num_frequencies, num_nodes), dtype=np.complex128)
-  # for i, omega in enumerate(omegas):
-  #     sol_modal[i, :] = reduction_model(omega, K_r, M_r, f_r)
-  # end = time.time()
-  # print("Modal reduction solving time: ", end-start)
+  # all the frequencies at once from the diagonalized reduced system
+  sol_modal = modal_reduction_method.frequency_response(omegas,
+                                                        right_hand_vector)
+  end = time.time()
+  print("Modal reduction solving time: ", end - start)
   # ====================== Analytical Solution ======================
 
   # plot the solution
@@ -172,7 +172,7 @@ if __name__ == "__main__":
   ax.set_ylabel('Pressure(Pa)')
   for i, omega in enumerate(omegas):
     print("frequency: ", omega / (2 * np.pi))
-    line1.set_ydata(reduction_model(omega, K_r, M_r, f_r))
+    line1.set_ydata(sol_modal[i].real)
     fig.canvas.draw()
     fig.canvas.flush_events()
     time.sleep(0.1)
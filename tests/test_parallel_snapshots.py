@@ -0,0 +1,97 @@
+# This file is part of PyXfem, a software distributed under the MIT license.
+# For any question, please contact the authors cited below.
+#
+# Copyright (c) 2023
+# 	Shaoqi WU <shaoqiwu@outlook.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# Main Test case
+import os
+
+current_dir = os.path.dirname(os.path.realpath(__file__))
+working_dir = os.path.join(current_dir, "..")
+import sys
+
+sys.path.append(working_dir)
+
+import tempfile
+import numpy as np
+
+from SAcouS.interface.parser import ParserFactory
+from SAcouS.acxmor import HelmholtzAffineDecomposition, ParallelSnapshots
+from SAcouS.acxmor.myEIM import nonIntrusiveEIMV2
+
+
+def test_case():
+  file_path = os.path.join(working_dir, 'SAcouS', 'interface', 'two_fluid.axi')
+  parser = ParserFactory.create_parser(file_path)
+  decomposition = HelmholtzAffineDecomposition.from_sol_info(parser.parse())
+  omegas = decomposition.training_parameters
+
+  # ====================== serial reference ======================
+  snapshots_ref = np.array([
+      np.linalg.solve(
+          decomposition.assemble_operator(omega).toarray(),
+          decomposition.assemble_rhs(omega)) for omega in omegas
+  ]).T
+
+  # ============ parallel snapshots with checkpoint and resume ============
+  checkpoint_file = os.path.join(tempfile.mkdtemp(), 'snapshots.npz')
+  with ParallelSnapshots(decomposition, nb_workers=2) as pool:
+    snapshots = pool.compute_snapshots(omegas, checkpoint_file)
+    error_snapshots = np.abs(snapshots - snapshots_ref).max() / np.abs(
+        snapshots_ref).max()
+
+    # interrupted run: a third of the snapshots are missing in the checkpoint
+    with np.load(checkpoint_file) as checkpoint:
+      done = checkpoint['done'].copy()
+      partial = checkpoint['snapshots'].copy()
+    done[::3] = False
+    partial[:, ::3] = 0.
+    pool.save_checkpoint(checkpoint_file, omegas, partial, done)
+    nb_solved = pool.nb_solved
+    snapshots_resumed = pool.compute_snapshots(omegas, checkpoint_file)
+    nb_resumed = pool.nb_solved - nb_solved
+  error_resume = np.abs(snapshots_resumed - snapshots).max()
+  print("snapshot error: ", error_snapshots, error_resume, "resumed solves: ",
+        nb_resumed)
+
+  # the snapshot matrix feeds the EIM
+  eim = nonIntrusiveEIMV2(snapshots, 30, tolerance=1e-8, dtype_=np.complex128)
+  eim.display = False
+  R, lambda_ = eim.interpolate()
+  error_eim = np.abs(R @ lambda_.T - snapshots).max() / np.abs(snapshots).max()
+  print("EIM rank: ", eim.rank, "error: ", error_eim)
+
+  # ============ parallel residuals in the reduced basis greedy ============
+  rb_serial = decomposition.rb_solver(8, omegas[::5])
+  rb_serial.solveGreedy(1e-8)
+  rb_parallel = decomposition.rb_solver(8, omegas[::5], nb_workers=2)
+  rb_parallel.solveGreedy(1e-8)
+  rb_parallel.snapshotPool.close()
+  same_history = rb_serial.worstParamHistory == rb_parallel.worstParamHistory
+  error_rb = np.abs(rb_serial.RB_Basis - rb_parallel.RB_Basis).max()
+  print("greedy history: ", rb_parallel.worstParamHistory, same_history,
+        error_rb)
+
+  if error_snapshots < 1e-12 and error_resume == 0. and \
+      nb_resumed == len(omegas[::3]) and error_eim < 1e-6 and \
+      same_history and error_rb < 1e-10:
+    print("Test passed!")
+    return True
+  else:
+    print("Test failed!")
+    return False
+
+
+if __name__ == "__main__":
+  result = test_case()
@@ -0,0 +1,110 @@
+# This file is part of PyXfem, a software distributed under the MIT license.
+# For any question, please contact the authors cited below.
+#
+# Copyright (c) 2023
+# 	Shaoqi WU <shaoqiwu@outlook.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+
+# Main Test case
+import os
+
+current_dir = os.path.dirname(os.path.realpath(__file__))
+working_dir = os.path.join(current_dir, "..")
+import sys
+
+sys.path.append(working_dir)
+
+import numpy as np
+from scipy.sparse import coo_matrix
+
+from SAcouS.Mesh import MeshReader, Mesh1D
+from SAcouS.Materials import Air
+from SAcouS.acxfem import Helmholtz1DElement, Helmholtz2DElement
+from SAcouS.acxfem import FESpace, HelmholtzAssembler
+from SAcouS.acxfem.PhysicAssembler import PETSC_on
+
+
+def compare(assembler, bases, omega):
+  assembler.assemble_global_material_matrix(bases, 'Pf')
+  K_ref, M_ref = assembler.K, assembler.M
+  assembler.pattern_assemble_material_matrix(bases, 'Pf')
+  K, M = assembler.K, assembler.M
+  indptr, indices = assembler.pattern
+  error = max(
+      abs(K - K_ref).max() / abs(K_ref).max(),
+      abs(M - M_ref).max() / abs(M_ref).max())
+  # exact pattern: canonical CSR, shared by K and M, one entry per coupled
+  # pair of dofs
+  rows, cols, _, _ = assembler.element_data(bases, 'Pf')
+  nb_pairs = coo_matrix((np.ones(len(rows)), (rows, cols))).tocsr().nnz
+  exact = K.has_canonical_format and np.array_equal(
+      M.indptr, indptr) and len(indices) == nb_pairs
+  if PETSC_on:
+    assembler.petsc_assemble_material_matrix(bases, 'Pf')
+    A_petsc = assembler.get_petsc_operator(omega)
+    indptr_A, indices_A, data_A = A_petsc.getValuesCSR()
+    A = assembler.get_global_matrix(omega)
+    error = max(error, np.abs(data_A - A.data).max() / np.abs(A.data).max())
+    # one work matrix refilled at every frequency
+    exact = exact and assembler.get_petsc_operator(2 * omega) is A_petsc
+    indptr_A, indices_A, data_A = A_petsc.getValuesCSR()
+    A = assembler.get_global_matrix(2 * omega)
+    error = max(error, np.abs(data_A - A.data).max() / np.abs(A.data).max())
+  return error, exact
+
+
+def test_case():
+  air = Air('classical air')
+  omega = 2 * np.pi * 500.
+  coeffs = (1 / air.rho_f, 1 / air.K_f)
+
+  # 2D triangles
+  mesh_reader = MeshReader(current_dir + "/mesh/square_air_imp.msh")
+  mesh = mesh_reader.get_mesh()
+  elements2node = mesh.get_mesh_coordinates()
+  air_elements = mesh_reader.get_elem_by_physical('air')
+  mesh.set_subdomains({air: air_elements})
+  bases = [
+      Helmholtz2DElement('Pf', 1, elements2node[elem], coeffs)
+      for elem in air_elements
+  ]
+  assembler = HelmholtzAssembler(FESpace(mesh, bases), dtype=np.complex128)
+  error_2D, exact_2D = compare(assembler, bases, omega)
+  print("2D error: ", error_2D, "exact pattern: ", exact_2D)
+
+  # 1D mixed orders (internal dofs)
+  num_elem = 50
+  nodes = np.linspace(0, 1, num_elem + 1)
+  connectivity = np.vstack((np.arange(num_elem), np.arange(1,
+                                                           num_elem + 1))).T
+  mesh = Mesh1D(nodes, connectivity)
+  mesh.set_subdomains({air: np.arange(num_elem)})
+  elements2node = mesh.get_mesh_coordinates()
+  bases = [
+      Helmholtz1DElement('Pf', 1 + i % 3, elements2node[i], coeffs)
+      for i in range(num_elem)
+  ]
+  assembler = HelmholtzAssembler(FESpace(mesh, bases), dtype=np.complex128)
+  error_1D, exact_1D = compare(assembler, bases, omega)
+  print("1D error: ", error_1D, "exact pattern: ", exact_1D)
+
+  if error_2D < 1e-14 and error_1D < 1e-14 and exact_2D and exact_1D:
+    print("Test passed!")
+    return True
+  else:
+    print("Test failed!")
+    return False
+
+
+if __name__ == "__main__":
+  result = test_case()
@@ -0,0 +1,84 @@
+# This file is part of PyXfem, a software distributed under the MIT license.
+# For any question, please contact the authors cited below.
+#
+# Copyright (c) 2023
+# 	Shaoqi WU <shaoqiwu@outlook.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+
+# Main Test case (requires petsc4py built with complex scalars)
+import os
+
+current_dir = os.path.dirname(os.path.realpath(__file__))
+working_dir = os.path.join(current_dir, "..")
+import sys
+
+sys.path.append(working_dir)
+
+import numpy as np
+from scipy.sparse.linalg import spsolve
+
+from SAcouS.Mesh import MeshReader
+from SAcouS.Materials import Air
+from SAcouS.acxfem import Helmholtz2DElement, FESpace, HelmholtzAssembler
+from SAcouS.acxfem import PETScSolver
+
+
+def test_case():
+  air = Air('classical air')
+  mesh_reader = MeshReader(current_dir + "/mesh/square_air_imp.msh")
+  mesh = mesh_reader.get_mesh()
+  elements2node = mesh.get_mesh_coordinates()
+  air_elements = mesh_reader.get_elem_by_physical('air')
+  mesh.set_subdomains({air: air_elements})
+  bases = [
+      Helmholtz2DElement('Pf', 1, elements2node[elem],
+                         (1 / air.rho_f, 1 / air.K_f)) for elem in air_elements
+  ]
+  fe_space = FESpace(mesh, bases)
+  assembler = HelmholtzAssembler(fe_space, dtype=np.complex128)
+  assembler.pattern_assemble_material_matrix(bases, 'Pf')
+  right_hand_vec = np.zeros(fe_space.nb_dofs, dtype=np.complex128)
+  right_hand_vec[0] = 1.
+
+  solvers = {
+      'direct': PETScSolver(),
+      'iterative': PETScSolver({
+          'ksp_type': 'gmres',
+          'ksp_rtol': 1e-12,
+          'pc_type': 'ilu'
+      },
+                               prefix='iterative_')
+  }
+  error = 0.
+  for freq in [100., 200., 300.]:
+    omega = 2 * np.pi * freq
+    # damped operator, K and M share one pattern: in place update
+    left_hand_matrix = assembler.get_global_matrix(omega * (1 + 0.01j))
+    sol_ref = spsolve(left_hand_matrix.tocsc(), right_hand_vec)
+    for solver in solvers.values():
+      sol = solver.solve(right_hand_vec, left_hand_matrix)
+      error = max(error,
+                  np.linalg.norm(sol - sol_ref) / np.linalg.norm(sol_ref))
+  timings = solvers['direct'].timings()
+  print("error: ", error, "timings: ", timings)
+
+  if error < 1e-8 and timings['solve'][1] == 3:
+    print("Test passed!")
+    return True
+  else:
+    print("Test failed!")
+    return False
+
+
+if __name__ == "__main__":
+  result = test_case()
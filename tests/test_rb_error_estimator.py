@@ -0,0 +1,79 @@
+# This file is part of PyXfem, a software distributed under the MIT license.
+# For any question, please contact the authors cited below.
+#
+# Copyright (c) 2023
+# 	Shaoqi WU <shaoqiwu@outlook.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# Main Test case
+import os
+
+current_dir = os.path.dirname(os.path.realpath(__file__))
+working_dir = os.path.join(current_dir, "..")
+import sys
+
+sys.path.append(working_dir)
+
+import time
+import numpy as np
+
+from SAcouS.interface.parser import ParserFactory
+from SAcouS.acxmor import HelmholtzAffineDecomposition
+
+
+def test_case():
+  file_path = os.path.join(working_dir, 'SAcouS', 'interface', 'two_fluid.axi')
+  parser = ParserFactory.create_parser(file_path)
+  decomposition = HelmholtzAffineDecomposition.from_sol_info(parser.parse())
+  omegas = decomposition.training_parameters
+
+  # ====================== greedy with the offline/online estimator ======================
+  rb_solver = decomposition.rb_solver(30, omegas)
+  start = time.time()
+  error_history = rb_solver.solveGreedyWithEstimator(1e-5)
+  print("Greedy with estimator time: ", time.time() - start)
+  m = rb_solver.nbModes
+
+  # estimated residual norms against the high-fidelity residuals
+  paramOp, paramRhs = rb_solver.evaluateParameterFunctions()
+  estimated = rb_solver.estimator.residualNorms(paramOp, paramRhs,
+                                                rb_solver.RB_Coeffs[:, :m])
+  exact = np.zeros(len(omegas))
+  error_sol = 0.
+  for i, omega in enumerate(omegas):
+    A = decomposition.assemble_operator(omega)
+    f = decomposition.assemble_rhs(omega)
+    u_rb = rb_solver.reconstructHiFiApproximatedSolution(i)
+    exact[i] = np.linalg.norm(f - A @ u_rb)
+    u = np.linalg.solve(A.toarray(), f)
+    error_sol = max(error_sol, np.linalg.norm(u_rb - u) / np.linalg.norm(u))
+  rhs_norms = rb_solver.estimator.rhsNorms(paramRhs)
+  error_estimator = np.abs(estimated - exact).max() / rhs_norms.max()
+  print("estimator error: ", error_estimator)
+
+  # incremental QR: orthonormal basis and upper triangular R
+  Q = rb_solver.RB_Basis[:, :m]
+  error_qr = np.abs(Q.conj().T @ Q - np.identity(m)).max()
+  print("modes: ", m, "orthogonality: ", error_qr, "solution error: ",
+        error_sol)
+
+  if error_history[-1] < 1e-5 and error_estimator < 1e-6 and \
+      error_qr < 1e-12 and error_sol < 1e-4:
+    print("Test passed!")
+    return True
+  else:
+    print("Test failed!")
+    return False
+
+
+if __name__ == "__main__":
+  result = test_case()
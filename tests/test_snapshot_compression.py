@@ -0,0 +1,93 @@
+# This file is part of PyXfem, a software distributed under the MIT license.
+# For any question, please contact the authors cited below.
+#
+# Copyright (c) 2023
+# 	Shaoqi WU <shaoqiwu@outlook.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# Main Test case
+import os
+
+current_dir = os.path.dirname(os.path.realpath(__file__))
+working_dir = os.path.join(current_dir, "..")
+import sys
+
+sys.path.append(working_dir)
+
+import numpy as np
+from scipy.sparse.linalg import aslinearoperator
+
+from SAcouS.interface.parser import ParserFactory
+from SAcouS.acxmor import HelmholtzAffineDecomposition
+from SAcouS.acxmor import IncrementalSVD, randomized_svd
+from SAcouS.acxmor.myEIM import nonIntrusiveEIMV2
+
+
+def test_case():
+  file_path = os.path.join(working_dir, 'SAcouS', 'interface', 'two_fluid.axi')
+  parser = ParserFactory.create_parser(file_path)
+  decomposition = HelmholtzAffineDecomposition.from_sol_info(parser.parse())
+  omegas = decomposition.training_parameters
+
+  # ============ streaming SVD: one frequency at a time ============
+  isvd = IncrementalSVD(tolerance=1e-12)
+  snapshots = []
+  for omega in omegas:
+    u = np.linalg.solve(
+        decomposition.assemble_operator(omega).toarray(),
+        decomposition.assemble_rhs(omega))
+    isvd.update(u)
+    snapshots.append(u)
+  snapshots = np.array(snapshots).T
+  s_ref = np.linalg.svd(snapshots, compute_uv=False)
+  r = isvd.rank
+  error_isvd = np.abs(isvd.s - s_ref[:r]).max() / s_ref[0]
+  error_reconstruction = np.abs(isvd.U * isvd.s @ isvd.V.conj().T -
+                                snapshots).max() / np.abs(snapshots).max()
+  print("incremental SVD rank: ", r, "error: ", error_isvd,
+        error_reconstruction)
+
+  # ============ randomized SVD on an operator ============
+  U, s, Vh = randomized_svd(aslinearoperator(snapshots), 20, seed=0)
+  error_rsvd = np.abs(s - s_ref[:20]).max() / s_ref[0]
+  print("randomized SVD error: ", error_rsvd)
+
+  # ============ compressed snapshots feed the EIM and the RB solver ============
+  eim = nonIntrusiveEIMV2(isvd.compressed_snapshots(),
+                          r,
+                          tolerance=1e-10,
+                          dtype_=np.complex128)
+  eim.display = False
+  R, lambda_ = eim.interpolate()
+  coeffs = np.linalg.solve(R[eim.indX], snapshots[eim.indX])
+  error_eim = np.abs(R @ coeffs - snapshots).max() / np.abs(snapshots).max()
+  print("EIM rank: ", eim.rank, "error: ", error_eim)
+
+  rb_solver = decomposition.rb_solver(30, omegas)
+  m = rb_solver.initializeBasis(isvd.basis(30))
+  error_rb = max(
+      np.linalg.norm(rb_solver.reconstructHiFiApproximatedSolution(i) -
+                     snapshots[:, i]) / np.linalg.norm(snapshots[:, i])
+      for i in range(len(omegas)))
+  print("RB modes: ", m, "error: ", error_rb)
+
+  if error_isvd < 1e-10 and error_reconstruction < 1e-10 and \
+      error_rsvd < 1e-10 and error_eim < 1e-6 and error_rb < 1e-6:
+    print("Test passed!")
+    return True
+  else:
+    print("Test failed!")
+    return False
+
+
+if __name__ == "__main__":
+  result = test_case()
@@ -0,0 +1,134 @@
+# This file is part of PyXfem, a software distributed under the MIT license.
+# For any question, please contact the authors cited below.
+#
+# Copyright (c) 2023
+# 	Shaoqi WU <shaoqiwu@outlook.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+
+# Main Test case
+import os
+
+current_dir = os.path.dirname(os.path.realpath(__file__))
+working_dir = os.path.join(current_dir, "..")
+import sys
+
+sys.path.append(working_dir)
+
+import tempfile
+import numpy as np
+
+from SAcouS.interface.parser import ParserFactory
+from SAcouS.acxmor import HelmholtzAffineDecomposition, ParallelSnapshots
+from SAcouS.acxmor import IncrementalSVD, randomized_svd
+from SAcouS.acxmor import SnapshotStore, SnapshotWriter
+from SAcouS.acxmor.myEIM import nonIntrusiveEIMV2
+
+
+def test_case():
+  file_path = os.path.join(working_dir, 'SAcouS', 'interface', 'two_fluid.axi')
+  parser = ParserFactory.create_parser(file_path)
+  decomposition = HelmholtzAffineDecomposition.from_sol_info(parser.parse())
+  omegas = decomposition.training_parameters
+  snapshots = np.array([
+      np.linalg.solve(
+          decomposition.assemble_operator(omega).toarray(),
+          decomposition.assemble_rhs(omega)) for omega in omegas
+  ]).T
+  scale = np.abs(snapshots).max()
+
+  with tempfile.TemporaryDirectory() as directory:
+    # ============ append-only writing, two writers ============
+    half = len(omegas) // 2
+    with SnapshotWriter(directory, 0, chunk_size=16) as writer:
+      writer.append(snapshots[:, :half], omegas[:half])
+    with SnapshotWriter(directory, 1, chunk_size=16) as writer:
+      for i in range(half, len(omegas)):
+        writer.append(snapshots[:, i], omegas[i])
+    store = SnapshotStore(directory, cache_size=2)
+    X = np.random.default_rng(0).standard_normal((len(omegas), 3))
+    indices = np.array([3, 0, 57, 99, 42])
+    error_store = max(
+        np.abs(store.parameters - omegas).max(),
+        np.abs(store.columns(indices) - snapshots[:, indices]).max() / scale,
+        np.abs(store.rows(indices) - snapshots[indices]).max() / scale,
+        np.abs(store.matmat(X) - snapshots @ X).max() / scale)
+    print("store shape: ", store.shape, "error: ", error_store)
+
+    # ============ POD streamed block by block ============
+    s_ref = np.linalg.svd(snapshots, compute_uv=False)
+    isvd = IncrementalSVD(tolerance=1e-12)
+    for _, block in store.blocks():
+      isvd.update(block)
+    error_isvd = np.abs(isvd.s - s_ref[:isvd.rank]).max() / s_ref[0]
+    _, s, _ = randomized_svd(store.as_linear_operator(), 20, seed=0)
+    error_rsvd = np.abs(s - s_ref[:20]).max() / s_ref[0]
+    print("POD error: ", error_isvd, error_rsvd)
+
+    # ============ out-of-core EIM ============
+    eim = nonIntrusiveEIMV2(store, 40, tolerance=1e-10, dtype_=np.complex128)
+    eim.display = False
+    R, lambda_ = eim.interpolate()
+    eim_ref = nonIntrusiveEIMV2(snapshots,
+                                40,
+                                tolerance=1e-10,
+                                dtype_=np.complex128)
+    eim_ref.display = False
+    R_ref, lambda_ref = eim_ref.interpolate()
+    error_eim = np.abs(R @ lambda_.T - snapshots).max() / scale
+    print("EIM rank: ", eim.rank, eim_ref.rank, "error: ", error_eim)
+
+    rb_solver = decomposition.rb_solver(30, omegas)
+    m = rb_solver.initializeBasis(isvd.basis(30))
+    error_rb = max(
+        np.linalg.norm(rb_solver.reconstructHiFiApproximatedSolution(i) -
+                       snapshots[:, i]) / np.linalg.norm(snapshots[:, i])
+        for i in range(len(omegas)))
+    print("RB modes: ", m, "error: ", error_rb)
+
+  # ============ sweep workers writing to the store ============
+  with tempfile.TemporaryDirectory() as directory:
+    with ParallelSnapshots(decomposition, nb_workers=2) as pool:
+      store = pool.store_snapshots(omegas, directory)
+      nb_solved = pool.nb_solved
+    # resume with another pool: the chunks of the manifest are on disk
+    os.remove(os.path.join(directory, 'chunk_000001_000000.npy'))
+    with ParallelSnapshots(decomposition, nb_workers=3) as pool:
+      pool.store_snapshots(omegas, directory)
+      nb_resumed = pool.nb_solved
+      # another sweep in the same directory is refused
+      try:
+        pool.store_snapshots(omegas[:10], directory)
+        mixed = True
+      except ValueError:
+        mixed = False
+    error_parallel = np.abs(store.columns(np.arange(len(omegas))) -
+                            snapshots).max() / scale
+    # one standard array per npy file
+    chunk = np.load(os.path.join(directory, 'chunk_000000_000000.npy'))
+    print("parallel store error: ", error_parallel, "solved: ", nb_solved,
+          "resumed: ", nb_resumed)
+
+  if error_store < 1e-12 and error_isvd < 1e-10 and error_rsvd < 1e-10 and \
+      eim.rank == eim_ref.rank and np.array_equal(eim.indX, eim_ref.indX) and \
+      error_eim < 1e-6 and error_rb < 1e-6 and error_parallel < 1e-12 and \
+      nb_solved == len(omegas) and 0 < nb_resumed < len(omegas) and \
+      not mixed and chunk.shape[0] == store.nb_dofs:
+    print("Test passed!")
+    return True
+  else:
+    print("Test failed!")
+    return False
+
+
+if __name__ == "__main__":
+  result = test_case()
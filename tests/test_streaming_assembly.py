@@ -0,0 +1,110 @@
+# This file is part of PyXfem, a software distributed under the MIT license.
+# For any question, please contact the authors cited below.
+#
+# Copyright (c) 2023
+# 	Shaoqi WU <shaoqiwu@outlook.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+
+# Main Test case
+import os
+
+current_dir = os.path.dirname(os.path.realpath(__file__))
+working_dir = os.path.join(current_dir, "..")
+import sys
+
+sys.path.append(working_dir)
+
+import tracemalloc
+import numpy as np
+
+from SAcouS.Mesh import MeshReader, Mesh1D
+from SAcouS.Materials import Air
+from SAcouS.acxfem import Helmholtz1DElement, Helmholtz3DElement
+from SAcouS.acxfem import FESpace, HelmholtzAssembler
+from SAcouS.acxfem.PhysicAssembler import index_dtype
+
+
+def peak_memory(function, *args, **kwargs):
+  tracemalloc.start()
+  function(*args, **kwargs)
+  _, peak = tracemalloc.get_traced_memory()
+  tracemalloc.stop()
+  return peak
+
+
+def compare(assembler, bases, memory_budget):
+  # element matrices computed (cached) before measuring
+  assembler.fast_assemble_global_material_matrix(bases, 'Pf')
+  peak_ref = peak_memory(assembler.fast_assemble_global_material_matrix,
+                         bases, 'Pf')
+  K_ref, M_ref = assembler.K, assembler.M
+  peak = peak_memory(assembler.streaming_assemble_material_matrix,
+                     bases,
+                     'Pf',
+                     memory_budget=memory_budget)
+  K, M = assembler.K, assembler.M
+  error = max(
+      abs(K - K_ref).max() / abs(K_ref).max(),
+      abs(M - M_ref).max() / abs(M_ref).max())
+  shared = K.indices.dtype == np.int32 and np.shares_memory(
+      K.indices, M.indices) and np.shares_memory(K.indptr, M.indptr)
+  print("error: ", error, "peak memory (MB): ", peak_ref / 1e6, "->",
+        peak / 1e6)
+  return error, shared, peak < peak_ref
+
+
+def test_case():
+  air = Air('classical air')
+  coeffs = (1 / air.rho_f, 1 / air.K_f)
+
+  # 3D tetrahedra, a few hundred elements per block
+  mesh_reader = MeshReader(current_dir + "/mesh/unit_tube_3D_refine.msh", 3)
+  mesh = mesh_reader.get_mesh(renumber='rcm')
+  mesh.set_subdomains({air: mesh_reader.get_elem_by_physical('air')})
+  elements2node = mesh.get_mesh_coordinates()
+  bases = [
+      Helmholtz3DElement('Pf', 1, elements2node[elem], coeffs)
+      for elem in range(mesh.get_nb_elems())
+  ]
+  assembler = HelmholtzAssembler(FESpace(mesh, bases), dtype=np.complex128)
+  error_3D, shared_3D, smaller_3D = compare(assembler, bases, 2**18)
+
+  # 1D mixed orders (different numbers of dofs per element)
+  num_elem = 50
+  nodes = np.linspace(0, 1, num_elem + 1)
+  connectivity = np.vstack((np.arange(num_elem), np.arange(1,
+                                                           num_elem + 1))).T
+  mesh = Mesh1D(nodes, connectivity)
+  mesh.set_subdomains({air: np.arange(num_elem)})
+  elements2node = mesh.get_mesh_coordinates()
+  bases = [
+      Helmholtz1DElement('Pf', 1 + i % 3, elements2node[i], coeffs)
+      for i in range(num_elem)
+  ]
+  assembler = HelmholtzAssembler(FESpace(mesh, bases), dtype=np.complex128)
+  error_1D, shared_1D, _ = compare(assembler, bases, 2**10)
+
+  # int64 indices beyond 2**31 - 1 nonzeros, no silent wrap around
+  wide = index_dtype(2**31) == np.int64 and index_dtype(2**31 - 2) == np.int32
+
+  if error_3D < 1e-14 and error_1D < 1e-14 and shared_3D and shared_1D and \
+      smaller_3D and wide:
+    print("Test passed!")
+    return True
+  else:
+    print("Test failed!")
+    return False
+
+
+if __name__ == "__main__":
+  result = test_case()
@@ -0,0 +1,134 @@
+# This file is part of PyXfem, a software distributed under the MIT license.
+# For any question, please contact the authors cited below.
+#
+# Copyright (c) 2023
+# 	Shaoqi WU <shaoqiwu@outlook.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+
+
+# Main Test case
+import os
+
+current_dir = os.path.dirname(os.path.realpath(__file__))
+working_dir = os.path.join(current_dir, "..")
+import sys
+
+sys.path.append(working_dir)
+
+import numpy as np
+from scipy.sparse import csc_matrix, diags
+from scipy.sparse.linalg import spsolve, splu
+
+from SAcouS.Mesh import MeshReader
+from SAcouS.Materials import Air, EquivalentFluid
+from SAcouS.acxfem import Helmholtz2DElement
+from SAcouS.acxfem import FESpace
+from SAcouS.acxfem import HelmholtzAssembler
+from SAcouS.acxfem import ApplyBoundaryConditions
+from SAcouS.acxfem import LinearSolver
+from SAcouS.acxfem.Solver import is_complex_symmetric, cocg
+from SAcouS.acxfem.Solver import symmetric_factorization, symmetric_solve
+
+
+def test_case():
+  air = Air('classical air')
+  xfm = EquivalentFluid('foam', 0.98, 3.75e3, 1.17, 742e-6, 110e-6)
+  omega = 2 * np.pi * 1000
+  xfm.set_frequency(omega)
+  mesh_reader = MeshReader(current_dir + "/mesh/half_tube_2.msh")
+  mesh = mesh_reader.get_mesh()
+  subdomains = {
+      air: mesh_reader.get_elem_by_physical('air'),
+      xfm: mesh_reader.get_elem_by_physical('foam')
+  }
+  mesh.set_subdomains(subdomains)
+  elements2node = mesh.get_mesh_coordinates()
+  bases = []
+  for mat, elems in subdomains.items():
+    bases += [
+        Helmholtz2DElement('Pf', 1, elements2node[elem],
+                           (1 / mat.rho_f, 1 / mat.K_f)) for elem in elems
+    ]
+  fe_space = FESpace(mesh, bases)
+  assembler = HelmholtzAssembler(fe_space, dtype=np.complex128)
+  assembler.assembly_global_matrix(bases, 'Pf')
+  left_hand_matrix = assembler.get_global_matrix(omega)
+  right_hand_vec = np.zeros(fe_space.nb_dofs, dtype=np.complex128)
+  BCs_applier = ApplyBoundaryConditions(mesh, fe_space, left_hand_matrix,
+                                        right_hand_vec, omega)
+  left_hand_matrix = BCs_applier.apply_impedance_bc(
+      {
+          'type': 'impedance',
+          'value': lambda x, y: air.rho_f * air.c_f * (1 + 0.5j),
+          'position': mesh_reader.get_facet_by_physical('int')
+      }, 'Pf')
+  right_hand_vec[0] = 1.
+  reference = spsolve(csc_matrix(left_hand_matrix), right_hand_vec)
+
+  # complex symmetric, not hermitian
+  symmetric = is_complex_symmetric(left_hand_matrix)
+  hermitian = abs(left_hand_matrix - left_hand_matrix.conj().T).max() == 0.
+
+  # symmetric factorization, less fill than the default ordering
+  linear_solver = LinearSolver(fe_space=fe_space)
+  linear_solver.solve(left_hand_matrix, right_hand_vec)
+  error_lu = np.linalg.norm(linear_solver.u -
+                            reference) / np.linalg.norm(reference)
+  fill = symmetric_factorization(left_hand_matrix)
+  fill = fill.L.nnz + fill.U.nnz
+  fill_ref = splu(csc_matrix(left_hand_matrix))
+  fill_ref = fill_ref.L.nnz + fill_ref.U.nnz
+
+  # COCG with a Jacobi preconditioner
+  jacobi = diags(1 / left_hand_matrix.diagonal())
+  u, info = cocg(left_hand_matrix, right_hand_vec, tol=1e-10, M=jacobi)
+  error_cocg = np.linalg.norm(u - reference) / np.linalg.norm(reference)
+
+  # non symmetric system: back to the general LU
+  asymmetric = left_hand_matrix.tolil()
+  asymmetric[0, 1] += 1.
+  asymmetric = asymmetric.tocsr()
+  linear_solver.solve(asymmetric, right_hand_vec)
+  reference = spsolve(csc_matrix(asymmetric), right_hand_vec)
+  error_asym = np.linalg.norm(linear_solver.u -
+                              reference) / np.linalg.norm(reference)
+
+  # indefinite with tiny diagonal entries: pivoting off the diagonal
+  A = csc_matrix(np.array([[1e-14, 1., 0.], [1., 1e-14, 2.], [0., 2., 1.]]))
+  f = np.array([1., 2., 3.])
+  residual_pivot = np.abs(A @ symmetric_factorization(A).solve(f) - f).max()
+  residual_solve = np.abs(A @ symmetric_solve(A, f) - f).max()
+  # a failed backward error check falls back to spsolve
+  residual_check = np.abs(
+      A @ symmetric_solve(A, f, tol=1e-20) - f).max()
+
+  print("error symmetric LU: ", error_lu)
+  print("residual tiny pivots: ", residual_pivot, residual_solve,
+        residual_check)
+  print("error COCG: ", error_cocg, info)
+  print("error non symmetric: ", error_asym)
+  print("fill: ", fill_ref, "->", fill)
+  if (symmetric and not hermitian and
+      not is_complex_symmetric(asymmetric) and error_lu < 1e-10 and
+      error_cocg < 1e-8 and info == 0 and error_asym < 1e-10 and
+      fill < fill_ref and residual_pivot < 1e-14 and residual_solve < 1e-14 and
+      residual_check < 1e-14):
+    print("Test passed!")
+    return True
+  else:
+    print("Test failed!")
+    return False
+
+
+if __name__ == "__main__":
+  result = test_case()
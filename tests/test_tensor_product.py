@@ -0,0 +1,182 @@
+# This file is part of PyXfem, a software distributed under the MIT license.
+# For any question, please contact the authors cited below.
+#
+# Copyright (c) 2023
+# 	Shaoqi WU <shaoqiwu@outlook.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+
+
+
+# Main Test case
+import os
+
+current_dir = os.path.dirname(os.path.realpath(__file__))
+working_dir = os.path.join(current_dir, "..")
+import sys
+
+sys.path.append(working_dir)
+
+import tempfile
+from itertools import product
+
+import meshio
+import numpy as np
+from scipy.sparse import diags
+
+from SAcouS.Mesh import MeshReader, LAGRANGE_NODE_ORDER
+from SAcouS.Materials import Air
+from SAcouS.acxfem import Helmholtz2DQuadElement, Helmholtz3DHexElement
+from SAcouS.acxfem import FESpace
+from SAcouS.acxfem import HelmholtzAssembler
+from SAcouS.acxfem import LinearSolver
+from SAcouS.acxfem.MatrixFree import TensorProductHelmholtz
+from SAcouS.acxfem.TensorProduct import tensor_product_element
+
+
+def write_box_mesh(file_name, dim, nb_elems, order=2):
+  """structured quad9/hexahedron27 gmsh mesh of a box whose height grows
+    linearly along x (curved Q2 elements in 3D), written with meshio"""
+  n = [order * n_e + 1 for n_e in nb_elems]
+  grid = np.array(list(product(*[np.linspace(0, 1, n_d) for n_d in n[::-1]
+                                ])))[:, ::-1]
+  grid[:, 1] *= 0.2 * (1 + grid[:, 0])
+  if dim == 3:
+    grid[:, 2] *= 0.1 * (1 + grid[:, 0] * grid[:, 1])
+  node_index = np.arange(len(grid)).reshape(n[::-1])
+  local = np.array(list(product(range(order + 1), repeat=dim)))[:, ::-1]
+  connectivity = []
+  for corner in product(*[range(n_e) for n_e in nb_elems[::-1]]):
+    corner = np.array(corner[::-1]) * order
+    connectivity.append(
+        [node_index[tuple((corner + l)[::-1])] for l in local])
+  connectivity = np.array(connectivity)
+  elem_type, facet_type = ('quad9', 'line3') if dim == 2 else ('hexahedron27',
+                                                              'quad9')
+  # lexicographic -> meshio order
+  cells = connectivity[:, np.argsort(LAGRANGE_NODE_ORDER[elem_type])]
+  inlet = node_index[..., 0].ravel()[:order + 1]
+  if dim == 3:
+    inlet = node_index[:order + 1, :order + 1, 0].ravel()
+  facets = inlet[np.argsort(LAGRANGE_NODE_ORDER.get(facet_type, [0, 2, 1]))]
+  points = np.zeros((len(grid), 3))
+  points[:, :dim] = grid
+  mesh = meshio.Mesh(points, [(facet_type, facets[np.newaxis]),
+                              (elem_type, cells)],
+                     cell_data={
+                         'gmsh:physical': [np.array([1]),
+                                           np.full(len(cells), 2)],
+                         'gmsh:geometrical': [np.array([1]),
+                                              np.full(len(cells), 2)]
+                     },
+                     field_data={
+                         'inlet': np.array([1, dim - 1]),
+                         'fluid': np.array([2, dim])
+                     })
+  meshio.write(file_name, mesh, file_format='gmsh22', binary=False)
+  return connectivity, grid
+
+
+def check_box(dim, nb_elems, omega):
+  air = Air('classical air')
+  with tempfile.TemporaryDirectory() as directory:
+    file_name = os.path.join(directory, 'box.msh')
+    connectivity, grid = write_box_mesh(file_name, dim, nb_elems)
+    mesh_reader = MeshReader(file_name, dim=dim, order=2)
+    mesh = mesh_reader.get_mesh()
+  mesh_reader.init_subdomains(mesh, {'fluid': air})
+  # the reader returns the lexicographic connectivity
+  error_reader = np.abs(np.asarray(mesh.connectivity) - connectivity).max()
+  elements2node = mesh.get_mesh_coordinates()
+  basis_class = Helmholtz2DQuadElement if dim == 2 else Helmholtz3DHexElement
+  bases = [
+      basis_class('Pf', 2, elements2node[elem], (1 / air.rho_f, 1 / air.K_f))
+      for elem in range(mesh.nb_elems)
+  ]
+  geometric_bases = [
+      basis_class('Pf', 2, elements2node[elem], (1., 1.))
+      for elem in range(mesh.nb_elems)
+  ]
+  # exact volume of the box, the geometry is quadratic
+  volume = 0.2 * 1.5 if dim == 2 else 0.1 * (0.2 * 1.5 + 0.02 * 17 / 12)
+  error_volume = abs(sum(basis.me.sum() for basis in geometric_bases) - volume)
+  error_constant = max(
+      np.abs(basis.ke.sum(axis=1)).max() for basis in geometric_bases)
+
+  fe_space = FESpace(mesh, bases)
+  assembler = HelmholtzAssembler(fe_space, dtype=float)
+  assembler.assembly_global_matrix(bases, 'Pf')
+  left_hand_matrix = assembler.get_global_matrix(omega)
+  threaded_assembler = HelmholtzAssembler(fe_space, dtype=float)
+  coeffs = np.tile([1 / air.rho_f, 1 / air.K_f], (mesh.nb_elems, 1))
+  threaded_assembler.threaded_assemble_material_matrix(coeffs,
+                                                       order=2,
+                                                       element='tensor')
+  error_threaded = abs(
+      threaded_assembler.get_global_matrix(omega) - left_hand_matrix).max()
+
+  operator = TensorProductHelmholtz.from_mesh(mesh)
+  x = np.random.rand(fe_space.nb_dofs) + 1j * np.random.rand(fe_space.nb_dofs)
+  reference = left_hand_matrix @ x
+  error_product = np.abs(operator.matvec(x, omega) -
+                         reference).max() / np.abs(reference).max()
+  error_diagonal = np.abs(operator.diagonal(omega) -
+                          left_hand_matrix.diagonal()).max() / np.abs(
+                              left_hand_matrix.diagonal()).max()
+
+  linear_solver = LinearSolver(fe_space=fe_space)
+  linear_solver.solve(operator.as_linear_operator(omega),
+                      reference,
+                      solver='cocg')
+  error_solve = np.linalg.norm(linear_solver.u - x) / np.linalg.norm(x)
+  matrix_nbytes = (left_hand_matrix.data.nbytes +
+                   left_hand_matrix.indices.nbytes +
+                   left_hand_matrix.indptr.nbytes)
+  print(f"{dim}D Q2, {mesh.nb_elems} elements")
+  print("error reader, volume, constant: ", error_reader, error_volume,
+        error_constant)
+  print("error threaded assembly, product, diagonal: ", error_threaded,
+        error_product, error_diagonal)
+  print("error COCG: ", error_solve)
+  print("memory (MB): ", matrix_nbytes / 1e6, "->", operator.nbytes / 1e6)
+  return (error_reader == 0 and error_volume < 1e-12 and
+          error_constant < 1e-10 and error_threaded < 1e-10 * abs(
+              left_hand_matrix).max() and error_product < 1e-12 and
+          error_diagonal < 1e-12 and error_solve < 1e-6)
+
+
+def test_case():
+  # sum factorization against the dense tabulated element
+  element = tensor_product_element(3, 3)
+  identity = np.identity(element.nb_nodes)
+  N = element.values(identity)
+  B = element.gradients(identity)
+  u = np.random.rand(element.nb_nodes)
+  error_values = np.abs(element.values(u) - u @ N).max()
+  error_gradients = np.abs(element.gradients(u) -
+                           np.einsum('i,iaq->aq', u, B)).max()
+
+  omega = 2 * np.pi * 200
+  result_2d = check_box(2, (8, 2), omega)
+  result_3d = check_box(3, (4, 2, 2), omega)
+  print("error sum factorization: ", error_values, error_gradients)
+  if (error_values < 1e-12 and error_gradients < 1e-12 and result_2d and
+      result_3d):
+    print("Test passed!")
+    return True
+  else:
+    print("Test failed!")
+    return False
+
+
+if __name__ == "__main__":
+  result = test_case()
@@ -0,0 +1,131 @@
+# This file is part of PyXfem, a software distributed under the MIT license.
+# For any question, please contact the authors cited below.
+#
+# Copyright (c) 2023
+# 	Shaoqi WU <shaoqiwu@outlook.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+
+# Main Test case
+import os
+
+current_dir = os.path.dirname(os.path.realpath(__file__))
+working_dir = os.path.join(current_dir, "..")
+import sys
+
+sys.path.append(working_dir)
+
+import numpy as np
+
+from SAcouS.Mesh import MeshReader
+from SAcouS.Materials import Air, EquivalentFluid
+from SAcouS.acxfem import Helmholtz2DElement, Helmholtz3DElement
+from SAcouS.acxfem import FESpace, HelmholtzAssembler
+from scipy.sparse import coo_matrix
+
+from SAcouS.acxfem.ElementKernels import color_elements, helmholtz_coefficients
+from SAcouS.acxfem.ElementKernels import ColoredAssembly
+
+
+def compare(mesh_file, dim, order, materials, element):
+  mesh_reader = MeshReader(current_dir + "/mesh/" + mesh_file, dim, order)
+  mesh = mesh_reader.get_mesh()
+  mesh.set_subdomains({
+      mat: mesh_reader.get_elem_by_physical(tag)
+      for tag, mat in materials.items()
+  })
+  elements2node = mesh.get_mesh_coordinates()
+  bases = []
+  for mat, elems in mesh.subdomains.items():
+    bases += [
+        element('Pf', order, elements2node[elem], (1 / mat.rho_f, 1 / mat.K_f))
+        for elem in elems
+    ]
+  fe_space = FESpace(mesh, bases)
+  assembler = HelmholtzAssembler(fe_space, dtype=np.complex128)
+  assembler.assemble_global_material_matrix(bases, 'Pf')
+  K_ref, M_ref = assembler.K, assembler.M
+
+  coeffs = helmholtz_coefficients(fe_space)
+  K_data, M_data = assembler.threaded_assemble_material_matrix(coeffs,
+                                                               order,
+                                                               'Pf',
+                                                               chunk_size=500,
+                                                               nb_threads=4)
+  error = max(
+      abs(assembler.K - K_ref).max() / abs(K_ref).max(),
+      abs(assembler.M - M_ref).max() / abs(M_ref).max())
+  # same bits whatever the number of threads
+  K_data_1, M_data_1 = assembler.threaded_assemble_material_matrix(
+      coeffs, order, 'Pf', chunk_size=500, nb_threads=1)
+  deterministic = np.array_equal(K_data, K_data_1) and np.array_equal(
+      M_data, M_data_1)
+
+  # no dof shared inside a color
+  dofs_index = np.array(fe_space.get_global_dofs_by_base('Pf'))
+  colors = color_elements(dofs_index)
+  valid = all(
+      len(np.unique(dofs_index[colors == c])) == dofs_index[colors == c].size
+      for c in range(colors.max() + 1))
+  print(mesh_file, "error: ", error, "colors: ", colors.max() + 1)
+  return error < 1e-12 and deterministic and valid
+
+
+def high_valence():
+  """fan of triangles around one node: one color per element (> 64)"""
+  nb_elems = 150
+  dofs_index = np.array([(0, i + 1, i + 2) for i in range(nb_elems)])
+  nb_dofs = nb_elems + 2
+  values = np.random.default_rng(0).random((nb_elems, 3, 3))
+  assembly = ColoredAssembly(dofs_index, nb_dofs, chunk_size=16, nb_threads=4)
+  data, = assembly.assemble(lambda elements: (values[elements],), 1)
+  rows = np.repeat(dofs_index, 3, axis=1).ravel()
+  cols = np.tile(dofs_index, (1, 3)).ravel()
+  reference = coo_matrix((values.ravel(), (rows, cols)),
+                         shape=(nb_dofs, nb_dofs)).tocsr()
+  reference.sum_duplicates()
+  reference.sort_indices()
+  indptr, indices = assembly.pattern
+  error = np.abs(data - reference.data).max() / np.abs(reference.data).max()
+  print("fan error: ", error, "colors: ", assembly.nb_colors)
+  return (error < 1e-14 and assembly.nb_colors == nb_elems and
+          np.array_equal(indptr, reference.indptr) and
+          np.array_equal(indices, reference.indices))
+
+
+def test_case():
+  air = Air('classical air')
+  xfm = EquivalentFluid('foam', 0.98, 3.75e3, 1.17, 742e-6, 110e-6)
+  xfm.set_frequency(2 * np.pi * 1000)
+  passed_2D = compare("half_tube_2.msh", 2, 1, {
+      'air': air,
+      'foam': xfm
+  }, Helmholtz2DElement)
+  passed_2D_p2 = compare("mat2_oblique_fine_p2.msh", 2, 2, {
+      'mat1': air,
+      'mat2': xfm
+  }, Helmholtz2DElement)
+  passed_3D = compare("unit_tube_3D_refine.msh", 3, 1, {'air': air},
+                      Helmholtz3DElement)
+
+  passed_fan = high_valence()
+
+  if passed_2D and passed_2D_p2 and passed_3D and passed_fan:
+    print("Test passed!")
+    return True
+  else:
+    print("Test failed!")
+    return False
+
+
+if __name__ == "__main__":
+  result = test_case()
@@ -0,0 +1,104 @@
+# This file is part of PyXfem, a software distributed under the MIT license.
+# For any question, please contact the authors cited below.
+#
+# Copyright (c) 2023
+# 	Shaoqi WU <shaoqiwu@outlook.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# Main Test case
+import os
+
+current_dir = os.path.dirname(os.path.realpath(__file__))
+working_dir = os.path.join(current_dir, "..")
+import sys
+
+sys.path.append(working_dir)
+
+import numpy as np
+
+from SAcouS.Materials import Air, EquivalentFluid, PoroElasticMaterial
+
+from SAcouS.acxtmm import TMMPoroElastic3, BatchTMM
+from SAcouS.acxtmm import bcm_fluid_poro2, bcm_rigid_wall2
+
+air = Air('classical air')
+# melamine-like foam
+foam = PoroElasticMaterial('foam', 0.99, 10900, 1.02, 130e-6, 100e-6, 8.8,
+                           1.4e5, 0.0, 0.1)
+xfm = EquivalentFluid('xfm', 0.98, 3.75e3, 1.17, 742e-6, 110e-6)
+
+
+def absorption_one_by_one(freq, theta, thickness):
+  omega = 2 * np.pi * freq
+  k_0 = omega / Air.c
+  ky = k_0 * np.sin(theta * np.pi / 180)
+  T_xfm = TMMPoroElastic3(foam, omega, ky).transfer_matrix(thickness)
+  I_fp, J_pf = bcm_fluid_poro2(foam.phi)
+  Y_p = bcm_rigid_wall2()
+  D = np.zeros((8, 8), dtype=np.complex128)
+  D[1:5, 0:2] = I_fp
+  D[1:5, 2:] = J_pf @ T_xfm
+  D[5:, 2:] = Y_p
+  jomegaZs = -np.linalg.det(D[1:, 1:]) / np.linalg.det(D[1:, [0, 2, 3, 4, 5, 6,
+                                                              7]])
+  Zs = jomegaZs / (1j * omega)
+  R = (Zs * np.cos(theta * np.pi / 180) -
+       air.Z_f) / (Zs * np.cos(theta * np.pi / 180) + air.Z_f)
+  return 1 - np.abs(R)**2
+
+
+def test_case():
+  freqs = np.linspace(100, 4000, 40)
+  thetas = np.array([0., 15., 30., 45., 60., 75.])
+  omegas = 2 * np.pi * freqs
+
+  # poroelastic layer on rigid backing, whole grid in one call
+  tmm = BatchTMM([(foam, 0.05)], omegas, thetas, backing='rigid')
+  alpha = tmm.absorption()
+  alpha_ref = np.array([[absorption_one_by_one(f, t, 0.05) for t in thetas]
+                        for f in freqs])
+  error_poro = np.abs(alpha - alpha_ref).max()
+
+  # split layer: chained with batched matmul
+  tmm = BatchTMM([(foam, 0.02), (foam, 0.03)], omegas, thetas)
+  error_chain = np.abs(tmm.absorption() - alpha_ref).max()
+
+  # equivalent fluid on rigid backing: Zs = -j Zc cot(kd)
+  tmm = BatchTMM([(xfm, 0.03), (xfm, 0.07)], omegas, [0.])
+  Zs = tmm.surface_impedance()[:, 0]
+  xfm.set_frequency(omegas)
+  Zs_ref = -1j * xfm.Z_f / np.tan(omegas / xfm.c_f * 0.1)
+  error_fluid = np.max(np.abs(Zs - Zs_ref) / np.abs(Zs_ref))
+
+  # air layer between air: full transmission
+  tmm = BatchTMM([(air, 0.2)], omegas, thetas, backing='air')
+  error_air = np.abs(tmm.transmission() - 1).max()
+
+  # energy balance for a mixed stack
+  tmm = BatchTMM([(xfm, 0.02), (foam, 0.05), (air, 0.01)],
+                 omegas,
+                 thetas,
+                 backing='air')
+  alpha = tmm.absorption()
+  balance = alpha.min() >= -1e-10 and alpha.max() <= 1 + 1e-10
+
+  print("error:", error_poro, error_chain, error_fluid, error_air)
+  if max(error_poro, error_chain, error_fluid, error_air) < 1e-8 and balance:
+    print("Test passed!")
+    return True
+  else:
+    print("Test failed!")
+    return False
+
+
+if __name__ == "__main__":
+  result = test_case()
@@ -0,0 +1,149 @@
+# This file is part of PyXfem, a software distributed under the MIT license.
+# For any question, please contact the authors cited below.
+#
+# Copyright (c) 2023
+# 	Shaoqi WU <shaoqiwu@outlook.com
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# Main Test case
+import os
+
+current_dir = os.path.dirname(os.path.realpath(__file__))
+working_dir = os.path.join(current_dir, "..")
+import sys
+
+sys.path.append(working_dir)
+
+import time
+import numpy as np
+from scipy.sparse.linalg import spsolve
+
+from SAcouS.Mesh import Mesh1D
+from SAcouS.Materials import Air, Fluid, EquivalentFluid
+
+from SAcouS.acxtmm import AdmAssembler
+from SAcouS.acxfem import Helmholtz1DElement, FESpace, HelmholtzAssembler
+from SAcouS.acxfem import StaticCondensation, AdmittanceSolver, TridiagonalSolver
+from SAcouS.acxfem import tridiagonal_solve
+from SAcouS.acxfem.Solver import block_tridiagonal_solve
+
+
+def test_case():
+  num_elem = 200
+  num_nodes = num_elem + 1
+  nodes = np.linspace(-1, 1, num_nodes)
+  connectivity = np.vstack((np.arange(0, num_elem), np.arange(1,
+                                                              num_nodes))).T
+  mesh = Mesh1D(nodes, connectivity)
+
+  # ============ FADM: banded assembly over a frequency vector ============
+  air = Air('classical air')
+  xfm = EquivalentFluid('xfm', 0.98, 3.75e3, 1.17, 742e-6, 110e-6)
+  subdomains = {
+      air: np.arange(0, num_elem // 2),
+      xfm: np.arange(num_elem // 2, num_elem)
+  }
+  omegas = 2 * np.pi * np.linspace(100, 2000, 30)
+  theta = 30
+  nature_bcs = {'type': 'fluid_velocity', 'value': 1, 'position': 0}
+  adm_assembler = AdmAssembler(mesh, subdomains, omegas, dtype=np.complex128)
+  bands = adm_assembler.assemble_banded_adm(theta, omegas / Air.c)
+  right_hand_side = adm_assembler.assemble_nature_bc(nature_bcs)
+  start = time.time()
+  banded_solver = TridiagonalSolver(bands, right_hand_side)
+  banded_solver.solve()
+  print("batched tridiagonal solving time:", time.time() - start)
+
+  error_adm = 0.
+  for i, omega in enumerate(omegas):
+    adm_assembler = AdmAssembler(mesh, subdomains, omega, dtype=np.complex128)
+    left_hand_side = adm_assembler.assemble_global_adm(theta, omega / Air.c)
+    adm_solver = AdmittanceSolver(left_hand_side,
+                                  adm_assembler.assemble_nature_bc(nature_bcs))
+    adm_solver.solve()
+    error_adm = max(
+        error_adm,
+        np.linalg.norm(banded_solver.sol[i] - adm_solver.sol) /
+        np.linalg.norm(adm_solver.sol))
+
+  # ============ 1D FEM: condensed Lobatto system over frequencies ============
+  water = Fluid('light fluid', 100., 500.)
+  mesh.set_subdomains({
+      air: np.arange(0, num_elem // 2),
+      water: np.arange(num_elem // 2, num_elem)
+  })
+  elements2node = mesh.get_mesh_coordinates()
+  Pf_bases = []
+  for mat, elems in mesh.subdomains.items():
+    Pf_bases += [
+        Helmholtz1DElement('Pf', 3, elements2node[elem],
+                           (1 / mat.rho_f, 1 / mat.K_f)) for elem in elems
+    ]
+  fe_space = FESpace(mesh, Pf_bases)
+  condensation = StaticCondensation(fe_space, Pf_bases, 'Pf')
+  lower, diag, upper = condensation.condense_banded(omegas)
+  rhs = np.zeros((len(omegas), fe_space.nb_external_dofs), dtype=np.complex128)
+  dof = fe_space.get_dofs_from_var_coord(-1.0, 'Pf')
+  rhs[:, dof] = -1 / (1j * omegas)
+  u = condensation.recover(tridiagonal_solve(lower, diag, upper, rhs))
+
+  helmholtz_assembler = HelmholtzAssembler(fe_space, dtype=np.complex128)
+  helmholtz_assembler.assembly_global_matrix(Pf_bases, 'Pf')
+  error_fem = 0.
+  for i, omega in enumerate(omegas):
+    f = np.zeros(fe_space.nb_dofs, dtype=np.complex128)
+    f[dof] = -1 / (1j * omega)
+    u_ref = spsolve(helmholtz_assembler.get_global_matrix(omega).tocsc(), f)
+    error_fem = max(error_fem,
+                    np.linalg.norm(u[i] - u_ref) / np.linalg.norm(u_ref))
+
+  # ============ breakdowns: zero and tiny pivots, unbatched input ============
+  u = tridiagonal_solve([1.], [0., 1.], [1.], [1., 2.])
+  error_zero_pivot = np.abs(u - [1., 1.]).max()
+  lower, diag, upper = np.array([1., 2.]), np.array([1e-14, 1e-14,
+                                                     1.]), np.array([1., 2.])
+  A = np.diag(diag) + np.diag(lower, -1) + np.diag(upper, 1)
+  f = np.array([1., 2., 3.])
+  error_tiny_pivot = np.abs(A @ tridiagonal_solve(lower, diag, upper, f) -
+                            f).max()
+
+  # ============ block tridiagonal: one matrix, several loads ============
+  n, b = 6, 3
+  rng = np.random.default_rng(0)
+  lower = rng.random((n - 1, b, b))
+  diag = rng.random((n, b, b)) + 4 * np.identity(b)
+  upper = rng.random((n - 1, b, b))
+  f = rng.random((4, n, b))
+  A = np.zeros((n * b, n * b))
+  for i in range(n):
+    A[i * b:(i + 1) * b, i * b:(i + 1) * b] = diag[i]
+    if i < n - 1:
+      A[(i + 1) * b:(i + 2) * b, i * b:(i + 1) * b] = lower[i]
+      A[i * b:(i + 1) * b, (i + 1) * b:(i + 2) * b] = upper[i]
+  u_ref = np.linalg.solve(A, f.reshape(4, -1).T).T.reshape(f.shape)
+  error_block = np.abs(block_tridiagonal_solve(lower, diag, upper, f) -
+                       u_ref).max()
+
+  print("error:", error_adm, error_fem)
+  print("error breakdown, block:", error_zero_pivot, error_tiny_pivot,
+        error_block)
+  if (error_adm < 1e-10 and error_fem < 1e-10 and error_zero_pivot < 1e-14 and
+      error_tiny_pivot < 1e-12 and error_block < 1e-12):
+    print("Test passed!")
+    return True
+  else:
+    print("Test failed!")
+    return False
+
+
+if __name__ == "__main__":
+  result = test_case()